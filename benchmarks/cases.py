@@ -0,0 +1,166 @@
+import itertools
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+from src.domain import Book
+from src.repositories import BookRepository, CachedBookRepository, JournaledBookRepository
+from src.services import BookService
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_frame import BookFrame
+from src.services.book_generator_service_V2 import generate_books_json
+from src.services.book_query import BookQuery, BookQueryService
+
+# the generator stamps checkouts relative to now, pin it so a seed always
+# gives the same catalog
+CATALOG_NOW = datetime(2026, 1, 1)
+
+
+@dataclass
+class Case:
+    name: str
+    # called once per catalog size, returns the function to time
+    setup: Callable[["Catalog"], Callable[[], object]]
+    # touches every book, so books/s is worth reporting
+    per_item: bool = False
+    # slow cases (full parses and rewrites of a 1M catalog) skip the warmup call
+    warmup: int = 1
+
+
+class Catalog:
+    # a generated catalog of `size` books, reused between runs, and the
+    # scratch copies that mutating cases write to
+    def __init__(self, size: int, seed: int, cache_dir: str, work_dir: str):
+        self.size = size
+        self.path = os.path.join(cache_dir, f"books-{size}-seed{seed}.json")
+        if not os.path.exists(self.path):
+            os.makedirs(cache_dir, exist_ok=True)
+            generate_books_json(self.path, count=size, seed=seed, now=CATALOG_NOW)
+        self.work_dir = work_dir
+        self._copies = itertools.count()
+        self._reader: CachedBookRepository | None = None
+        self._frame: BookFrame | None = None
+
+    def copy(self) -> str:
+        os.makedirs(self.work_dir, exist_ok=True)
+        path = os.path.join(self.work_dir, f"books-{self.size}-{next(self._copies)}.json")
+        shutil.copyfile(self.path, path)
+        return path
+
+    def reader(self) -> CachedBookRepository:
+        # one warm, read-only cached repository shared by the lookup cases
+        if self._reader is None:
+            self._reader = CachedBookRepository(self.copy())
+            self._reader.get_all_books()
+        return self._reader
+
+    def frame(self) -> BookFrame:
+        if self._frame is None:
+            self._frame = BookFrame(self.reader().get_all_books())
+        return self._frame
+
+    def sample(self, n: int = 1000) -> list[Book]:
+        books = self.reader().get_all_books()
+        step = max(len(books) // n, 1)
+        return books[::step][:n]
+
+
+def cycling(values: list, fn: Callable) -> Callable[[], object]:
+    # a different argument every call, so nothing is answered from a lucky cache line
+    values = itertools.cycle(values)
+    return lambda: fn(next(values))
+
+
+def new_books(prefix: str) -> Callable[[], Book]:
+    counter = itertools.count()
+    return lambda: Book(title=f"{prefix} {next(counter)}", author="Benchmark", genre="Fantasy", price_usd=9.99)
+
+
+def _adds(repo_type) -> Callable:
+    def setup(catalog: Catalog):
+        repo = repo_type(catalog.copy())
+        repo.get_all_books()
+        make = new_books("Added")
+        return lambda: repo.add_book(make())
+    return setup
+
+
+def _bulk_adds(catalog: Catalog):
+    repo = CachedBookRepository(catalog.copy())
+    repo.get_all_books()
+    make = new_books("Bulk")
+    return lambda: repo.add_books([make() for _ in range(1000)])
+
+
+def _updates(repo_type) -> Callable:
+    def setup(catalog: Catalog):
+        repo = repo_type(catalog.copy())
+        books = repo.get_all_books()
+        prices = itertools.cycle([4.99, 5.99])
+        return cycling(books[::max(len(books) // 100, 1)],
+                       lambda book: repo.update_book(book, {"price_usd": next(prices)}))
+    return setup
+
+
+def _service(catalog: Catalog) -> BookService:
+    service = BookService(catalog.reader())
+    service.get_aggregates()
+    return service
+
+
+def _query(catalog: Catalog):
+    queries = BookQueryService(_service(catalog))
+    query = BookQuery().where("genre", "==", "Fantasy").where("rating", ">=", 4.0).order_by(
+        "rating", descending=True).limit(20)
+    return lambda: queries.run(query)
+
+
+def _analytics(method: str, *args, **kwargs) -> Callable:
+    # no AnalyticsCache, so every call computes
+    def setup(catalog: Catalog):
+        analytics = BookAnalyticsService()
+        frame = catalog.frame()
+        return lambda: getattr(analytics, method)(frame, *args, **kwargs)
+    return setup
+
+
+CASES = [
+    # repository
+    Case("json.get_all_books", lambda c: BookRepository(c.path).get_all_books, per_item=True, warmup=0),
+    Case("json.iter_chunks", lambda c: lambda: sum(map(len, BookRepository(c.path).iter_chunks())),
+         per_item=True, warmup=0),
+    Case("json.find_book_by_name", lambda c: cycling([b.title for b in c.sample(50)],
+                                                     BookRepository(c.path).find_book_by_name), warmup=0),
+    Case("cached.get_all_books", lambda c: c.reader().get_all_books, per_item=True),
+    Case("cached.find_book_by_name", lambda c: cycling([b.title for b in c.sample()], c.reader().find_book_by_name)),
+    Case("cached.get_by_id", lambda c: cycling([b.book_id for b in c.sample()], c.reader().get_by_id)),
+    Case("cached.find_by_title_prefix", lambda c: cycling([b.title[:3] for b in c.sample()],
+                                                          c.reader().find_by_title_prefix)),
+    Case("cached.search", lambda c: cycling([f"{b.title.split()[0]} {b.author.split()[-1][:-1]}"
+                                             for b in c.sample(200)], c.reader().search)),
+    Case("cached.top_rated", lambda c: c.reader().top_rated),
+    Case("cached.add_book", _adds(CachedBookRepository), warmup=0),
+    Case("cached.add_books_1000", _bulk_adds, warmup=0),
+    Case("cached.update_book", _updates(CachedBookRepository), warmup=0),
+    Case("journaled.add_book", _adds(JournaledBookRepository)),
+    Case("journaled.update_book", _updates(JournaledBookRepository)),
+    # service
+    Case("service.find_book_by_name", lambda c: cycling([b.title for b in c.sample()],
+                                                        _service(c).find_book_by_name)),
+    Case("service.average_price", lambda c: _service(c).average_price),
+    Case("query.genre_rating_top20", _query),
+    # analytics
+    Case("analytics.build_frame", lambda c: lambda: BookFrame(c.reader().get_all_books()), per_item=True),
+    Case("analytics.average_price", _analytics("average_price"), per_item=True),
+    Case("analytics.top_rated", _analytics("top_rated"), per_item=True),
+    Case("analytics.top_rated_bayesian", _analytics("top_rated", bayesian=True), per_item=True),
+    Case("analytics.value_scores", _analytics("value_scores"), per_item=True),
+    Case("analytics.group_by_genre", _analytics("group_by", "genre", "price"), per_item=True),
+    Case("analytics.medians_by_genre", _analytics("get_medians_by_genre"), per_item=True),
+    Case("analytics.most_popular_genre", _analytics("most_popular_genre", "2025-07-01", "2026-01-01"),
+         per_item=True),
+    Case("analytics.checkout_histogram", _analytics("checkout_histogram", "week"), per_item=True),
+    Case("analytics.summarize_stream", lambda c: lambda: BookAnalyticsService().summarize_stream([c.frame()]),
+         per_item=True),
+]
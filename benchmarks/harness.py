@@ -0,0 +1,123 @@
+import gc
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable
+import numpy as np
+
+
+@dataclass
+class Measurement:
+    # one benchmark case at one catalog size, times in seconds
+    case: str
+    size: int
+    runs: int
+    min_s: float
+    mean_s: float
+    p50_s: float
+    p95_s: float
+    p99_s: float
+    ops_per_s: float
+    # books handled per second (size / p50) for cases that touch the whole catalog
+    items_per_s: float | None
+    # peak bytes allocated by Python during one call (tracemalloc)
+    peak_bytes: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def measure(case: str, size: int, fn: Callable[[], object], min_runs: int = 3, max_runs: int = 200,
+            budget_s: float = 2.0, warmup: int = 1, per_item: bool = False) -> Measurement:
+    # calls fn until it has min_runs timings and either max_runs or budget_s is
+    # used up, so a 5µs lookup gets hundreds of samples and a 10s full parse
+    # just a few. Memory is measured on a separate call, tracemalloc slows
+    # everything down and would skew the timings.
+    for _ in range(warmup):
+        fn()
+
+    # like timeit, no collector pauses landing in a random sample
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while len(timings) < max_runs and (len(timings) < min_runs or time.perf_counter() - started < budget_s):
+            t0 = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t0)
+    finally:
+        gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples = np.array(timings)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]).tolist()
+    return Measurement(
+        case=case,
+        size=size,
+        runs=len(timings),
+        min_s=float(samples.min()),
+        mean_s=float(samples.mean()),
+        p50_s=p50,
+        p95_s=p95,
+        p99_s=p99,
+        ops_per_s=1 / p50 if p50 else float("inf"),
+        items_per_s=size / p50 if per_item and p50 else None,
+        peak_bytes=peak,
+    )
+
+
+def environment() -> dict:
+    # what the numbers were measured on, baselines only compare on similar machines
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float = 0.25,
+            min_delta_s: float = 20e-6) -> list[dict]:
+    # one row per (case, size) in both runs; a regression is a p50 (or peak
+    # memory) more than threshold worse than the baseline. Timings within
+    # min_delta_s of each other are noise whatever the ratio
+    previous = {(row["case"], row["size"]): row for row in baseline}
+    rows = []
+    for row in results:
+        old = previous.get((row["case"], row["size"]))
+        if old is None:
+            continue
+        time_ratio = row["p50_s"] / old["p50_s"] if old["p50_s"] else float("inf")
+        memory_ratio = row["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else 1.0
+        slower = time_ratio > 1 + threshold and row["p50_s"] - old["p50_s"] > min_delta_s
+        bigger = memory_ratio > 1 + threshold and row["peak_bytes"] - old["peak_bytes"] > 64 * 1024
+        rows.append({
+            "case": row["case"],
+            "size": row["size"],
+            "baseline_p50_s": old["p50_s"],
+            "p50_s": row["p50_s"],
+            "time_ratio": time_ratio,
+            "memory_ratio": memory_ratio,
+            "regression": slower or bigger,
+        })
+    return rows
@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+from benchmarks.cases import CASES, Catalog
+from benchmarks.harness import compare, environment, measure
+
+# Benchmarks for the repository, service and analytics hot paths.
+#
+#   python -m benchmarks.run                          # 1k, 100k and 1M books
+#   python -m benchmarks.run --sizes 1000 --cases analytics
+#   python -m benchmarks.run --save-baseline          # after a deliberate change
+#
+# Catalogs come from the seeded V2 generator and are kept in
+# benchmarks/.catalogs between runs. Every run writes its results to
+# benchmarks/results/, and is compared against benchmarks/baseline.json:
+# anything more than --threshold slower (p50) or bigger (peak memory) is
+# flagged, and the exit status is 1 so CI can fail on it. Baselines only
+# mean something on the machine they were recorded on.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the catalog hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cases", nargs="*", default=[], help="only cases whose name contains one of these")
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds of timing per case")
+    parser.add_argument("--out", default=None, help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=os.path.join(HERE, "baseline.json"))
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--catalogs", default=os.path.join(HERE, ".catalogs"))
+    parser.add_argument("--work", default=os.path.join(HERE, ".work"), help="scratch copies for mutating cases")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in CASES if not args.cases or any(name in case.name for name in args.cases)]
+    results = []
+    work_dir = args.work
+    try:
+        for size in args.sizes:
+            catalog = Catalog(size, args.seed, args.catalogs, os.path.join(work_dir, str(size)))
+            for case in cases:
+                fn = case.setup(catalog)
+                result = measure(case.name, size, fn, budget_s=args.budget, warmup=case.warmup,
+                                 per_item=case.per_item)
+                results.append(result.to_dict())
+                print(_format(result.to_dict()), flush=True)
+                # a mutating case holds its own copy of the catalog, let it go before the next one
+                del fn
+            # the next size needs the memory more than this one's scratch copies
+            del catalog
+            shutil.rmtree(os.path.join(work_dir, str(size)), ignore_errors=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    run = {"environment": environment(), "seed": args.seed, "results": results}
+    out = args.out or os.path.join(HERE, "results", f"{run['environment']['timestamp'].replace(':', '')}.json")
+    _write(out, run)
+    print(f"\nresults written to {out}")
+
+    if args.save_baseline:
+        _write(args.baseline, run)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against, run with --save-baseline to record one")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline["results"], args.threshold)
+    regressions = [row for row in rows if row["regression"]]
+
+    print(f"\ncompared with the baseline from {baseline['environment']['timestamp']} "
+          f"({baseline['environment'].get('commit')}), threshold {args.threshold:.0%}")
+    current = run["environment"]
+    for key in ("python", "numpy"):
+        if baseline["environment"].get(key) != current[key]:
+            print(f"note: the baseline was recorded on {key} {baseline['environment'].get(key)}, "
+                  f"this run is {current[key]}, the timings may not be comparable")
+    # a size the baseline never ran (e.g. 1M on a small machine) is reported, not silently passed
+    recorded = {row["size"] for row in baseline["results"]}
+    for size in sorted({row["size"] for row in results} - recorded):
+        print(f"{size:,} books: not compared, the baseline has no results for this size "
+              f"(record one with --save-baseline)")
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['case']:<32} {row['size']:>9,} {row['baseline_p50_s'] * 1e3:>10.3f}ms "
+              f"-> {row['p50_s'] * 1e3:>10.3f}ms  x{row['time_ratio']:.2f} mem x{row['memory_ratio']:.2f} {flag}")
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+def _format(row: dict) -> str:
+    items = f" {row['items_per_s']:>12,.0f} books/s" if row["items_per_s"] else ""
+    return (f"{row['case']:<32} {row['size']:>9,}  p50 {row['p50_s'] * 1e3:>10.3f}ms  "
+            f"p95 {row['p95_s'] * 1e3:>10.3f}ms  p99 {row['p99_s'] * 1e3:>10.3f}ms  "
+            f"runs {row['runs']:>4}  peak {row['peak_bytes'] / 2**20:>8.1f}MiB{items}")
+
+
+def _write(path: str, run: dict) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
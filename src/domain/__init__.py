@@ -1 +1,2 @@
-from .book import Book
+from .book import Book, CompactBook
+from .checkout_history import CheckoutEvent
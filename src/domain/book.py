@@ -1,8 +1,14 @@
 from dataclasses import dataclass, field
 from typing import Optional
+import sys
 import uuid
 
-@dataclass
+# low-cardinality text fields, every book with the same genre shares one string object
+INTERNED_FIELDS = ("genre", "publisher", "language", "format")
+
+
+# slots instead of a per-instance __dict__, which is most of a Book's size
+@dataclass(slots=True)
 class Book:
     title: str
     author: str
@@ -21,6 +27,12 @@ class Book:
     available: Optional[bool] = None
     book_id: str = field(default_factory=lambda: str(uuid.uuid4()))
 
+    def __post_init__(self):
+        for name in INTERNED_FIELDS:
+            value = getattr(self, name)
+            if type(value) is str:
+                setattr(self, name, sys.intern(value))
+
     def check_out(self):
         if not self.available:
             raise RuntimeError("Book is already checked out")        
@@ -33,7 +45,8 @@ class Book:
 
     @classmethod
     def from_dict(cls, data: dict) -> "Book":
-        return cls(**data) # kwargs - key with arguments
+        # extra keys (publisher_email, ...) are dropped instead of crashing __init__
+        return cls(**{key: value for key, value in data.items() if key in BOOK_FIELDS})
     
     def to_dict(self) -> dict:
         return {
@@ -83,3 +96,31 @@ class Book:
                 f"Last Checked out: {self.last_checkout}\n"
                 f"Price: ${self.price_usd}\n"
                 f"~~~~~ Book ID: {self.book_id} ~~~~~\n")
+
+
+BOOK_FIELDS = frozenset(Book.__dataclass_fields__)
+
+
+class CompactBook(Book):
+    # Same fields and behaviour as Book, but a canonical UUID book_id is kept
+    # as its 16 raw bytes instead of a 36 character string. Reading book_id
+    # still gives back the string, so to_dict/from_dict round-trip unchanged.
+    # Ids that aren't canonical lowercase UUIDs are kept as they are.
+    __slots__ = ("_packed_id",)
+
+    @property
+    def book_id(self) -> str:
+        packed = self._packed_id
+        return str(uuid.UUID(bytes=packed)) if type(packed) is bytes else packed
+
+    @book_id.setter
+    def book_id(self, value: str):
+        self._packed_id = pack_book_id(value)
+
+
+def pack_book_id(book_id):
+    try:
+        packed = uuid.UUID(book_id)
+    except (TypeError, ValueError, AttributeError):
+        return book_id
+    return packed.bytes if str(packed) == book_id else book_id
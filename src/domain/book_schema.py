@@ -0,0 +1,248 @@
+import math
+import re
+import uuid
+from datetime import datetime
+from typing import Callable
+
+# What a clean Book looks like, field by field, and how raw values from the
+# outside world are coerced into it. compile_schema turns the table into one
+# function per field, so checking a record is a loop over ready-made
+# closures instead of re-reading the rules for every value.
+
+# values that mean "we don't know", they become None instead of an error
+MISSING_TOKENS = frozenset({"", "n/a", "na", "none", "null", "unknown", "-"})
+
+TRUE_TOKENS = frozenset({"true", "yes", "y", "1"})
+FALSE_TOKENS = frozenset({"false", "no", "n", "0"})
+
+# spellings we've seen for the same category, keyed by the casefolded spelling
+ALIASES = {
+    "language": {"eng": "English", "english": "English", "en": "English"},
+    "format": {"audio book": "Audiobook", "e-book": "Ebook", "paper back": "Paperback"},
+}
+
+# field -> (kind, required, (min, max))
+BOOK_SCHEMA = {
+    "book_id": ("uuid", False, None),
+    "title": ("text", True, None),
+    "author": ("text", True, None),
+    "genre": ("category", False, None),
+    "publication_year": ("int", False, (0, "next_year")),
+    "page_count": ("int", False, (1, None)),
+    "average_rating": ("float", False, (0.0, 5.0)),
+    "ratings_count": ("int", False, (0, None)),
+    "price_usd": ("float", False, (0.0, None)),
+    "publisher": ("category", False, None),
+    "language": ("category", False, None),
+    "format": ("category", False, None),
+    "in_print": ("bool", False, None),
+    "sales_millions": ("float", False, (0.0, None)),
+    "last_checkout": ("datetime", False, None),
+    "available": ("bool", False, None),
+}
+
+
+class FieldError(ValueError):
+    # reason is a short code ("not a number", "out of range", ...) so errors
+    # can be counted per field
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CompiledSchema:
+    def __init__(self, coercers: dict[str, Callable], required: frozenset[str]):
+        self.coercers = coercers
+        self.required = required
+        self._items = tuple(coercers.items())
+
+    def coerce(self, record: dict) -> tuple[dict, dict[str, str], list[str]]:
+        # returns (clean values, {field: reason} for values that had to be
+        # rejected, fields that were missing or unknown-valued)
+        clean = {}
+        errors = {}
+        missing = []
+        for name, coerce in self._items:
+            try:
+                value = coerce(record.get(name))
+            except FieldError as e:
+                errors[name] = e.reason
+                continue
+            if value is None:
+                if name in self.required:
+                    errors[name] = "missing"
+                elif name in record:
+                    missing.append(name)
+                continue
+            clean[name] = value
+        return clean, errors, missing
+
+    def unknown_fields(self, record: dict) -> list[str]:
+        return [name for name in record if name not in self.coercers]
+
+
+def compile_schema(schema: dict = BOOK_SCHEMA, now: datetime | None = None) -> CompiledSchema:
+    # "next_year" bounds are resolved here, once, against now
+    now = now or datetime.now()
+    coercers = {}
+    for name, (kind, _, bounds) in schema.items():
+        if bounds is not None:
+            bounds = tuple(now.year + 1 if bound == "next_year" else bound for bound in bounds)
+        coercers[name] = _COERCER_FACTORIES[kind](name, bounds)
+    required = frozenset(name for name, (_, is_required, _) in schema.items() if is_required)
+    return CompiledSchema(coercers, required)
+
+
+def _is_missing_text(value: str) -> bool:
+    return value.strip().casefold() in MISSING_TOKENS
+
+
+def _check_range(value, bounds):
+    if bounds is not None:
+        low, high = bounds
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise FieldError("out of range")
+    return value
+
+
+# every coercer checks None and the already-right type first, most values
+# in a catalog are fine and should cost one type() check
+
+
+def _int_coercer(name: str, bounds) -> Callable:
+    def coerce(value):
+        if value is None:
+            return None
+        if type(value) is int:
+            return _check_range(value, bounds)
+        if type(value) is str:
+            if _is_missing_text(value):
+                return None
+            try:
+                return _check_range(int(value.strip()), bounds)
+            except ValueError:
+                pass
+        elif type(value) is float and value.is_integer():
+            return _check_range(int(value), bounds)
+        raise FieldError("not an integer")
+    return coerce
+
+
+def _float_coercer(name: str, bounds) -> Callable:
+    def coerce(value):
+        if value is None:
+            return None
+        if type(value) is float or type(value) is int:
+            number = float(value)
+        elif type(value) is str:
+            if _is_missing_text(value):
+                return None
+            try:
+                number = float(value.strip())
+            except ValueError:
+                raise FieldError("not a number")
+        else:
+            raise FieldError("not a number")
+        if not math.isfinite(number):
+            raise FieldError("not a number")
+        return _check_range(number, bounds)
+    return coerce
+
+
+def _bool_coercer(name: str, bounds) -> Callable:
+    def coerce(value):
+        if value is None or type(value) is bool:
+            return value
+        if type(value) is int and value in (0, 1):
+            return bool(value)
+        if type(value) is str:
+            token = value.strip().casefold()
+            if token in TRUE_TOKENS:
+                return True
+            if token in FALSE_TOKENS:
+                return False
+            if token in MISSING_TOKENS:
+                return None
+        raise FieldError("not a boolean")
+    return coerce
+
+
+def _text_coercer(name: str, bounds) -> Callable:
+    def coerce(value):
+        if value is None:
+            return None
+        if type(value) is not str:
+            raise FieldError("not a string")
+        return value.strip() or None
+    return coerce
+
+
+def _category_coercer(name: str, bounds) -> Callable:
+    # few distinct values, so each raw spelling is only worked out once
+    aliases = ALIASES.get(name, {})
+    seen: dict[str, str | None] = {}
+
+    def coerce(value):
+        if value is None:
+            return None
+        if type(value) is not str:
+            raise FieldError("not a string")
+        try:
+            return seen[value]
+        except KeyError:
+            pass
+        clean = None if _is_missing_text(value) else aliases.get(value.strip().casefold(), value.strip())
+        if len(seen) < 10_000:
+            seen[value] = clean
+        return clean
+    return coerce
+
+
+UUID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+def _uuid_coercer(name: str, bounds) -> Callable:
+    def coerce(value):
+        if value is None:
+            return None
+        if type(value) is not str:
+            raise FieldError("not a uuid")
+        # canonical ids (nearly all of them) skip building a UUID
+        if UUID_PATTERN.fullmatch(value):
+            return value
+        if _is_missing_text(value):
+            return None
+        try:
+            return str(uuid.UUID(value.strip()))
+        except ValueError:
+            raise FieldError("not a uuid")
+    return coerce
+
+
+def _datetime_coercer(name: str, bounds) -> Callable:
+    # the value is kept as text (that's what Book stores), it just has to parse
+    def coerce(value):
+        if value is None:
+            return None
+        if type(value) is not str:
+            raise FieldError("not a datetime")
+        if _is_missing_text(value):
+            return None
+        value = value.strip()
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            raise FieldError("not a datetime")
+        return value
+    return coerce
+
+
+_COERCER_FACTORIES = {
+    "int": _int_coercer,
+    "float": _float_coercer,
+    "bool": _bool_coercer,
+    "text": _text_coercer,
+    "category": _category_coercer,
+    "uuid": _uuid_coercer,
+    "datetime": _datetime_coercer,
+}
@@ -2,3 +2,37 @@ from dataclasses import dataclass, field
 from typing import Optional
 import uuid
 
+CHECK_OUT = "checkout"
+CHECK_IN = "checkin"
+
+
+# one check-out or check-in of a book, appended to the history and never changed
+@dataclass(slots=True)
+class CheckoutEvent:
+    book_id: str
+    action: str
+    # ISO timestamp, same format as Book.last_checkout
+    timestamp: str
+    # copied from the book at the time, so circulation per genre doesn't need the catalog
+    genre: Optional[str] = None
+    # who has it, for due date reminders later
+    patron: Optional[str] = None
+    event_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+    def __post_init__(self):
+        if self.action not in (CHECK_OUT, CHECK_IN):
+            raise ValueError(f"Unknown checkout action {self.action}")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CheckoutEvent":
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        return {
+            "event_id": self.event_id,
+            "book_id": self.book_id,
+            "action": self.action,
+            "timestamp": self.timestamp,
+            "genre": self.genre,
+            "patron": self.patron,
+        }
@@ -1,31 +1,79 @@
+from time import perf_counter
+# before any other import, --timing measures time to first prompt from here
+STARTED = perf_counter()
+
+import argparse
+import os
 from src.domain import Book
-from src.repositories import BookRepository
+from src.repositories import CachedBookRepository, CheckoutHistoryRepository
+from src.repositories.instrumentation import INSTRUMENTATION, profile
 from src.services import generate_books_json
 from src.services import BookService
-from src.services.book_analytics_service import BookAnalyticsService
-import requests
+
+# numpy (analytics, checkout trends) and requests (jokes) are imported by the
+# commands that use them, a session that only looks books up never pays for them
+
 
 class BookREPL:
-    def __init__(self, book_svc, book_analytic_svc):
+    def __init__(self, book_svc, book_analytic_svc, checkout_svc=None):
         self.running = True
         self.book_service = book_svc
-        self.book_analytics_service = book_analytic_svc
+        # the analytics and checkout services can also be functions that build
+        # them, called the first time a command needs the service
+        self._book_analytics_service = book_analytic_svc
+        self._checkout_service = checkout_svc
+        # set from the stats menu, the next main menu command runs under cProfile
+        self.profile_next = False
+        # startup timings, printed with the first prompt when set (--timing)
+        self.timings: dict[str, float] | None = None
+
+    @property
+    def book_analytics_service(self):
+        if callable(self._book_analytics_service):
+            self._book_analytics_service = self._build(self._book_analytics_service)
+        return self._book_analytics_service
+
+    @property
+    def checkout_service(self):
+        if callable(self._checkout_service):
+            self._checkout_service = self._build(self._checkout_service)
+        return self._checkout_service
+
+    def _build(self, factory):
+        service = factory()
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.attach(service)
+        return service
 
     def start(self):
         print("Welcome to the Book app!")
+        if self.timings is not None:
+            self.timings["first prompt"] = perf_counter() - STARTED
+            print(", ".join(f"{name} {seconds * 1e3:.0f}ms" for name, seconds in self.timings.items()))
         while self.running:
             self.print_main_menu()
             cmd = input(">>>").strip()
             self.handle_command(cmd)
 
     def handle_command(self, cmd):
+        if self.profile_next and cmd not in ("0", "9", "stats"):
+            self.profile_next = False
+            _, report = profile(self.run_command, cmd, path="repl.prof")
+            print(report)
+            print("Full profile written to repl.prof")
+            return
+        self.run_command(cmd)
+
+    def run_command(self, cmd):
         if cmd == "0":
             self.running = False
+            # keep the search index so the next start doesn't re-index
+            self.book_service.save_search_index()
             print("Goodbye")
         elif cmd == "1":
             self.get_all_records()
         elif cmd == "2":
-            self.update_book()
+            self.check_out_or_in()
         elif cmd == "3":
             self.add_book()
         elif cmd == "4":
@@ -38,9 +86,62 @@ class BookREPL:
             self.analytics()
         elif cmd == "8":
             self.get_joke()
+        elif cmd in ("9", "stats"):
+            self.stats()
         else:
             print("Please use a valid command")
 
+    def stats(self):
+        while True:
+            self.print_stats_menu()
+            cmd = input(">>>").strip()
+            if cmd == "0":
+                break
+            if cmd == "1":
+                self.show_stats()
+            elif cmd == "2":
+                self.toggle_instrumentation()
+            elif cmd == "3":
+                INSTRUMENTATION.reset()
+                print("Stats cleared")
+            elif cmd == "4":
+                self.export_stats()
+            elif cmd == "5":
+                self.profile_next = True
+                print("The next command will be profiled")
+                break
+            else:
+                print("Please select a valid stats command")
+
+    def show_stats(self):
+        if not INSTRUMENTATION.methods:
+            print("Nothing recorded yet" if INSTRUMENTATION.enabled else "Instrumentation is off")
+            return
+        print(INSTRUMENTATION.table())
+
+    def toggle_instrumentation(self):
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.disable()
+            print("Instrumentation is off")
+            return
+        INSTRUMENTATION.enable()
+        INSTRUMENTATION.attach(self.book_service.repo, "repository")
+        INSTRUMENTATION.attach(self.book_service)
+        # services that aren't built yet are attached when they are
+        for service in (self._book_analytics_service, self._checkout_service):
+            if service is not None and not callable(service):
+                INSTRUMENTATION.attach(service)
+        print("Instrumentation is on")
+
+    def export_stats(self):
+        path = input("Export to [stats.json]: ").strip() or "stats.json"
+        try:
+            INSTRUMENTATION.export(path)
+        except OSError as e:
+            print(e)
+            return
+        print(f"Stats written to {path}")
+
     def analytics(self):
         while True:
             self.print_analytics_menu()
@@ -58,14 +159,68 @@ class BookREPL:
                 self.get_median_price_by_genre()
             elif cmd == "5":
                 self.most_popular_genre()
+            elif cmd == "6":
+                self.get_group_stats()
+            elif cmd == "7":
+                self.get_top_books_bayesian()
+            elif cmd == "8":
+                self.verify_aggregates()
+            elif cmd == "9":
+                self.get_cache_stats()
+            elif cmd == "10":
+                self.get_checkout_trends()
             else:
                 print("Please select a valid analytics command")
 
     def get_median_price_by_genre(self):
-        books = self.book_service.get_all_books()
-        medians = self.book_analytics_service.get_medians_by_genre(books)
+        frame = self.get_book_frame()
+        medians = self.book_analytics_service.get_medians_by_genre(frame)
         print(medians)
 
+    def get_checkout_trends(self):
+        from src.services.time_windows import this_year
+        freq = input("Per (day/week/month) [month]: ").strip() or "month"
+        start, _ = this_year()
+        try:
+            counts = self.book_analytics_service.checkout_histogram(self.get_book_frame(), freq, start)
+        except ValueError as e:
+            print(e)
+            return
+        for bucket, n in counts.items():
+            print(f"{bucket}: {n}")
+
+    def get_cache_stats(self):
+        cache = self.book_analytics_service.cache
+        if cache is None:
+            print("Analytics caching is off")
+            return
+        print(", ".join(f"{name}: {value}" for name, value in cache.stats().items()))
+
+    def verify_aggregates(self):
+        drift = self.book_service.verify_aggregates()
+        if not drift:
+            print("Aggregates match the catalog")
+        for metric, (materialized, recomputed) in drift.items():
+            print(f"{metric}: materialized {materialized}, recomputed {recomputed}")
+
+    def get_group_stats(self):
+        key = input("Group by (genre/publisher/format/language/decade) [genre]: ").strip() or "genre"
+        value = input("Statistic of (price/rating/ratings_count/page_count/sales) [price]: ").strip() or "price"
+
+        try:
+            stats = self.book_analytics_service.group_by(self.get_book_frame(), key, value)
+        except ValueError as e:
+            print(e)
+            return
+
+        for group, row in stats.items():
+            print(f"{group}: " + ", ".join(f"{name}={stat:g}" for name, stat in row.items()))
+
+    def get_book_frame(self):
+        # the analytics service only rebuilds its columns when the catalog version changes
+        return self.book_analytics_service.get_frame(
+            self.book_service.get_analytics_source, self.book_service.catalog_version())
+
     def print_main_menu(self):
         print(
             "Available Commands\n"
@@ -77,27 +232,43 @@ class BookREPL:
             "[6] Find Book By Name\n"
             "[7] Analytics\n"
             "[8] Get Joke\n"
+            "[9] Stats\n"
             "[0] EXIT\n"
         )
 
+    def print_stats_menu(self):
+        print(
+            "Stats\n"
+            "[1] Show Table\n"
+            f"[2] Turn Instrumentation {'Off' if INSTRUMENTATION.enabled else 'On'}\n"
+            "[3] Reset\n"
+            "[4] Export to JSON\n"
+            "[5] Profile Next Command\n"
+            "[0] MAIN MENU\n"
+        )
+
     def print_analytics_menu(self):
         print(
             "Available Analytics\n"
             "[1] Average Price\n"
             "[2] Top Books\n"
             "[3] Value Scores\n"
-            "[4] Average Price by Genre\n"
+            "[4] Median Price by Genre\n"
             "[5] Most Popular Genre of the Year\n"
+            "[6] Group Statistics\n"
+            "[7] Top Books (Bayesian Average)\n"
+            "[8] Verify Aggregates\n"
+            "[9] Cache Statistics\n"
+            "[10] Checkout Trends\n"
             "[0] MAIN MENU\n"
         )
 
     def most_popular_genre(self):
-        books = self.book_service.get_all_books()
-        print(self.book_analytics_service.most_popular_genre(books))
+        print(self.book_service.most_popular_genre())
 
     def update_book(self):
         query = input("Please enter book name: ")
-        books = self.book_service.find_book_by_name(query)
+        books = self.search_books(query)
 
         if not books:
             print(f"No books found with the title {query}")
@@ -152,6 +323,29 @@ class BookREPL:
                 else:
                     print(f"{status}: none")
 
+    def check_out_or_in(self):
+        if self.checkout_service is None:
+            print("Checkout history is not available")
+            return
+
+        query = input("Please enter book name: ")
+        books = self.search_books(query)
+        if not books:
+            print(f"No books found with the title {query}")
+            return
+        book = books[0] if len(books) == 1 else self.get_book_choice(books)
+
+        try:
+            if book.available:
+                patron = input("Patron email (optional): ").strip() or None
+                event = self.checkout_service.check_out(book, patron)
+                print(f"{book} checked out at {event.timestamp}")
+            else:
+                event = self.checkout_service.check_in(book)
+                print(f"{book} checked in at {event.timestamp}")
+        except RuntimeError as e:
+            print(e)
+
     def get_int(self, query: str) -> int:
         while True:
             str_input = input(query)
@@ -164,6 +358,12 @@ class BookREPL:
                 print("Please enter a valid whole number")
 
 
+    def search_books(self, query: str) -> list[Book]:
+        # an exact title match wins outright, otherwise the ranked (typo
+        # tolerant) search results, best first
+        exact = self.book_service.find_book_by_name(query)
+        return exact if exact else self.book_service.search(query)
+
     def get_book_choice(self, books: list[Book]) -> Book:
         print("Multiple entries found with that name, select one")
         print(*(f"[{i}] {book}"
@@ -173,7 +373,7 @@ class BookREPL:
 
     def remove_book(self):
         query = input("Please enter book name: ")
-        books = self.book_service.find_book_by_name(query)
+        books = self.search_books(query)
 
         if not books:
             print(f"No books were found with the title: {query}")
@@ -203,21 +403,25 @@ class BookREPL:
                 print(f"{ie} Please enter a choice in the range of 1 and {length}")
 
     def get_average_price(self):
-        books = self.book_service.get_all_books()
-        avg_price = self.book_analytics_service.average_price(books)
+        avg_price = self.book_service.average_price()
         print(f"Average Price: ${avg_price}")
 
     def get_top_books(self):
-        books = self.book_service.get_all_books()
-        top_rated_books = self.book_analytics_service.top_rated(books)
+        # served from the repository's leaderboard, no full sort
+        top_rated_books = self.book_service.top_rated()
+        print(top_rated_books)
+
+    def get_top_books_bayesian(self):
+        frame = self.get_book_frame()
+        top_rated_books = self.book_analytics_service.top_rated(frame, bayesian=True)
         print(top_rated_books)
 
     def get_value_scores(self):
-        books = self.book_service.get_all_books()
-        value_scores = self.book_analytics_service.value_scores(books)
+        value_scores = self.book_service.value_scores()
         print(value_scores)
 
     def get_joke(self):
+        import requests
         try:
             url = "https://api.chucknorris.io/jokes/random"
             response = requests.get(url, timeout=5)
@@ -231,8 +435,9 @@ class BookREPL:
             print(f"Something else went wrong: {e}")
 
     def get_all_records(self):
-        books = self.book_service.get_all_books()
-        print(books)
+        # print as we go instead of building the whole catalog first
+        for chunk in self.book_service.iter_chunks(1000):
+            print(chunk)
 
     def add_book(self):
         try:
@@ -247,14 +452,52 @@ class BookREPL:
 
     def find_book_by_name(self):
         query = input("Please enter book name: ")
-        books = self.book_service.find_book_by_name(query)
+        books = self.search_books(query)
         print(books)
 
 
+def make_analytics_service():
+    from src.services.analytics_cache import AnalyticsCache
+    from src.services.book_analytics_service import BookAnalyticsService
+    return BookAnalyticsService(AnalyticsCache())
+
+
+def make_checkout_service(book_service: BookService, dirpath: str):
+    from src.services.checkout_service import CheckoutService
+    return CheckoutService(book_service, CheckoutHistoryRepository(dirpath))
+
+
+def main(argv: list[str] | None = None) -> BookREPL:
+    parser = argparse.ArgumentParser(description="The Book app")
+    parser.add_argument("--catalog", default="books.json")
+    parser.add_argument("--checkouts", default="checkouts", help="checkout history directory")
+    # the catalog used to be regenerated (and overwritten) on every launch
+    parser.add_argument("--regenerate", type=int, nargs="?", const=500, default=None, metavar="COUNT",
+                        help="replace the catalog with COUNT generated books (default 500)")
+    parser.add_argument("--warm", action="store_true",
+                        help="load the catalog before the first prompt, from its snapshot and saved search index")
+    parser.add_argument("--timing", action="store_true", help="print how long startup took")
+    args = parser.parse_args(argv)
+
+    timings = {"imports": perf_counter() - STARTED}
+    if args.regenerate is not None or not os.path.exists(args.catalog):
+        generate_books_json(args.catalog, count=args.regenerate or 500)
+        timings["generate"] = perf_counter() - STARTED - sum(timings.values())
+
+    book_service = BookService(CachedBookRepository(args.catalog, use_snapshot=True))
+    if args.warm:
+        # bounded by the snapshot load: without a fresh snapshot nothing is
+        # loaded here and the first command reads the catalog instead
+        warm = book_service.warm_start()
+        timings["warm start" if warm else "warm start (no snapshot yet)"] = \
+            perf_counter() - STARTED - sum(timings.values())
+
+    repl = BookREPL(book_service, make_analytics_service,
+                    lambda: make_checkout_service(book_service, args.checkouts))
+    if args.timing:
+        repl.timings = timings
+    return repl
+
+
 if __name__ == "__main__":
-    generate_books_json()
-    repo = BookRepository("books.json")
-    book_service = BookService(repo)
-    book_analytics_service = BookAnalyticsService()
-    repl = BookREPL(book_service, book_analytics_service)
-    repl.start()
+    main().start()
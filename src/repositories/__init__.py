@@ -1,2 +1,13 @@
 from .book_repository import BookRepository
-from .book_repository_protocol import BookRepositoryProtocol
\ No newline at end of file
+from .book_repository_protocol import BookRepositoryProtocol
+from .cached_book_repository import CachedBookRepository
+from .journaled_book_repository import JournaledBookRepository
+from .book_index import BookIndex
+from .book_leaderboard import BookLeaderboard
+from .sqlite_book_repository import SqliteBookRepository
+from .search_index import SearchIndex
+from .checkout_history_repository import CheckoutHistoryRepository
+from .checkout_history_repository_protocol import CheckoutHistoryRepositoryProtocol
+from .file_lock import FileLock
+from .sharded_book_repository import ShardedBookRepository
+from .instrumentation import INSTRUMENTATION, Instrumentation
@@ -0,0 +1,98 @@
+from bisect import bisect_left, insort
+from src.domain import Book
+
+
+def normalize(text: str | None) -> str:
+    # case-insensitive and whitespace-insensitive, "  The  Hobbit" == "the hobbit"
+    return " ".join((text or "").casefold().split())
+
+
+class BookIndex:
+    # Secondary indexes over an in-memory catalog:
+    #   - hash index by book_id
+    #   - hash index by normalized title and by normalized author
+    #   - sorted (title, book_id) list for prefix lookups with bisect
+    #
+    # Kept up to date one book at a time by the repository, so add/remove/update
+    # never rebuild it. Hash lookups are O(1), prefix lookups O(log n + matches).
+
+    def __init__(self, books: list[Book] | None = None):
+        self.reset(books or [])
+
+    def reset(self, books: list[Book]) -> None:
+        self._by_id: dict[str, Book] = {}
+        self._by_title: dict[str, dict[str, Book]] = {}
+        self._by_author: dict[str, dict[str, Book]] = {}
+        # remember what each book was indexed under, the Book object itself
+        # may already be mutated by the time we are asked to update it
+        self._keys: dict[str, tuple[str, str]] = {}
+        for book in books:
+            self._insert(book)
+        self._sorted_titles: list[tuple[str, str]] = sorted(
+            (title, book_id) for book_id, (title, _) in self._keys.items()
+        )
+
+    def add(self, book: Book) -> None:
+        if book.book_id in self._keys:
+            self.remove(book.book_id)
+        self._insert(book)
+        insort(self._sorted_titles, (self._keys[book.book_id][0], book.book_id))
+
+    def remove(self, book_id: str) -> None:
+        keys = self._keys.pop(book_id, None)
+        if keys is None:
+            return
+        title, author = keys
+        del self._by_id[book_id]
+        self._discard(self._by_title, title, book_id)
+        self._discard(self._by_author, author, book_id)
+
+        i = bisect_left(self._sorted_titles, (title, book_id))
+        if i < len(self._sorted_titles) and self._sorted_titles[i] == (title, book_id):
+            del self._sorted_titles[i]
+
+    def update(self, book: Book) -> None:
+        if self._keys.get(book.book_id) == (normalize(book.title), normalize(book.author)):
+            # indexed fields didn't change, just make sure we point at this object
+            self._by_id[book.book_id] = book
+            self._by_title[self._keys[book.book_id][0]][book.book_id] = book
+            self._by_author[self._keys[book.book_id][1]][book.book_id] = book
+            return
+        self.add(book)
+
+    def get(self, book_id: str) -> Book | None:
+        return self._by_id.get(book_id)
+
+    def find_by_title(self, title: str) -> list[Book]:
+        return list(self._by_title.get(normalize(title), {}).values())
+
+    def find_by_author(self, author: str) -> list[Book]:
+        return list(self._by_author.get(normalize(author), {}).values())
+
+    def find_by_title_prefix(self, prefix: str) -> list[Book]:
+        prefix = normalize(prefix)
+        matches = []
+        i = bisect_left(self._sorted_titles, (prefix, ""))
+        while i < len(self._sorted_titles) and self._sorted_titles[i][0].startswith(prefix):
+            matches.append(self._by_id[self._sorted_titles[i][1]])
+            i += 1
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def _insert(self, book: Book) -> None:
+        title, author = normalize(book.title), normalize(book.author)
+        self._keys[book.book_id] = (title, author)
+        self._by_id[book.book_id] = book
+        self._by_title.setdefault(title, {})[book.book_id] = book
+        self._by_author.setdefault(author, {})[book.book_id] = book
+
+    @staticmethod
+    def _discard(index: dict[str, dict[str, Book]], key: str, book_id: str) -> None:
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(book_id, None)
+        if not bucket:
+            del index[key]
@@ -0,0 +1,59 @@
+from bisect import bisect_left, insort
+from src.domain import Book
+
+
+class BookLeaderboard:
+    # Books with at least min_ratings ratings, kept sorted by
+    # (rating desc, ratings_count desc, book_id asc) as the catalog changes,
+    # so the top K is just the first K entries.
+    #
+    # Same listener interface as BookIndex: reset/add/remove/update.
+
+    def __init__(self, min_ratings: int = 500, books: list[Book] | None = None):
+        self.min_ratings = min_ratings
+        self.reset(books or [])
+
+    def reset(self, books: list[Book]) -> None:
+        self._by_id: dict[str, Book] = {}
+        self._keys: dict[str, tuple] = {}
+        for book in books:
+            key = self._key(book)
+            if key is not None:
+                self._keys[book.book_id] = key
+                self._by_id[book.book_id] = book
+        self._ranking: list[tuple] = sorted(self._keys.values())
+
+    def add(self, book: Book) -> None:
+        self.remove(book.book_id)
+        key = self._key(book)
+        if key is None:
+            return
+        self._keys[book.book_id] = key
+        self._by_id[book.book_id] = book
+        insort(self._ranking, key)
+
+    def remove(self, book_id: str) -> None:
+        key = self._keys.pop(book_id, None)
+        if key is None:
+            return
+        del self._by_id[book_id]
+        i = bisect_left(self._ranking, key)
+        del self._ranking[i]
+
+    def update(self, book: Book) -> None:
+        key = self._key(book)
+        if key is not None and self._keys.get(book.book_id) == key:
+            self._by_id[book.book_id] = book
+            return
+        self.add(book)
+
+    def top(self, limit: int = 10) -> list[Book]:
+        return [self._by_id[key[2]] for key in self._ranking[:limit]]
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    def _key(self, book: Book) -> tuple | None:
+        if book.average_rating is None or (book.ratings_count or 0) < self.min_ratings:
+            return None
+        return (-book.average_rating, -book.ratings_count, book.book_id)
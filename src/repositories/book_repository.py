@@ -1,51 +1,315 @@
 import json
-from src.domain import Book
+import os
+from contextlib import contextmanager
+from functools import wraps
+from itertools import islice
+from typing import Iterator
+from src.domain import Book, CompactBook
+from src.domain.book import BOOK_FIELDS
+from src.repositories.book_index import normalize
+from src.repositories.json_stream import iter_json_records
 from src.repositories.book_repository_protocol import BookRepositoryProtocol
+from src.repositories.book_snapshot import BookSnapshot, SnapshotError, write_snapshot
+from src.repositories.file_lock import FileLock, atomic_write, bump_generation, read_generation
+from src.repositories.instrumentation import INSTRUMENTATION
+from src.repositories.search_index import search_books
+
+
+def writes(method):
+    # a mutation runs as its own transaction unless it's already inside one:
+    # under the writer lock, against the catalog as it is on disk now
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def upsert(stored: list[Book], books: list[Book]) -> None:
+    # like the keyed repositories: a book_id that's already there is replaced
+    # where it stands, a new one goes at the end
+    position = {book.book_id: i for i, book in enumerate(stored)}
+    for book in books:
+        i = position.get(book.book_id)
+        if i is None:
+            position[book.book_id] = len(stored)
+            stored.append(book)
+        else:
+            stored[i] = book
 
 
 class BookRepository(BookRepositoryProtocol):
-    def __init__(self, filepath: str = "book.json"):
+    # Several processes can share one catalog file:
+    #   - every write goes to a temp file that is renamed over the catalog,
+    #     so a reader opens either the old catalog or the new one, never a
+    #     half-written one, and never has to wait for a writer
+    #   - writers take an flock on <catalog>.lock for the whole
+    #     read-modify-write, so two writers can't lose each other's changes
+    #   - every commit bumps the counter in <catalog>.version (generation)
+    def __init__(self, filepath: str = "book.json", use_snapshot: bool = False,
+                 compact_ids: bool = False):
         self.filepath = filepath
+        # compact_ids loads books as CompactBook, which keeps UUID ids as 16 bytes
+        self.book_type = CompactBook if compact_ids else Book
+        # with use_snapshot, loads come from the binary snapshot next to the
+        # JSON file while it is fresh, and it is rebuilt when the JSON changes
+        self.use_snapshot = use_snapshot
+        self.snapshot_path = f"{filepath}.snapshot"
+        # inside transaction(): the catalog as it will be written on commit
+        self._transaction_depth = 0
+        self.lock = FileLock(f"{filepath}.lock")
+        self.generation_path = f"{filepath}.version"
+        self._pending: list[Book] | None = None
+        self._dirty = False
 
     def get_all_books(self) -> list[Book]:
-        with open(self.filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return [Book.from_dict(item) for item in data]
+        return self._read_books()
+
+    @property
+    def version(self) -> int:
+        # nothing is kept in memory, so the file itself is the version:
+        # any write (ours or another process's) changes its signature
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return 0
+        return hash((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+
+    @property
+    def generation(self) -> int:
+        # how many commits the catalog has seen, by any process
+        return read_generation(self.generation_path)
+
+    def iter_books(self) -> Iterator[Book]:
+        # parses the file incrementally, one record at a time
+        count = 0
+        try:
+            for item in iter_json_records(self.filepath):
+                count += 1
+                yield self.book_type.from_dict(item)
+        finally:
+            INSTRUMENTATION.record_read(os.path.getsize(self.filepath) if count else 0, count)
+
+    def iter_chunks(self, size: int = 10_000) -> Iterator[list[Book]]:
+        books = self.iter_books()
+        while chunk := list(islice(books, size)):
+            yield chunk
 
+    @writes
     def add_book(self, book: Book) -> str:
         books = self.get_all_books()
-        books.append(book)
+        upsert(books, [book])
 
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump([item.to_dict() for item in books], f, indent=2)
+        self._write_books(books)
         return book.book_id
 
+    @writes
+    def add_books(self, books: list[Book]) -> int:
+        stored = self.get_all_books()
+        upsert(stored, books)
+        self._write_books(stored)
+        return len(books)
+
     def find_book_by_name(self, query):
         books = self.get_all_books()
         return [b for b in books if b.title == query]
 
+    # the plain JSON repository has nothing in memory, so these are scans,
+    # CachedBookRepository answers them from a BookIndex
+    def get_by_id(self, book_id: str) -> Book | None:
+        return next((b for b in self.get_all_books() if b.book_id == book_id), None)
+
+    def find_by_title_prefix(self, prefix: str) -> list[Book]:
+        prefix = normalize(prefix)
+        return [b for b in self.get_all_books() if normalize(b.title).startswith(prefix)]
+
+    def find_by_author(self, author: str) -> list[Book]:
+        author = normalize(author)
+        return [b for b in self.get_all_books() if normalize(b.author) == author]
+
+    def search(self, query: str, limit: int = 10) -> list[Book]:
+        return search_books(self.get_all_books(), query, limit)
+
+    def top_rated(self, limit: int = 10, min_ratings: int = 500) -> list[Book]:
+        qualifying = [b for b in self.get_all_books()
+                      if b.average_rating is not None and (b.ratings_count or 0) >= min_ratings]
+        qualifying.sort(key=lambda b: (-b.average_rating, -b.ratings_count, b.book_id))
+        return qualifying[:limit]
+
+    @writes
     def remove_book(self, book: Book) -> bool:
         books = self.get_all_books()
-        books.remove(book)
+        # match on book_id, comparing whole dataclasses breaks as soon as
+        # the caller's copy is stale
+        remaining = [b for b in books if b.book_id != book.book_id]
 
-        if book in books:
+        if len(remaining) == len(books):
             return False
 
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump([item.to_dict() for item in books], f, indent=2)
+        self._write_books(remaining)
 
         return True
 
+    @writes
+    def remove_books_by_id(self, book_ids: list[str]) -> list[str]:
+        # returns the ids that were actually there
+        wanted = set(book_ids)
+        books = self.get_all_books()
+        remaining = [b for b in books if b.book_id not in wanted]
+        if len(remaining) == len(books):
+            return []
+
+        self._write_books(remaining)
+        return [b.book_id for b in books if b.book_id in wanted]
+
+    @writes
     def update_book(self, book: Book, updates: dict[str: int]) -> bool:
 
         try:
             books = self.get_all_books()
+            stored = next((b for b in books if b.book_id == book.book_id), None)
+            if stored is None:
+                return False
+
             for field, value in updates.items():
+                setattr(stored, field, value)
                 setattr(book, field, value)
 
-            with open(self.filepath, "w", encoding="utf-8") as f:
-                json.dump([item.to_dict() for item in books], f, indent=2)
-                
+            self._write_books(books)
+
             return True
         except Exception:
             return False
+
+    @writes
+    def update_many(self, changes: list[tuple[Book, dict]]) -> bool:
+        # all or nothing: every book has to exist and every field has to be a
+        # Book field, otherwise nothing is changed
+        books = self.get_all_books()
+        stored = {b.book_id: b for b in books}
+        if not valid_changes(stored, changes):
+            return False
+
+        for book, updates in changes:
+            apply_changes(stored[book.book_id], book, updates)
+        self._write_books(books)
+        return True
+
+    @contextmanager
+    def transaction(self) -> Iterator["BookRepository"]:
+        # unit of work: the changes made inside are written once on the way
+        # out, and not at all if the block raises. Holds the writer lock
+        # throughout, other writers wait, readers don't. A nested
+        # transaction just joins the outer one.
+        if self._transaction_depth:
+            yield self
+            return
+
+        with self.lock:
+            self._transaction_depth = 1
+            self._begin()
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth = 0
+                self._rollback()
+                raise
+            self._transaction_depth = 0
+            try:
+                self._commit()
+            except BaseException:
+                self._rollback()
+                raise
+
+    def in_transaction(self) -> bool:
+        return self._transaction_depth > 0
+
+    def get_snapshot(self) -> BookSnapshot | None:
+        # a fresh columnar snapshot of the catalog for the analytics side,
+        # (re)built if the JSON changed since, None if the catalog can't be
+        # stored in one (values of the wrong type)
+        source = self._snapshot_source()
+        snapshot = BookSnapshot.open_if_fresh(self.snapshot_path, source)
+        if snapshot is not None:
+            return snapshot
+        return self._build_snapshot(self.get_all_books(), source)
+
+    # all file access goes through these two so subclasses can change how
+    # the catalog is loaded and stored without touching the CRUD methods
+    def _read_books(self) -> list[Book]:
+        if self._pending is not None:
+            return list(self._pending)
+
+        if self.use_snapshot:
+            source = self._snapshot_source()
+            snapshot = BookSnapshot.open_if_fresh(self.snapshot_path, source)
+            if snapshot is not None:
+                with INSTRUMENTATION.span("BookRepository.build_books"):
+                    books = snapshot.books(self.book_type)
+                INSTRUMENTATION.record_read(0, len(books))
+                return books
+
+        with open(self.filepath, "r", encoding="utf-8") as f:
+            with INSTRUMENTATION.span("BookRepository.parse_json"):
+                data = json.load(f)
+            with INSTRUMENTATION.span("BookRepository.build_books"):
+                books = [self.book_type.from_dict(item) for item in data]
+            INSTRUMENTATION.record_read(f.tell(), len(books))
+
+        if self.use_snapshot:
+            self._build_snapshot(books, source)
+        return books
+
+    def _write_books(self, books: list[Book]) -> None:
+        if self.in_transaction():
+            self._pending = books
+            self._dirty = True
+            return
+        with self.lock:
+            with INSTRUMENTATION.span("BookRepository.write_json"):
+                atomic_write(self.filepath, lambda f: json.dump([item.to_dict() for item in books], f, indent=2))
+            bump_generation(self.generation_path)
+            INSTRUMENTATION.record_write(os.path.getsize(self.filepath))
+
+    def _begin(self) -> None:
+        self._pending = None
+        self._dirty = False
+
+    def _commit(self) -> None:
+        books, dirty = self._pending, self._dirty
+        self._pending = None
+        self._dirty = False
+        if dirty:
+            self._write_books(books)
+
+    def _rollback(self) -> None:
+        # nothing reached the file, forgetting the pending catalog is enough
+        self._pending = None
+        self._dirty = False
+
+    def _snapshot_source(self) -> dict:
+        # what a snapshot has to match to count as fresh
+        stat = os.stat(self.filepath)
+        return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    def _build_snapshot(self, books: list[Book], source: dict) -> BookSnapshot | None:
+        try:
+            write_snapshot(books, self.snapshot_path, source)
+        except SnapshotError:
+            return None
+        return BookSnapshot(self.snapshot_path)
+
+
+def valid_changes(stored: dict, changes: list[tuple[Book, dict]]) -> bool:
+    # every book is known and only real fields change (book_id never does)
+    return all(
+        book.book_id in stored and all(field in BOOK_FIELDS and field != "book_id" for field in updates)
+        for book, updates in changes
+    )
+
+
+def apply_changes(stored: Book, book: Book, updates: dict) -> None:
+    # the stored copy and the caller's copy (if it's a different object) both follow
+    for field, value in updates.items():
+        setattr(stored, field, value)
+        setattr(book, field, value)
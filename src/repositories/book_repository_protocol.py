@@ -1,15 +1,65 @@
-from typing import Protocol
+from contextlib import AbstractContextManager
+from typing import Iterator, Protocol
 from src.domain import Book
 
 class BookRepositoryProtocol(Protocol):
     def get_all_books(self) -> list[Book]:
         ...
 
+    # changes whenever the catalog does, lets callers cache derived data
+    @property
+    def version(self) -> int:
+        ...
+
+    # bounded-memory alternatives to get_all_books for very large catalogs
+    def iter_books(self) -> Iterator[Book]:
+        ...
+
+    def iter_chunks(self, size: int = 10_000) -> Iterator[list[Book]]:
+        ...
+
+    # an upsert: a book whose book_id is already stored replaces it
     def add_book(self, book: Book) -> str:
         ...
 
+    # bulk changes are written once, not once per book
+    def add_books(self, books: list[Book]) -> int:
+        ...
+
     def find_book_by_name(self, query: str) -> list[Book]:
         ...
 
     def remove_book(self, book: Book) -> bool:
         ...
+
+    # returns the ids that were actually removed
+    def remove_books_by_id(self, book_ids: list[str]) -> list[str]:
+        ...
+
+    def update_book(self, book: Book, updates: dict) -> bool:
+        ...
+
+    # all or nothing: False (and no change) if any book or field is unknown
+    def update_many(self, changes: list[tuple[Book, dict]]) -> bool:
+        ...
+
+    # unit of work: everything inside is written once when the block ends,
+    # nothing if it raises
+    def transaction(self) -> AbstractContextManager:
+        ...
+
+    def get_by_id(self, book_id: str) -> Book | None:
+        ...
+
+    def find_by_title_prefix(self, prefix: str) -> list[Book]:
+        ...
+
+    def find_by_author(self, author: str) -> list[Book]:
+        ...
+
+    # ranked, typo-tolerant search over title/author/publisher, best match first
+    def search(self, query: str, limit: int = 10) -> list[Book]:
+        ...
+
+    def top_rated(self, limit: int = 10) -> list[Book]:
+        ...
@@ -0,0 +1,297 @@
+import json
+import mmap
+import os
+import shutil
+import sys
+from array import array
+from dataclasses import fields
+from datetime import datetime, timedelta
+from src.domain import Book
+
+# Binary, columnar copy of a catalog that lives next to the JSON file:
+#
+#   books.json.snapshot/
+#     meta.json                   row count, source file signature, column layout
+#     price_usd.bin, ...          fixed-width numbers, one file per column
+#     genre.bin, ...              int32 dictionary codes, labels are in meta.json
+#     title.offsets/.blob/.nulls  variable-width strings: int64 offsets into a utf-8 blob
+#     last_checkout_us.bin        int64 microseconds since the epoch, INT64_MIN = missing
+#
+# Every file is a raw native-endian array, so the service layer can np.memmap
+# a column directly and several processes reading the same snapshot share the
+# page cache. The repository layer only needs the standard library to read it.
+
+FORMAT_VERSION = 1
+INT_MISSING = -(2 ** 63)  # also numpy's NaT, so last_checkout_us maps straight to datetime64[us]
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+FLOAT_COLUMNS = ("average_rating", "price_usd", "sales_millions")
+INT_COLUMNS = ("publication_year", "page_count", "ratings_count")
+BOOL_COLUMNS = ("in_print", "available")
+CATEGORICAL_COLUMNS = ("genre", "publisher", "language", "format")
+STRING_COLUMNS = ("book_id", "title", "author", "last_checkout")
+
+# array typecode and the matching numpy dtype name for each kind of column
+TYPECODES = {"float": ("d", "f8"), "int": ("q", "i8"), "bool": ("b", "i1"), "code": ("i", "i4")}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def write_snapshot(books: list[Book], dirpath: str, source: dict) -> None:
+    # writes into a temp dir and swaps it in, so readers never see half a snapshot
+    # raises SnapshotError when a value doesn't fit the column types
+    # (e.g. a dirty "N/A" price), the caller should just stay on JSON then.
+    # The temp dirs are per process, readers of the same catalog may all
+    # decide to rebuild it at once
+    tmp_dir = f"{dirpath}.tmp.{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = {}
+    try:
+        for name in FLOAT_COLUMNS:
+            _write_array(tmp_dir, name, "float", [_float(getattr(b, name), name) for b in books])
+            columns[name] = "float"
+        for name in INT_COLUMNS:
+            _write_array(tmp_dir, name, "int", [_int(getattr(b, name), name) for b in books])
+            columns[name] = "int"
+        for name in BOOL_COLUMNS:
+            _write_array(tmp_dir, name, "bool", [_bool(getattr(b, name), name) for b in books])
+            columns[name] = "bool"
+
+        categories = {}
+        for name in CATEGORICAL_COLUMNS:
+            mapping: dict[str, int] = {}
+            codes = [-1 if (v := getattr(b, name)) is None else mapping.setdefault(_str(v, name), len(mapping))
+                     for b in books]
+            _write_array(tmp_dir, name, "code", codes)
+            columns[name] = "code"
+            categories[name] = list(mapping)
+
+        for name in STRING_COLUMNS:
+            _write_strings(tmp_dir, name, [getattr(b, name) for b in books])
+            columns[name] = "string"
+
+        _write_array(tmp_dir, "last_checkout_us", "int",
+                     [_timestamp(b.last_checkout) for b in books])
+        columns["last_checkout_us"] = "int"
+    except SnapshotError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "count": len(books),
+        "byteorder": sys.byteorder,
+        "source": source,
+        "columns": columns,
+        "categories": categories,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    old_dir = f"{dirpath}.old.{os.getpid()}"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    try:
+        if os.path.exists(dirpath):
+            os.replace(dirpath, old_dir)
+        os.replace(tmp_dir, dirpath)
+    except OSError:
+        # another process swapped its own in first, readers check freshness anyway
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+class BookSnapshot:
+    def __init__(self, dirpath: str):
+        self.dirpath = dirpath
+        with open(os.path.join(dirpath, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT_VERSION or self.meta.get("byteorder") != sys.byteorder:
+            raise SnapshotError(f"Unsupported snapshot in {dirpath}")
+        self.count = self.meta["count"]
+        self.categories: dict[str, list[str]] = self.meta["categories"]
+        # (name, suffix) -> (mmap, typed view), mapped once and kept until close()
+        self._maps: dict[tuple[str, str], tuple[mmap.mmap, memoryview]] = {}
+
+    @classmethod
+    def open_if_fresh(cls, dirpath: str, source: dict) -> "BookSnapshot | None":
+        try:
+            snapshot = cls(dirpath)
+        except (OSError, ValueError, SnapshotError):
+            return None
+        return snapshot if snapshot.meta["source"] == source else None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "BookSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # views handed out by rows() stop working here, the columns read
+        # through column()/books() are copies and don't care
+        maps, self._maps = self._maps, {}
+        for mapped, view in maps.values():
+            view.release()
+            mapped.close()
+
+    def column_path(self, name: str) -> str:
+        return os.path.join(self.dirpath, f"{name}.bin")
+
+    def column_dtype(self, name: str) -> str:
+        # numpy dtype string for np.memmap, e.g. "<f8"
+        order = "<" if sys.byteorder == "little" else ">"
+        return order + TYPECODES[self.meta["columns"][name]][1]
+
+    def column(self, name: str) -> list:
+        kind = self.meta["columns"][name]
+        if kind == "string":
+            return self.strings(name)
+        values = self._read_array(name, TYPECODES[kind][0]).tolist()
+        if kind == "float":
+            return [None if v != v else v for v in values]
+        if kind == "int":
+            return [None if v == INT_MISSING else v for v in values]
+        if kind == "bool":
+            return [None if v < 0 else bool(v) for v in values]
+        labels = self.categories[name]
+        return [None if v < 0 else labels[v] for v in values]
+
+    def strings(self, name: str) -> list[str | None]:
+        offsets = self._read_array(name, "q", ".offsets").tolist()
+        nulls = self._read_array(name, "b", ".nulls").tolist()
+        with open(os.path.join(self.dirpath, f"{name}.blob"), "rb") as f:
+            blob = f.read()
+        if blob.isascii():
+            # byte offsets are character offsets, slice the decoded text instead of every row
+            text = blob.decode("ascii")
+            return [None if nulls[i] else text[offsets[i]:offsets[i + 1]] for i in range(self.count)]
+        return [None if nulls[i] else blob[offsets[i]:offsets[i + 1]].decode("utf-8")
+                for i in range(self.count)]
+
+    def books(self, book_type: type[Book] = Book) -> list[Book]:
+        # whole columns are decoded at C speed and zipped back into Books,
+        # no text parsing involved
+        names = [f.name for f in fields(Book)]
+        return [book_type(*row) for row in zip(*(self.column(name) for name in names))]
+
+    def rows(self, indices: list[int], book_type: type[Book] = Book) -> list[Book]:
+        # just the requested books, reading single values out of the mapped files
+        names = [f.name for f in fields(Book)]
+        columns = {name: self._row_reader(name) for name in names}
+        return [book_type(*(columns[name](i) for name in names)) for i in indices]
+
+    def _row_reader(self, name: str):
+        kind = self.meta["columns"][name]
+        if kind == "string":
+            offsets = self._map(name, "q", ".offsets")
+            nulls = self._map(name, "b", ".nulls")
+            blob = self._map(name, "B", ".blob")
+            return lambda i: None if nulls[i] else bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+        values = self._map(name, TYPECODES[kind][0])
+        if kind == "float":
+            return lambda i: None if values[i] != values[i] else values[i]
+        if kind == "int":
+            return lambda i: None if values[i] == INT_MISSING else values[i]
+        if kind == "bool":
+            return lambda i: None if values[i] < 0 else bool(values[i])
+        labels = self.categories[name]
+        return lambda i: None if values[i] < 0 else labels[values[i]]
+
+    def _map(self, name: str, typecode: str, suffix: str = ".bin") -> memoryview | array:
+        # a typed view straight onto the mapped file, nothing is copied
+        cached = self._maps.get((name, suffix))
+        if cached is not None:
+            return cached[1]
+        path = os.path.join(self.dirpath, f"{name}{suffix}")
+        if not os.path.getsize(path):
+            return array(typecode)
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with memoryview(mapped) as raw:
+            view = raw.cast(typecode)
+        self._maps[(name, suffix)] = (mapped, view)
+        return view
+
+    def _read_array(self, name: str, typecode: str, suffix: str = ".bin") -> array:
+        values = array(typecode)
+        path = os.path.join(self.dirpath, f"{name}{suffix}")
+        size = os.path.getsize(path)
+        if size:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                values.frombytes(mapped)
+        return values
+
+
+def _write_array(dirpath: str, name: str, kind: str, values: list, suffix: str = ".bin") -> None:
+    with open(os.path.join(dirpath, f"{name}{suffix}"), "wb") as f:
+        array(TYPECODES[kind][0], values).tofile(f)
+
+
+def _write_strings(dirpath: str, name: str, values: list) -> None:
+    offsets = [0]
+    nulls = []
+    parts = []
+    total = 0
+    for value in values:
+        encoded = b"" if value is None else _str(value, name).encode("utf-8")
+        parts.append(encoded)
+        total += len(encoded)
+        offsets.append(total)
+        nulls.append(value is None)
+    with open(os.path.join(dirpath, f"{name}.blob"), "wb") as f:
+        f.write(b"".join(parts))
+    _write_array(dirpath, name, "int", offsets, ".offsets")
+    _write_array(dirpath, name, "bool", nulls, ".nulls")
+
+
+def _float(value, name: str) -> float:
+    if value is None:
+        return float("nan")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise SnapshotError(f"{name}: {value!r} is not a number")
+    return float(value)
+
+
+def _int(value, name: str) -> int:
+    if value is None:
+        return INT_MISSING
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise SnapshotError(f"{name}: {value!r} is not an integer")
+    return value
+
+
+def _bool(value, name: str) -> int:
+    if value is None:
+        return -1
+    if not isinstance(value, bool):
+        raise SnapshotError(f"{name}: {value!r} is not a boolean")
+    return int(value)
+
+
+def _str(value, name: str) -> str:
+    if not isinstance(value, str):
+        raise SnapshotError(f"{name}: {value!r} is not a string")
+    return value
+
+
+def _timestamp(value: str | None) -> int:
+    # unparseable or empty checkouts are kept as text in last_checkout, only the
+    # numeric column marks them missing
+    if not value:
+        return INT_MISSING
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return INT_MISSING
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None) - moment.utcoffset()
+    return (moment - EPOCH) // MICROSECOND
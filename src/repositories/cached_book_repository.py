@@ -0,0 +1,279 @@
+import os
+from typing import Iterator
+from src.domain import Book
+from src.repositories.book_index import BookIndex
+from src.repositories.book_leaderboard import BookLeaderboard
+from src.repositories.book_repository import BookRepository, apply_changes, valid_changes, writes
+from src.repositories.book_snapshot import BookSnapshot
+from src.repositories.search_index import SearchIndex
+
+
+class CachedBookRepository(BookRepository):
+    # Keeps the parsed catalog in memory and only re-parses the file when its
+    # (mtime, size, inode) signature changes, e.g. another process wrote it.
+    #
+    # Book objects are shared between callers, so mutate them through
+    # update_book, otherwise the cache and the file drift apart.
+    #
+    # Anything that has to follow the catalog (indexes, leaderboard, ...) is a
+    # listener with reset(books) / add(book) / remove(book_id) / update(book),
+    # and is kept up to date one book at a time instead of being rebuilt on
+    # every write.
+
+    def __init__(self, filepath: str = "book.json", use_snapshot: bool = False,
+                 compact_ids: bool = False):
+        super().__init__(filepath, use_snapshot, compact_ids)
+        # keyed by book_id, dicts keep insertion order so the file order is preserved
+        self._books: dict[str, Book] | None = None
+        self._signature: tuple[int, int, int] | None = None
+        self.index = BookIndex()
+        self.leaderboard = BookLeaderboard()
+        self._listeners = [self.index, self.leaderboard]
+        # built (or loaded from search_path) on the first search, then a listener like the others
+        self.search_index: SearchIndex | None = None
+        self.search_path = f"{filepath}.search"
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_snapshot(self):
+        # make sure what's on disk is what we have in memory before comparing
+        self._cached_books()
+        return super().get_snapshot()
+
+    def get_all_books(self) -> list[Book]:
+        # hand out a new list so callers appending/removing
+        # don't change the cached catalog behind our back
+        return list(self._cached_books().values())
+
+    # the catalog is in memory already, so these just walk it
+    def iter_books(self) -> Iterator[Book]:
+        yield from self.get_all_books()
+
+    def iter_chunks(self, size: int = 10_000) -> Iterator[list[Book]]:
+        books = self.get_all_books()
+        for start in range(0, len(books), size):
+            yield books[start:start + size]
+
+    @writes
+    def add_book(self, book: Book) -> str:
+        books = self._cached_books()
+        books[book.book_id] = book
+        self._persist()
+        self._notify("add", book)
+        return book.book_id
+
+    @writes
+    def add_books(self, books: list[Book]) -> int:
+        stored = self._cached_books()
+        for book in books:
+            stored[book.book_id] = book
+        self._persist()
+        for book in books:
+            self._notify("add", book)
+        return len(books)
+
+    def find_book_by_name(self, query):
+        self._cached_books()
+        # the title index is case-insensitive, keep the exact match semantics
+        return [b for b in self.index.find_by_title(query) if b.title == query]
+
+    def get_by_id(self, book_id: str) -> Book | None:
+        return self._cached_books().get(book_id)
+
+    def find_by_title_prefix(self, prefix: str) -> list[Book]:
+        self._cached_books()
+        return self.index.find_by_title_prefix(prefix)
+
+    def find_by_author(self, author: str) -> list[Book]:
+        self._cached_books()
+        return self.index.find_by_author(author)
+
+    def top_rated(self, limit: int = 10, min_ratings: int = 500) -> list[Book]:
+        if min_ratings != self.leaderboard.min_ratings:
+            return super().top_rated(limit, min_ratings)
+        self._cached_books()
+        return self.leaderboard.top(limit)
+
+    def search(self, query: str, limit: int = 10) -> list[Book]:
+        books = self._cached_books()
+        hits = self._search_index().search(query, limit)
+        return [books[book_id] for book_id, _ in hits if book_id in books]
+
+    def warm_start(self) -> bool:
+        # load the catalog and its search index from what was prebuilt for it:
+        # a fresh binary snapshot and the index saved by save_search_index.
+        # Never parses the JSON or indexes anything, so a stale or missing
+        # snapshot returns False with nothing loaded and the first call pays
+        try:
+            fresh = self.use_snapshot and BookSnapshot.open_if_fresh(
+                self.snapshot_path, self._snapshot_source()) is not None
+        except FileNotFoundError:
+            fresh = False
+        if not fresh:
+            return False
+
+        self._cached_books()
+        if self.search_index is None:
+            index = SearchIndex()
+            if index.restore(self.search_path, self._search_source()):
+                self.search_index = index
+                self._listeners.append(index)
+        return True
+
+    def save_search_index(self) -> None:
+        # the saved index is only reused while the catalog is exactly what it
+        # was saved for, call this on the way out to skip re-indexing next time
+        if self.search_index is not None:
+            self._cached_books()
+            self.search_index.save(self.search_path, self._search_source())
+
+    @writes
+    def remove_book(self, book: Book) -> bool:
+        books = self._cached_books()
+        if books.pop(book.book_id, None) is None:
+            return False
+
+        self._persist()
+        self._notify("remove", book.book_id)
+        return True
+
+    @writes
+    def remove_books_by_id(self, book_ids: list[str]) -> list[str]:
+        books = self._cached_books()
+        removed = [book_id for book_id in dict.fromkeys(book_ids) if books.pop(book_id, None) is not None]
+        if not removed:
+            return []
+
+        self._persist()
+        for book_id in removed:
+            self._notify("remove", book_id)
+        return removed
+
+    @writes
+    def update_many(self, changes: list[tuple[Book, dict]]) -> bool:
+        books = self._cached_books()
+        if not valid_changes(books, changes):
+            return False
+
+        for book, updates in changes:
+            apply_changes(books[book.book_id], book, updates)
+        self._persist()
+        for book, _ in changes:
+            self._notify("update", books[book.book_id])
+        return True
+
+    @writes
+    def update_book(self, book: Book, updates: dict[str: int]) -> bool:
+        try:
+            stored = self._cached_books().get(book.book_id)
+            if stored is None:
+                return False
+
+            for field, value in updates.items():
+                setattr(stored, field, value)
+                setattr(book, field, value)
+
+            self._persist()
+            self._notify("update", stored)
+            return True
+        except Exception:
+            return False
+
+    def cache_stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "version": self._version,
+            "size": len(self._books) if self._books is not None else 0,
+        }
+
+    @property
+    def version(self) -> int:
+        # bumped on every reload and every mutation, check the file first so
+        # a change made by another process shows up as a new version
+        self._cached_books()
+        return self._version
+
+    def invalidate(self) -> None:
+        self._books = None
+        self._signature = None
+
+    def _cached_books(self) -> dict[str, Book]:
+        if self._is_fresh():
+            self.hits += 1
+            return self._books
+
+        self.misses += 1
+        self._load()
+        self._version += 1
+        return self._books
+
+    def _is_fresh(self) -> bool:
+        return self._books is not None and self._file_signature() == self._signature
+
+    def _load(self) -> None:
+        self._signature = self._file_signature()
+        self._replace_books(self._read_books())
+
+    def _replace_books(self, books: list[Book]) -> None:
+        self._books = {book.book_id: book for book in books}
+        books = list(self._books.values())
+        for listener in self._listeners:
+            listener.reset(books)
+
+    def _search_index(self) -> SearchIndex:
+        if self.search_index is None:
+            index = SearchIndex()
+            if not index.restore(self.search_path, self._search_source()):
+                index.reset(list(self._books.values()))
+                index.save(self.search_path, self._search_source())
+            self.search_index = index
+            self._listeners.append(index)
+        return self.search_index
+
+    def _search_source(self) -> list:
+        # what a saved search index has to match to be reused
+        return list(self._signature or ())
+
+    def _notify(self, event: str, arg) -> None:
+        for listener in self._listeners:
+            getattr(listener, event)(arg)
+
+    def _persist(self) -> None:
+        # write what's in memory, no need to rebuild the dict or the listeners.
+        # Inside a transaction the memory is ahead of the file until commit
+        if self.in_transaction():
+            self._dirty = True
+            self._version += 1
+            return
+        super()._write_books(list(self._books.values()))
+        self._signature = self._file_signature()
+        self._version += 1
+
+    def _commit(self) -> None:
+        dirty = self._dirty
+        self._pending = None
+        self._dirty = False
+        if dirty:
+            self._persist()
+
+    def _rollback(self) -> None:
+        # the books in memory were changed in place, the file still has the
+        # catalog as it was, so load it again (listeners included)
+        super()._rollback()
+        self.invalidate()
+
+    def _write_books(self, books: list[Book]) -> None:
+        super()._write_books(books)
+        # we just wrote it, so what's in memory is already current
+        self._replace_books(books)
+        self._signature = self._file_signature()
+        self._version += 1
+
+    def _file_signature(self) -> tuple[int, int, int] | None:
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
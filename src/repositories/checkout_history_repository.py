@@ -0,0 +1,93 @@
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterator
+from src.domain import CheckoutEvent
+from src.repositories.checkout_history_repository_protocol import CheckoutHistoryRepositoryProtocol
+from src.repositories.instrumentation import INSTRUMENTATION
+
+
+class CheckoutHistoryRepository(CheckoutHistoryRepositoryProtocol):
+    # Append-only event store, one JSONL file per month of event time:
+    #
+    #   checkouts/
+    #     2025-11.jsonl
+    #     2025-12.jsonl
+    #
+    # Events are only ever appended (fsync'ed unless durable=False), so a
+    # crash can at worst leave a torn last line, which readers skip. Range
+    # reads only open the months they overlap.
+
+    def __init__(self, dirpath: str = "checkouts", durable: bool = True):
+        self.dirpath = dirpath
+        self.durable = durable
+        os.makedirs(dirpath, exist_ok=True)
+
+    @property
+    def version(self) -> int:
+        return hash(tuple(
+            (name, stat.st_size, stat.st_mtime_ns)
+            for name, stat in ((name, os.stat(os.path.join(self.dirpath, name)))
+                               for name in self.partitions())
+        ))
+
+    def append(self, event: CheckoutEvent) -> None:
+        self.append_many([event])
+
+    def append_many(self, events: list[CheckoutEvent]) -> int:
+        # one write (and one fsync) per month touched, however many events
+        lines_by_month: dict[str, list[str]] = defaultdict(list)
+        for event in events:
+            lines_by_month[month_of(event.timestamp)].append(json.dumps(event.to_dict()) + "\n")
+
+        for month, lines in lines_by_month.items():
+            data = "".join(lines).encode("utf-8")
+            with open(self.partition_path(month), "ab") as f:
+                f.write(data)
+                if self.durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            INSTRUMENTATION.record_write(len(data))
+        return len(events)
+
+    def iter_events(self, start: datetime | None = None,
+                    end: datetime | None = None) -> Iterator[CheckoutEvent]:
+        first = month_of(start) if start is not None else None
+        last = month_of(end) if end is not None else None
+        for name in self.partitions():
+            month = name[:-len(".jsonl")]
+            if (first is not None and month < first) or (last is not None and month > last):
+                continue
+            for event in self._read_partition(month):
+                if start is None and end is None:
+                    yield event
+                    continue
+                moment = datetime.fromisoformat(event.timestamp)
+                if (start is None or moment >= start) and (end is None or moment < end):
+                    yield event
+
+    def partitions(self) -> list[str]:
+        # file names, oldest month first
+        return sorted(name for name in os.listdir(self.dirpath) if name.endswith(".jsonl"))
+
+    def partition_path(self, month: str) -> str:
+        return os.path.join(self.dirpath, f"{month}.jsonl")
+
+    def _read_partition(self, month: str) -> Iterator[CheckoutEvent]:
+        try:
+            with open(self.partition_path(month), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # only whole lines, a torn last line from a crashed writer is skipped
+        end = data.rfind(b"\n") + 1
+        events = [CheckoutEvent.from_dict(json.loads(line)) for line in data[:end].splitlines() if line.strip()]
+        INSTRUMENTATION.record_read(end, len(events))
+        yield from events
+
+
+def month_of(moment: datetime | str) -> str:
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment)
+    return f"{moment.year:04d}-{moment.month:02d}"
@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Iterator, Protocol
+from src.domain import CheckoutEvent
+
+
+class CheckoutHistoryRepositoryProtocol(Protocol):
+    # changes whenever an event is appended, lets callers cache derived data
+    @property
+    def version(self) -> int:
+        ...
+
+    def append(self, event: CheckoutEvent) -> None:
+        ...
+
+    def append_many(self, events: list[CheckoutEvent]) -> int:
+        ...
+
+    # events with start <= timestamp < end, either bound can be left open
+    def iter_events(self, start: datetime | None = None,
+                    end: datetime | None = None) -> Iterator[CheckoutEvent]:
+        ...
@@ -0,0 +1,79 @@
+import os
+from typing import Callable, IO
+
+try:
+    import fcntl
+except ImportError:  # not on POSIX, writers just don't coordinate
+    fcntl = None
+
+
+class FileLock:
+    # Advisory lock between processes writing the same catalog, an flock on
+    # a separate <catalog>.lock file (the catalog itself gets replaced on
+    # every write, so it can't hold the lock). Reentrant within one object,
+    # so a write that triggers another write (e.g. a compaction) doesn't
+    # deadlock on itself. Readers never take it.
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: IO | None = None
+        self._depth = 0
+
+    def acquire(self) -> None:
+        if self._depth == 0:
+            self._file = open(self.path, "a+b")
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        self._depth += 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            # closing the file drops the flock
+            self._file.close()
+            self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._depth > 0
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def atomic_write(path: str, write: Callable[[IO], None], mode: str = "w") -> None:
+    # write(f) fills a temp file next to path, which then replaces path in one
+    # rename: readers see the old file or the new one, never half of either
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def read_generation(path: str) -> int:
+    # the commit counter kept in <catalog>.version, 0 before the first commit
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_generation(path: str) -> int:
+    # only call it holding the writer lock
+    generation = read_generation(path) + 1
+    atomic_write(path, lambda f: f.write(f"{generation}\n"))
+    return generation
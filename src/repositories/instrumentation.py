@@ -0,0 +1,224 @@
+import inspect
+import io
+import json
+import math
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+from time import perf_counter
+from typing import Callable, Iterator
+
+# how many recent latencies each method keeps for its percentiles
+SAMPLES_KEPT = 10_000
+
+
+class MethodStats:
+    __slots__ = ("calls", "total_s", "samples", "bytes_read", "bytes_written", "objects")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_s = 0.0
+        self.samples: deque[float] = deque(maxlen=SAMPLES_KEPT)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.objects = 0
+
+    def add(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total_s += elapsed
+        self.samples.append(elapsed)
+
+    def percentile(self, q: float) -> float:
+        # nearest rank over the kept samples
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[max(math.ceil(len(ordered) * q / 100) - 1, 0)]
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "total_s": self.total_s,
+            "mean_s": self.total_s / self.calls if self.calls else 0.0,
+            "p50_s": self.percentile(50),
+            "p95_s": self.percentile(95),
+            "p99_s": self.percentile(99),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "objects": self.objects,
+        }
+
+
+class Instrumentation:
+    # Opt-in timing of repository, service and analytics methods. Nothing is
+    # wrapped or counted until enable(): attach(obj) then puts a timing
+    # wrapper on each of obj's public methods (on the instance, the class is
+    # left alone) and detach() takes them off again.
+    #
+    # Per method: calls, cumulative time and p50/p95/p99 latency, plus the
+    # bytes read/written and objects deserialized while it was running
+    # (inclusive, a service call also counts its repository's I/O). The I/O
+    # is reported by the repositories themselves through record_read/
+    # record_write, and span(name) times a step inside a method (parsing
+    # JSON, building Book objects, building arrays) as if it were one.
+    #
+    # Generators are timed while they produce items, not while the caller
+    # consumes them.
+
+    def __init__(self):
+        self.enabled = False
+        self.started: datetime | None = None
+        self.methods: dict[str, MethodStats] = {}
+        self.totals = MethodStats()
+        self._active: list[MethodStats] = []
+        self._attached: list[tuple[object, list[str]]] = []
+
+    def enable(self) -> None:
+        if not self.enabled:
+            self.enabled = True
+            self.started = self.started or datetime.now()
+
+    def disable(self) -> None:
+        self.detach()
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.methods = {}
+        self.totals = MethodStats()
+        self.started = datetime.now() if self.enabled else None
+
+    def attach(self, obj, name: str | None = None) -> None:
+        name = name or type(obj).__name__
+        wrapped = []
+        for attr, member in inspect.getmembers(type(obj)):
+            if attr.startswith("_") or not inspect.isfunction(member) or attr in vars(obj):
+                continue
+            setattr(obj, attr, self._wrap(getattr(obj, attr), f"{name}.{attr}"))
+            wrapped.append(attr)
+        self._attached.append((obj, wrapped))
+
+    def detach(self) -> None:
+        for obj, wrapped in self._attached:
+            for attr in wrapped:
+                vars(obj).pop(attr, None)
+        self._attached = []
+
+    def stats(self, name: str) -> MethodStats:
+        stats = self.methods.get(name)
+        if stats is None:
+            stats = self.methods[name] = MethodStats()
+        return stats
+
+    def span(self, name: str):
+        # with span("BookRepository.parse_json"): ...
+        return _Span(self, name) if self.enabled else nullcontext()
+
+    def record_read(self, nbytes: int, objects: int = 0) -> None:
+        if self.enabled:
+            for stats in (*self._active, self.totals):
+                stats.bytes_read += nbytes
+                stats.objects += objects
+
+    def record_write(self, nbytes: int) -> None:
+        if self.enabled:
+            for stats in (*self._active, self.totals):
+                stats.bytes_written += nbytes
+
+    def to_dict(self) -> dict:
+        return {
+            "started": self.started.isoformat(timespec="seconds") if self.started else None,
+            "exported": datetime.now().isoformat(timespec="seconds"),
+            "totals": {key: value for key, value in self.totals.to_dict().items()
+                       if key in ("bytes_read", "bytes_written", "objects")},
+            "methods": {name: stats.to_dict() for name, stats in sorted(self.methods.items())},
+        }
+
+    def export(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def table(self, limit: int | None = None) -> str:
+        # slowest (cumulative) first
+        header = (f"{'method':<44} {'calls':>7} {'total ms':>10} {'p50 ms':>9} {'p95 ms':>9} "
+                  f"{'p99 ms':>9} {'read KiB':>10} {'written KiB':>11} {'objects':>9}")
+        rows = [header, "-" * len(header)]
+        ranked = sorted(self.methods.items(), key=lambda item: -item[1].total_s)
+        for name, stats in ranked[:limit]:
+            rows.append(
+                f"{name:<44} {stats.calls:>7} {stats.total_s * 1e3:>10.2f} {stats.percentile(50) * 1e3:>9.3f} "
+                f"{stats.percentile(95) * 1e3:>9.3f} {stats.percentile(99) * 1e3:>9.3f} "
+                f"{stats.bytes_read / 1024:>10.1f} {stats.bytes_written / 1024:>11.1f} {stats.objects:>9}")
+        return "\n".join(rows)
+
+    def _wrap(self, method: Callable, name: str) -> Callable:
+        instrumentation = self
+
+        def timed(*args, **kwargs):
+            stats = instrumentation.stats(name)
+            instrumentation._active.append(stats)
+            started = perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - started
+                instrumentation._active.pop()
+            if inspect.isgenerator(result):
+                return instrumentation._timed_generator(result, stats, elapsed)
+            stats.add(elapsed)
+            return result
+
+        timed.__wrapped__ = method
+        return timed
+
+    def _timed_generator(self, generator: Iterator, stats: MethodStats, elapsed: float) -> Iterator:
+        try:
+            while True:
+                self._active.append(stats)
+                started = perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += perf_counter() - started
+                    self._active.pop()
+                yield item
+        finally:
+            stats.add(elapsed)
+
+
+class _Span:
+    def __init__(self, instrumentation: Instrumentation, name: str):
+        self.instrumentation = instrumentation
+        self.stats = instrumentation.stats(name)
+
+    def __enter__(self):
+        self.instrumentation._active.append(self.stats)
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stats.add(perf_counter() - self.started)
+        self.instrumentation._active.pop()
+
+
+def profile(fn: Callable, *args, path: str | None = None, limit: int = 25, **kwargs) -> tuple[object, str]:
+    # runs fn under cProfile, returns (its result, the top `limit` functions by
+    # cumulative time), and keeps the raw profile at path for snakeviz & co
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+    if path is not None:
+        profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return result, out.getvalue()
+
+
+# the one the repositories report their I/O to, and the REPL switches on
+INSTRUMENTATION = Instrumentation()
@@ -0,0 +1,246 @@
+import json
+import os
+from src.domain import Book
+from src.repositories.book_repository import apply_changes, valid_changes, writes
+from src.repositories.cached_book_repository import CachedBookRepository
+from src.repositories.file_lock import atomic_write, bump_generation
+from src.repositories.instrumentation import INSTRUMENTATION
+
+
+class JournaledBookRepository(CachedBookRepository):
+    # Mutations are appended to a JSONL journal next to the snapshot instead of
+    # rewriting the whole catalog. Reads replay the journal on top of the last
+    # snapshot, and once the journal passes compact_threshold bytes it gets
+    # folded back into a fresh snapshot.
+    #
+    # Every entry is idempotent (add = upsert, update = set fields,
+    # remove = delete if present), so replaying a journal over a snapshot that
+    # already contains it gives the same catalog. That is what makes a crash
+    # between writing the snapshot and truncating the journal harmless.
+    #
+    # Bulk operations and transactions append all their entries in one write
+    # (and one fsync). Appends and compactions hold the writer lock, and a
+    # writer catches up with the journal before appending to it.
+
+    def __init__(self, filepath: str = "book.json",
+                 journal_path: str | None = None,
+                 compact_threshold: int = 1_000_000, use_snapshot: bool = False,
+                 compact_ids: bool = False):
+        super().__init__(filepath, use_snapshot, compact_ids)
+        self.journal_path = journal_path or f"{filepath}.journal"
+        self.compact_threshold = compact_threshold
+        # bytes of the journal already applied to the in-memory catalog
+        self._journal_offset = 0
+        # entries of the open transaction, appended on commit
+        self._buffered: list[dict] = []
+
+    @writes
+    def add_book(self, book: Book) -> str:
+        self._cached_books()
+        self._append({"op": "add", "book": book.to_dict()})
+        self._books[book.book_id] = book
+        self._notify("add", book)
+        self._after_append()
+        return book.book_id
+
+    @writes
+    def add_books(self, books: list[Book]) -> int:
+        stored = self._cached_books()
+        self._append_many([{"op": "add", "book": book.to_dict()} for book in books])
+        for book in books:
+            stored[book.book_id] = book
+            self._notify("add", book)
+        self._after_append()
+        return len(books)
+
+    @writes
+    def remove_book(self, book: Book) -> bool:
+        books = self._cached_books()
+        if book.book_id not in books:
+            return False
+
+        self._append({"op": "remove", "book_id": book.book_id})
+        del books[book.book_id]
+        self._notify("remove", book.book_id)
+        self._after_append()
+        return True
+
+    @writes
+    def remove_books_by_id(self, book_ids: list[str]) -> list[str]:
+        books = self._cached_books()
+        removed = [book_id for book_id in dict.fromkeys(book_ids) if book_id in books]
+        if not removed:
+            return []
+
+        self._append_many([{"op": "remove", "book_id": book_id} for book_id in removed])
+        for book_id in removed:
+            del books[book_id]
+            self._notify("remove", book_id)
+        self._after_append()
+        return removed
+
+    @writes
+    def update_book(self, book: Book, updates: dict[str: int]) -> bool:
+        try:
+            books = self._cached_books()
+            stored = books.get(book.book_id)
+            if stored is None:
+                return False
+
+            self._append({"op": "update", "book_id": book.book_id, "changes": updates})
+            for field, value in updates.items():
+                setattr(stored, field, value)
+                setattr(book, field, value)
+            self._notify("update", stored)
+            self._after_append()
+            return True
+        except Exception:
+            return False
+
+    @writes
+    def update_many(self, changes: list[tuple[Book, dict]]) -> bool:
+        books = self._cached_books()
+        if not valid_changes(books, changes):
+            return False
+
+        self._append_many([{"op": "update", "book_id": book.book_id, "changes": updates}
+                           for book, updates in changes])
+        for book, updates in changes:
+            apply_changes(books[book.book_id], book, updates)
+            self._notify("update", books[book.book_id])
+        self._after_append()
+        return True
+
+    @writes
+    def compact(self) -> None:
+        books = self._cached_books()
+        self._write_snapshot(list(books.values()))
+        # a crash before this truncate just means the entries get replayed again
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._journal_offset = 0
+
+    def get_snapshot(self):
+        # the binary snapshot mirrors the JSON snapshot, so fold the journal in first
+        if self.journal_size():
+            self.compact()
+        return super().get_snapshot()
+
+    def journal_size(self) -> int:
+        try:
+            return os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return 0
+
+    def _cached_books(self) -> dict[str, Book]:
+        books = super()._cached_books()
+        # pick up entries another process appended since we last looked
+        if self._replay_journal():
+            self._version += 1
+        return books
+
+    def _is_fresh(self) -> bool:
+        # a journal shorter than what we applied means someone compacted it
+        return super()._is_fresh() and self.journal_size() >= self._journal_offset
+
+    def _load(self) -> None:
+        super()._load()
+        self._journal_offset = 0
+
+    def _search_source(self) -> list:
+        # the catalog is the snapshot plus however much of the journal we applied
+        return [*super()._search_source(), self._journal_offset]
+
+    def _write_books(self, books: list[Book]) -> None:
+        # anything that still wants a full rewrite becomes a compaction
+        self._write_snapshot(books)
+        self._replace_books(books)
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._journal_offset = 0
+
+    def _write_snapshot(self, books: list[Book]) -> None:
+        # a crash mid-write leaves the old snapshot in place
+        with self.lock:
+            with INSTRUMENTATION.span("BookRepository.write_json"):
+                atomic_write(self.filepath, lambda f: json.dump([item.to_dict() for item in books], f, indent=2))
+            bump_generation(self.generation_path)
+        INSTRUMENTATION.record_write(os.path.getsize(self.filepath))
+
+        self._signature = self._file_signature()
+        self._version += 1
+
+    def _replay_journal(self) -> bool:
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(self._journal_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return False
+
+        # only whole lines count, a torn last line from a crash is left alone
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return False
+
+        entries = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        for entry in entries:
+            self._apply(entry)
+        self._journal_offset += end
+        INSTRUMENTATION.record_read(end, len(entries))
+        return True
+
+    def _apply(self, entry: dict) -> None:
+        op = entry["op"]
+        if op == "add":
+            book = self.book_type.from_dict(entry["book"])
+            self._books[book.book_id] = book
+            self._notify("add", book)
+        elif op == "remove":
+            if self._books.pop(entry["book_id"], None) is not None:
+                self._notify("remove", entry["book_id"])
+        elif op == "update":
+            book = self._books.get(entry["book_id"])
+            if book is not None:
+                for field, value in entry["changes"].items():
+                    setattr(book, field, value)
+                self._notify("update", book)
+
+    def _begin(self) -> None:
+        super()._begin()
+        self._buffered = []
+
+    def _commit(self) -> None:
+        entries, self._buffered = self._buffered, []
+        super()._commit()
+        if entries:
+            self._append_many(entries)
+            self._after_append()
+
+    def _rollback(self) -> None:
+        self._buffered = []
+        super()._rollback()
+
+    def _append(self, entry: dict) -> None:
+        self._append_many([entry])
+
+    def _append_many(self, entries: list[dict]) -> None:
+        if self.in_transaction():
+            self._buffered.extend(entries)
+            return
+        line = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+        with self.lock, open(self.journal_path, "ab") as f:
+            # drop a torn tail left by a crashed writer before appending after it
+            if f.tell() > self._journal_offset:
+                f.truncate(self._journal_offset)
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            self._journal_offset = f.tell()
+        bump_generation(self.generation_path)
+        INSTRUMENTATION.record_write(len(line))
+
+    def _after_append(self) -> None:
+        self._version += 1
+        if not self.in_transaction() and self._journal_offset >= self.compact_threshold:
+            self.compact()
@@ -0,0 +1,38 @@
+import json
+from typing import Iterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+def iter_json_records(filepath: str, block_size: int = 1 << 16) -> Iterator[dict]:
+    # Yields the objects of a JSON array file ([{...}, {...}]) or a JSONL file
+    # one at a time, reading block_size characters at a time. Only the record
+    # being decoded is ever held in memory, never the whole parsed tree.
+    with open(filepath, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        while True:
+            # skip the separators between records: whitespace, "[", "," and "]"
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE + "[,]":
+                pos += 1
+
+            if pos < len(buffer):
+                try:
+                    record, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    # the record runs past what we've read so far
+                else:
+                    yield record
+                    pos = end
+                    continue
+            elif eof:
+                return
+
+            block = f.read(block_size)
+            eof = not block
+            buffer = buffer[pos:] + block
+            pos = 0
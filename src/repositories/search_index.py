@@ -0,0 +1,319 @@
+import json
+import math
+import os
+import re
+from bisect import bisect_left, insort
+from heapq import nlargest
+from src.domain import Book
+
+# each field counts this many times towards a term's frequency (simplified BM25F),
+# a word in the title says more about a book than the same word in its publisher
+FIELD_WEIGHTS = (("title", 2.0), ("author", 1.0), ("publisher", 0.5))
+
+K1 = 1.2
+B = 0.75
+
+# a term matching more books than this only re-scores the candidates rarer
+# terms already found, once there are enough of them to fill the results.
+# The rarest term (and any term while results are short) scores all its books
+CANDIDATE_LIMIT = 5_000
+
+# fuzzy matching: how alike two words have to be, and how many alternatives per word
+MIN_SIMILARITY = 0.5
+MAX_FUZZY_TERMS = 3
+MAX_PREFIX_TERMS = 10
+
+# removed books leave a gap in the doc numbers, they are renumbered once the
+# gaps are this share of all doc numbers (amortized O(1) per removal)
+COMPACT_RATIO = 0.25
+
+# 2: JSON instead of pickle
+FORMAT_VERSION = 2
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str | None) -> list[str]:
+    return _TOKEN.findall((text or "").casefold())
+
+
+def trigrams(term: str) -> set[str]:
+    padded = f" {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    # Ranked full-text search over title, author and publisher.
+    #   - inverted index term -> {doc: weighted term frequency}, scored with BM25
+    #   - trigram index over the vocabulary, so a misspelled word ("Hobit")
+    #     still finds the words that look like it
+    #   - sorted vocabulary, so the last word of a query also matches as a prefix
+    #     ("Book Tit" -> "title")
+    #
+    # A repository listener like BookIndex: reset(books) / add / remove /
+    # update keep it current one book at a time. It only knows book_ids,
+    # mapping them back to Book objects is up to the repository. save/restore
+    # persist it next to the catalog, tagged with whatever the repository uses
+    # to tell catalog versions apart.
+
+    def __init__(self, books: list[Book] | None = None):
+        self.reset(books or [])
+
+    def reset(self, books: list[Book]) -> None:
+        self._book_ids: list[str | None] = []
+        self._doc_of: dict[str, int] = {}
+        self._lengths: list[float] = []
+        # what each doc was indexed under, the Book may be mutated before update()
+        self._texts: dict[int, tuple] = {}
+        self._postings: dict[str, dict[int, float]] = {}
+        self._total_length = 0.0
+        for book in books:
+            self._insert(book, track_vocabulary=False)
+        self._rebuild_vocabulary()
+
+    def add(self, book: Book) -> None:
+        if book.book_id in self._doc_of:
+            self.remove(book.book_id)
+        self._insert(book)
+
+    def remove(self, book_id: str) -> None:
+        doc = self._doc_of.pop(book_id, None)
+        if doc is None:
+            return
+        for term in self._weighted_terms(self._texts.pop(doc)):
+            postings = self._postings[term]
+            del postings[doc]
+            if not postings:
+                del self._postings[term]
+                self._forget_term(term)
+        self._book_ids[doc] = None
+        self._total_length -= self._lengths[doc]
+        self._lengths[doc] = 0.0
+        if len(self._book_ids) - len(self._doc_of) > COMPACT_RATIO * len(self._book_ids):
+            self._compact()
+
+    def update(self, book: Book) -> None:
+        doc = self._doc_of.get(book.book_id)
+        if doc is not None and self._texts[doc] == self._text(book):
+            return
+        self.add(book)
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[str, float]]:
+        # [(book_id, score)] best first, ties keep catalog order
+        terms = self._expand(tokenize(query))
+        if not terms or not self._doc_of:
+            return []
+
+        n = len(self._doc_of)
+        average_length = self._total_length / n
+        scores: dict[int, float] = {}
+        # rarest terms first: they pick the candidates, common ones only re-score them
+        for term, weight in sorted(terms.items(), key=lambda item: len(self._postings[item[0]])):
+            postings = self._postings[term]
+            df = len(postings)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5)) * weight
+            if len(scores) >= limit and df > CANDIDATE_LIMIT:
+                pairs = ((doc, postings[doc]) for doc in scores if doc in postings)
+            else:
+                # every posting, a cut in insertion order would drop the best
+                # scoring docs as often as the worst
+                pairs = postings.items()
+            # BM25 with the per-term constants hoisted out of the loop, common
+            # terms run it for every book that has them
+            lengths = self._lengths
+            gain = idf * (K1 + 1)
+            base = K1 * (1 - B)
+            per_length = K1 * B / average_length
+            for doc, tf in pairs:
+                scores[doc] = scores.get(doc, 0.0) + gain * tf / (tf + base + per_length * lengths[doc])
+
+        best = nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self._book_ids[doc], score) for doc, score in best]
+
+    def save(self, path: str, source) -> None:
+        # plain JSON like the catalog, never pickle: the file sits next to the
+        # user's data and loading it must not be able to run code. Written to
+        # a temp file and renamed over the old one. Flat lists instead of
+        # nested ones, they parse several times faster:
+        #   texts: docs [d, ...] and their fields [title, author, publisher, ...]
+        #   postings: terms [t, ...], how many docs each has, then their docs and tfs
+        state = {
+            "format": FORMAT_VERSION,
+            "source": list(source),
+            "book_ids": self._book_ids,
+            "lengths": self._lengths,
+            "text_docs": list(self._texts),
+            "texts": [value for text in self._texts.values() for value in text],
+            "terms": list(self._postings),
+            "doc_counts": [len(postings) for postings in self._postings.values()],
+            "docs": [doc for postings in self._postings.values() for doc in postings],
+            "tfs": [tf for postings in self._postings.values() for tf in postings.values()],
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            # one dumps is much faster than json.dump's many small writes
+            f.write(json.dumps(state, separators=(",", ":")))
+        os.replace(tmp_path, path)
+
+    def restore(self, path: str, source) -> bool:
+        # loads a saved index if it was saved for this source, False otherwise
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(state, dict) or state.get("format") != FORMAT_VERSION \
+                or state.get("source") != list(source):
+            return False
+
+        try:
+            fields = len(FIELD_WEIGHTS)
+            values = state["texts"]
+            texts = {doc: tuple(values[i * fields:(i + 1) * fields]) for i, doc in enumerate(state["text_docs"])}
+            docs, tfs = state["docs"], state["tfs"]
+            postings = {}
+            start = 0
+            for term, count in zip(state["terms"], state["doc_counts"], strict=True):
+                postings[term] = dict(zip(docs[start:start + count], tfs[start:start + count]))
+                start += count
+            book_ids, lengths = state["book_ids"], state["lengths"]
+        except (KeyError, TypeError, ValueError):
+            return False
+
+        self._book_ids = book_ids
+        self._lengths = lengths
+        self._texts = texts
+        self._postings = postings
+        self._doc_of = {book_id: doc for doc, book_id in enumerate(self._book_ids) if book_id is not None}
+        self._total_length = sum(self._lengths)
+        self._rebuild_vocabulary()
+        return True
+
+    def _expand(self, tokens: list[str]) -> dict[str, float]:
+        # query words -> {indexed term: weight}, exact words count fully,
+        # prefix and fuzzy matches less
+        terms: dict[str, float] = {}
+
+        def offer(term: str, weight: float) -> None:
+            if weight > terms.get(term, 0.0):
+                terms[term] = weight
+
+        for i, token in enumerate(tokens):
+            if token in self._postings:
+                offer(token, 1.0)
+                continue
+            if i == len(tokens) - 1:
+                for term in self._with_prefix(token):
+                    offer(term, 0.8)
+            for term, similarity in self._similar(token):
+                offer(term, similarity)
+        return terms
+
+    def _with_prefix(self, prefix: str) -> list[str]:
+        vocabulary = self._vocabulary
+        i = bisect_left(vocabulary, prefix)
+        matches = []
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix) and len(matches) < MAX_PREFIX_TERMS:
+            matches.append(vocabulary[i])
+            i += 1
+        return matches
+
+    def _similar(self, token: str) -> list[tuple[str, float]]:
+        # Dice coefficient over trigrams, numbers are never fuzzy matched
+        if token.isdigit() or len(token) < 3:
+            return []
+        grams = trigrams(token)
+        shared: dict[str, int] = {}
+        for gram in grams:
+            for term in self._trigrams.get(gram, ()):
+                shared[term] = shared.get(term, 0) + 1
+
+        scored = []
+        for term, count in shared.items():
+            # a term of n letters has n padded trigrams
+            similarity = 2 * count / (len(grams) + len(term))
+            if similarity >= MIN_SIMILARITY:
+                scored.append((term, similarity))
+        return nlargest(MAX_FUZZY_TERMS, scored, key=lambda item: (item[1], item[0]))
+
+    def _insert(self, book: Book, track_vocabulary: bool = True) -> None:
+        text = self._text(book)
+        doc = len(self._book_ids)
+        self._book_ids.append(book.book_id)
+        self._doc_of[book.book_id] = doc
+        self._texts[doc] = text
+
+        length = 0.0
+        for term, tf in self._weighted_terms(text).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if track_vocabulary:
+                    self._learn_term(term)
+            postings[doc] = tf
+            length += tf
+        self._lengths.append(length)
+        self._total_length += length
+
+    def _compact(self) -> None:
+        # renumber the live docs 0..n-1, in the same order so ties still keep catalog order
+        new_doc = {}
+        book_ids, lengths, texts = [], [], {}
+        for doc, book_id in enumerate(self._book_ids):
+            if book_id is None:
+                continue
+            new_doc[doc] = len(book_ids)
+            book_ids.append(book_id)
+            lengths.append(self._lengths[doc])
+            texts[new_doc[doc]] = self._texts[doc]
+        self._book_ids, self._lengths, self._texts = book_ids, lengths, texts
+        self._doc_of = {book_id: doc for doc, book_id in enumerate(book_ids)}
+        self._postings = {term: {new_doc[doc]: tf for doc, tf in postings.items()}
+                          for term, postings in self._postings.items()}
+
+    @staticmethod
+    def _text(book: Book) -> tuple:
+        return tuple(getattr(book, name) for name, _ in FIELD_WEIGHTS)
+
+    @staticmethod
+    def _weighted_terms(text: tuple) -> dict[str, float]:
+        terms: dict[str, float] = {}
+        for value, (_, weight) in zip(text, FIELD_WEIGHTS):
+            for token in tokenize(value):
+                terms[token] = terms.get(token, 0.0) + weight
+        return terms
+
+    def _rebuild_vocabulary(self) -> None:
+        self._vocabulary = sorted(self._postings)
+        self._trigrams: dict[str, set[str]] = {}
+        for term in self._vocabulary:
+            if not term.isdigit():
+                for gram in trigrams(term):
+                    self._trigrams.setdefault(gram, set()).add(term)
+
+    def _learn_term(self, term: str) -> None:
+        insort(self._vocabulary, term)
+        if not term.isdigit():
+            for gram in trigrams(term):
+                self._trigrams.setdefault(gram, set()).add(term)
+
+    def _forget_term(self, term: str) -> None:
+        i = bisect_left(self._vocabulary, term)
+        if i < len(self._vocabulary) and self._vocabulary[i] == term:
+            del self._vocabulary[i]
+        if not term.isdigit():
+            for gram in trigrams(term):
+                bucket = self._trigrams.get(gram)
+                if bucket is not None:
+                    bucket.discard(term)
+                    if not bucket:
+                        del self._trigrams[gram]
+
+
+def search_books(books: list[Book], query: str, limit: int = 10) -> list[Book]:
+    # one-off search for repositories that don't keep an index around
+    by_id = {book.book_id: book for book in books}
+    return [by_id[book_id] for book_id, _ in SearchIndex(books).search(query, limit)]
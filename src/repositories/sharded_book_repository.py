@@ -0,0 +1,259 @@
+import json
+import os
+import zlib
+from contextlib import ExitStack, contextmanager
+from heapq import merge
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterator
+from src.domain import Book
+from src.repositories.book_index import normalize
+from src.repositories.book_repository import BookRepository, apply_changes, valid_changes
+from src.repositories.book_repository_protocol import BookRepositoryProtocol
+from src.repositories.file_lock import atomic_write
+from src.repositories.search_index import search_books
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+SHARD_KEYS = ("book_id", "genre")
+
+
+def shard_of(value: str | None, shards: int) -> int:
+    # crc32 rather than hash(), which changes from one process to the next
+    return zlib.crc32((value or "").encode("utf-8")) % shards
+
+
+class ShardedBookRepository(BookRepositoryProtocol):
+    # The catalog split over N JSON files by a hash of book_id (or of genre):
+    #
+    #   books.shards/
+    #     manifest.json      {"shards": 8, "shard_by": "book_id"}
+    #     shard-000.json
+    #     ...
+    #
+    # Every shard is a plain BookRepository, with its own lock, temp-file
+    # writes and generation counter, so writers to different shards don't
+    # wait for each other. Single-book operations go to the one shard that
+    # owns the book (with shard_by="genre", lookups by id have to ask every
+    # shard). Scans run shard by shard, over a process pool when workers > 1,
+    # so the shards are parsed in parallel.
+    #
+    # get_all_books returns the books shard by shard, not in insertion order.
+    # A transaction locks every shard (always in the same order) but commits
+    # them one by one, so a crash mid-commit can leave some shards committed.
+
+    def __init__(self, dirpath: str = "books.shards", shards: int = 8, shard_by: str = "book_id",
+                 workers: int = 1, use_snapshot: bool = False, compact_ids: bool = False):
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"Can't shard by {shard_by}, expected one of {', '.join(SHARD_KEYS)}")
+        self.dirpath = dirpath
+        self.workers = workers
+        os.makedirs(dirpath, exist_ok=True)
+
+        # an existing layout wins over the arguments, the books are already placed by it
+        manifest_path = os.path.join(dirpath, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            shards, shard_by = manifest["shards"], manifest["shard_by"]
+        else:
+            atomic_write(manifest_path, lambda f: json.dump({"shards": shards, "shard_by": shard_by}, f))
+        self.shard_by = shard_by
+
+        self.shards: list[BookRepository] = []
+        for i in range(shards):
+            path = os.path.join(dirpath, f"shard-{i:03d}.json")
+            if not os.path.exists(path):
+                atomic_write(path, lambda f: f.write("[]"))
+            self.shards.append(BookRepository(path, use_snapshot, compact_ids))
+        self._pool: "ProcessPoolExecutor | None" = None
+
+    def get_all_books(self) -> list[Book]:
+        return [book for shard in self.shards for book in shard.get_all_books()]
+
+    @property
+    def version(self) -> int:
+        return hash(tuple(shard.version for shard in self.shards))
+
+    @property
+    def generation(self) -> int:
+        return sum(shard.generation for shard in self.shards)
+
+    def iter_books(self) -> Iterator[Book]:
+        for shard in self.shards:
+            yield from shard.iter_books()
+
+    def iter_chunks(self, size: int = 10_000) -> Iterator[list[Book]]:
+        books = self.iter_books()
+        while chunk := list(islice(books, size)):
+            yield chunk
+
+    def shard_for(self, book: Book) -> BookRepository:
+        return self.shards[shard_of(getattr(book, self.shard_by), len(self.shards))]
+
+    def add_book(self, book: Book) -> str:
+        if self.shard_by == "book_id":
+            return self.shard_for(book).add_book(book)
+        self.add_books([book])
+        return book.book_id
+
+    def add_books(self, books: list[Book]) -> int:
+        if self.shard_by == "book_id":
+            # one write per shard touched
+            for shard, group in self._group(books).items():
+                shard.add_books(group)
+            return len(books)
+        with self.transaction():
+            # replacing a book can move it (new genre), drop the copy in its old shard
+            for i, shard in enumerate(self.shards):
+                moved = [book.book_id for book in books if self._index_of(book) != i]
+                if moved:
+                    shard.remove_books_by_id(moved)
+            for shard, group in self._group(books).items():
+                shard.add_books(group)
+        return len(books)
+
+    def find_book_by_name(self, query: str) -> list[Book]:
+        return self._scan(_find_book_by_name, query)
+
+    def get_by_id(self, book_id: str) -> Book | None:
+        if self.shard_by == "book_id":
+            return self.shards[shard_of(book_id, len(self.shards))].get_by_id(book_id)
+        return next(iter(self._scan(_get_by_id, book_id)), None)
+
+    def find_by_title_prefix(self, prefix: str) -> list[Book]:
+        # same order as BookIndex gives: normalized title, then book_id
+        return sorted(self._scan(_find_by_title_prefix, prefix),
+                      key=lambda b: (normalize(b.title), b.book_id))
+
+    def find_by_author(self, author: str) -> list[Book]:
+        return self._scan(_find_by_author, author)
+
+    def search(self, query: str, limit: int = 10) -> list[Book]:
+        # BM25 needs collection-wide statistics, so this ranks over every shard at once
+        return search_books(self.get_all_books(), query, limit)
+
+    def top_rated(self, limit: int = 10, min_ratings: int = 500) -> list[Book]:
+        # every shard's top `limit` are already sorted, the overall top is in their merge
+        per_shard = self.map_shards(_top_rated, limit, min_ratings)
+        ranked = merge(*per_shard, key=lambda b: (-b.average_rating, -b.ratings_count, b.book_id))
+        return list(islice(ranked, limit))
+
+    def remove_book(self, book: Book) -> bool:
+        return bool(self.remove_books_by_id([book.book_id]))
+
+    def remove_books_by_id(self, book_ids: list[str]) -> list[str]:
+        removed = set()
+        for shard, group in self._group_ids(book_ids).items():
+            removed.update(shard.remove_books_by_id(group))
+        return [book_id for book_id in dict.fromkeys(book_ids) if book_id in removed]
+
+    def update_book(self, book: Book, updates: dict[str: int]) -> bool:
+        return self.update_many([(book, updates)])
+
+    def update_many(self, changes: list[tuple[Book, dict]]) -> bool:
+        # all or nothing across shards: every shard stays locked from the
+        # check to the last write
+        with self.transaction():
+            stored = {b.book_id: b for b in self._lookup([book.book_id for book, _ in changes])}
+            if not valid_changes(stored, changes):
+                return False
+
+            by_shard: dict[int, list[tuple[Book, dict]]] = {}
+            for book, updates in changes:
+                current = stored[book.book_id]
+                old = self._index_of(current)
+                if self.shard_by in updates and shard_of(updates[self.shard_by], len(self.shards)) != old:
+                    # a new genre can mean a new shard, the book moves with it
+                    self.shards[old].remove_books_by_id([current.book_id])
+                    apply_changes(current, book, updates)
+                    self.shard_for(current).add_books([current])
+                else:
+                    by_shard.setdefault(old, []).append((book, updates))
+
+            for i, group in sorted(by_shard.items()):
+                self.shards[i].update_many(group)
+        return True
+
+    @contextmanager
+    def transaction(self) -> Iterator["ShardedBookRepository"]:
+        with ExitStack() as stack:
+            for shard in self.shards:
+                stack.enter_context(shard.transaction())
+            yield self
+
+    def map_shards(self, func: Callable, *args) -> list:
+        # func(shard_repository, *args) for every shard, in shard order. func has
+        # to be a module-level function when workers > 1 (it runs in the pool)
+        tasks = [(type(shard), shard.filepath, shard.use_snapshot, shard.book_type is not Book, func, args)
+                 for shard in self.shards]
+        if self.workers <= 1 or any(shard.in_transaction() for shard in self.shards):
+            # in a transaction the pending changes only exist in this process
+            return [func(shard, *args) for shard in self.shards]
+        if self._pool is None:
+            # multiprocessing is a slow import, only paid by whoever uses the pool
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return list(self._pool.map(_call_shard, tasks))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _scan(self, func: Callable, *args) -> list[Book]:
+        return [book for books in self.map_shards(func, *args) for book in books]
+
+    def _index_of(self, book: Book) -> int:
+        return shard_of(getattr(book, self.shard_by), len(self.shards))
+
+    def _group(self, books: list[Book]) -> dict[BookRepository, list[Book]]:
+        groups: dict[int, list[Book]] = {}
+        for book in books:
+            groups.setdefault(self._index_of(book), []).append(book)
+        return {self.shards[i]: group for i, group in sorted(groups.items())}
+
+    def _group_ids(self, book_ids: list[str]) -> dict[BookRepository, list[str]]:
+        if self.shard_by != "book_id":
+            # nothing to route by, every shard gets asked
+            return {shard: list(book_ids) for shard in self.shards}
+        groups: dict[int, list[str]] = {}
+        for book_id in book_ids:
+            groups.setdefault(shard_of(book_id, len(self.shards)), []).append(book_id)
+        return {self.shards[i]: group for i, group in sorted(groups.items())}
+
+    def _lookup(self, book_ids: list[str]) -> list[Book]:
+        found = []
+        for shard, group in self._group_ids(book_ids).items():
+            wanted = set(group)
+            found.extend(b for b in shard.get_all_books() if b.book_id in wanted)
+        return found
+
+
+# scans run on a shard repository, module level so the pool can run them
+
+
+def _call_shard(task: tuple):
+    repo_type, filepath, use_snapshot, compact_ids, func, args = task
+    return func(repo_type(filepath, use_snapshot, compact_ids), *args)
+
+
+def _find_book_by_name(shard: BookRepository, query: str) -> list[Book]:
+    return shard.find_book_by_name(query)
+
+
+def _get_by_id(shard: BookRepository, book_id: str) -> list[Book]:
+    book = shard.get_by_id(book_id)
+    return [] if book is None else [book]
+
+
+def _find_by_title_prefix(shard: BookRepository, prefix: str) -> list[Book]:
+    return shard.find_by_title_prefix(prefix)
+
+
+def _find_by_author(shard: BookRepository, author: str) -> list[Book]:
+    return shard.find_by_author(author)
+
+
+def _top_rated(shard: BookRepository, limit: int, min_ratings: int) -> list[Book]:
+    return shard.top_rated(limit, min_ratings)
@@ -0,0 +1,272 @@
+import sqlite3
+from contextlib import contextmanager, nullcontext
+from dataclasses import fields
+from itertools import islice
+from typing import Iterator
+from src.domain import Book
+from src.repositories.book_index import normalize
+from src.repositories.book_repository import valid_changes
+from src.repositories.book_repository_protocol import BookRepositoryProtocol
+from src.repositories.instrumentation import INSTRUMENTATION
+from src.repositories.json_stream import iter_json_records
+from src.repositories.search_index import search_books
+
+BOOK_COLUMNS = [f.name for f in fields(Book)]
+BOOL_COLUMNS = {"in_print", "available"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    book_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    genre TEXT,
+    publication_year INTEGER,
+    page_count INTEGER,
+    average_rating REAL,
+    ratings_count INTEGER,
+    price_usd REAL,
+    publisher TEXT,
+    language TEXT,
+    format TEXT,
+    in_print INTEGER,
+    sales_millions REAL,
+    last_checkout TEXT,
+    available INTEGER,
+    -- normalized copies of title/author so lookups are case-insensitive and indexed
+    title_key TEXT NOT NULL,
+    author_key TEXT NOT NULL,
+    -- insertion order, so get_all_books keeps the order books were added in
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS books_title_key ON books (title_key);
+CREATE INDEX IF NOT EXISTS books_title ON books (title);
+CREATE INDEX IF NOT EXISTS books_author_key ON books (author_key);
+CREATE INDEX IF NOT EXISTS books_genre ON books (genre);
+CREATE INDEX IF NOT EXISTS books_position ON books (position);
+CREATE INDEX IF NOT EXISTS books_rating ON books (average_rating DESC, ratings_count DESC, book_id);
+"""
+
+# the statements are fixed strings so sqlite3's statement cache keeps them prepared
+SELECT_BOOKS = f"SELECT {', '.join(BOOK_COLUMNS)} FROM books"
+INSERT_BOOK = (
+    f"INSERT OR REPLACE INTO books ({', '.join(BOOK_COLUMNS)}, title_key, author_key, position) "
+    f"VALUES ({', '.join('?' for _ in BOOK_COLUMNS)}, ?, ?, "
+    "COALESCE((SELECT position FROM books WHERE book_id = ?), "
+    "(SELECT COALESCE(MAX(position), 0) + 1 FROM books)))"
+)
+
+
+class SqliteBookRepository(BookRepositoryProtocol):
+    # BookRepositoryProtocol on top of the standard library's sqlite3.
+    # Lookups go through indexes and updates touch one row, so neither
+    # depends on how big the catalog is. WAL mode lets readers keep reading
+    # while a writer commits.
+
+    def __init__(self, filepath: str = "books.db"):
+        self.filepath = filepath
+        self.conn = sqlite3.connect(filepath)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._transaction_depth = 0
+
+    @property
+    def version(self) -> int:
+        # total_changes moves with our writes, data_version with everyone else's
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return hash((self.conn.total_changes, data_version))
+
+    def get_all_books(self) -> list[Book]:
+        return self._query(f"{SELECT_BOOKS} ORDER BY position")
+
+    def iter_books(self) -> Iterator[Book]:
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+    def iter_chunks(self, size: int = 10_000) -> Iterator[list[Book]]:
+        # a separate cursor, so the result set is read size rows at a time
+        cursor = self.conn.execute(f"{SELECT_BOOKS} ORDER BY position")
+        while rows := cursor.fetchmany(size):
+            yield [self._book(row) for row in rows]
+
+    def add_book(self, book: Book) -> str:
+        with self._writing():
+            self.conn.execute(INSERT_BOOK, self._row(book))
+        return book.book_id
+
+    def add_books(self, books: list[Book], batch_size: int = 10_000) -> int:
+        # executemany batch by batch, all in one transaction: a failing batch
+        # takes the earlier ones with it, like every other repository
+        added = 0
+        with self.transaction():
+            for start in range(0, len(books), batch_size):
+                self.conn.executemany(INSERT_BOOK, (self._row(b) for b in books[start:start + batch_size]))
+                added += len(books[start:start + batch_size])
+        return added
+
+    def find_book_by_name(self, query: str) -> list[Book]:
+        return self._query(f"{SELECT_BOOKS} WHERE title = ? ORDER BY position", (query,))
+
+    def get_by_id(self, book_id: str) -> Book | None:
+        books = self._query(f"{SELECT_BOOKS} WHERE book_id = ?", (book_id,))
+        return books[0] if books else None
+
+    def find_by_title_prefix(self, prefix: str) -> list[Book]:
+        # a range on the indexed key instead of LIKE, which can't use the index
+        prefix = normalize(prefix)
+        return self._query(
+            f"{SELECT_BOOKS} WHERE title_key >= ? AND title_key < ? ORDER BY title_key, book_id",
+            (prefix, prefix + "\U0010ffff"))
+
+    def find_by_author(self, author: str) -> list[Book]:
+        return self._query(f"{SELECT_BOOKS} WHERE author_key = ? ORDER BY position", (normalize(author),))
+
+    def find_by_genre(self, genre: str) -> list[Book]:
+        return self._query(f"{SELECT_BOOKS} WHERE genre = ? ORDER BY position", (genre,))
+
+    def search(self, query: str, limit: int = 10) -> list[Book]:
+        # ranked fuzzy search needs the whole vocabulary, so this is a scan
+        return search_books(self.get_all_books(), query, limit)
+
+    def top_rated(self, limit: int = 10, min_ratings: int = 500) -> list[Book]:
+        return self._query(
+            f"{SELECT_BOOKS} WHERE ratings_count >= ? AND average_rating IS NOT NULL "
+            "ORDER BY average_rating DESC, ratings_count DESC, book_id LIMIT ?",
+            (min_ratings, limit))
+
+    def remove_book(self, book: Book) -> bool:
+        with self._writing():
+            cursor = self.conn.execute("DELETE FROM books WHERE book_id = ?", (book.book_id,))
+        return cursor.rowcount > 0
+
+    def remove_books_by_id(self, book_ids: list[str]) -> list[str]:
+        book_ids = list(dict.fromkeys(book_ids))
+        with self._writing():
+            present = self._existing_ids(book_ids)
+            self.conn.executemany("DELETE FROM books WHERE book_id = ?", ((book_id,) for book_id in present))
+        return [book_id for book_id in book_ids if book_id in present]
+
+    def update_book(self, book: Book, updates: dict[str: int]) -> bool:
+        try:
+            if any(column not in BOOK_COLUMNS or column == "book_id" for column in updates):
+                return False
+            columns = self._columns(updates)
+            if not columns:
+                # nothing to change, same answer as the JSON repositories
+                return bool(self._existing_ids([book.book_id]))
+
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            with self._writing():
+                cursor = self.conn.execute(
+                    f"UPDATE books SET {assignments} WHERE book_id = ?",
+                    (*columns.values(), book.book_id))
+            if cursor.rowcount == 0:
+                return False
+
+            for field, value in updates.items():
+                setattr(book, field, value)
+            return True
+        except sqlite3.Error:
+            return False
+
+    def update_many(self, changes: list[tuple[Book, dict]]) -> bool:
+        # checked up front, so either every row is updated or none is
+        known = self._existing_ids([book.book_id for book, _ in changes])
+        if not valid_changes(known, changes):
+            return False
+
+        try:
+            with self._writing():
+                for book, updates in changes:
+                    columns = self._columns(updates)
+                    # nothing to set, the row was already checked to exist above
+                    if not columns:
+                        continue
+                    assignments = ", ".join(f"{column} = ?" for column in columns)
+                    self.conn.execute(f"UPDATE books SET {assignments} WHERE book_id = ?",
+                                      (*columns.values(), book.book_id))
+        except sqlite3.Error:
+            # inside a transaction() the earlier rows are only undone by
+            # rolling the whole thing back, so let it
+            if self.in_transaction():
+                raise
+            return False
+
+        for book, updates in changes:
+            for field, value in updates.items():
+                setattr(book, field, value)
+        return True
+
+    @contextmanager
+    def transaction(self) -> Iterator["SqliteBookRepository"]:
+        # one sqlite transaction around the whole block, rolled back if it
+        # raises. A nested transaction just joins the outer one.
+        self._transaction_depth += 1
+        try:
+            if self._transaction_depth == 1:
+                with self.conn:
+                    yield self
+            else:
+                yield self
+        finally:
+            self._transaction_depth -= 1
+
+    def in_transaction(self) -> bool:
+        return self._transaction_depth > 0
+
+    def import_json(self, json_path: str, batch_size: int = 10_000) -> int:
+        # one-shot import of a books.json (or .jsonl) catalog, streamed batch by
+        # batch so the file never has to fit in memory, returns how many books were loaded.
+        # All or nothing, a bad record halfway through leaves the database as it was
+        records = iter_json_records(json_path)
+        added = 0
+        with self.transaction():
+            while batch := [Book.from_dict(item) for item in islice(records, batch_size)]:
+                added += self.add_books(batch, batch_size)
+        return added
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _writing(self):
+        # commit per statement group, unless a transaction() commits for us
+        return nullcontext() if self.in_transaction() else self.conn
+
+    def _existing_ids(self, book_ids: list[str]) -> set[str]:
+        present = set()
+        # sqlite caps the number of parameters per statement
+        for start in range(0, len(book_ids), 500):
+            batch = book_ids[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT book_id FROM books WHERE book_id IN ({', '.join('?' for _ in batch)})", batch)
+            present.update(row[0] for row in rows)
+        return present
+
+    @staticmethod
+    def _columns(updates: dict) -> dict:
+        # the normalized lookup keys follow title/author
+        columns = dict(updates)
+        if "title" in columns:
+            columns["title_key"] = normalize(columns["title"])
+        if "author" in columns:
+            columns["author_key"] = normalize(columns["author"])
+        return columns
+
+    def _query(self, sql: str, params: tuple = ()) -> list[Book]:
+        # sqlite doesn't say how many bytes it read, only the rows are counted
+        books = [self._book(row) for row in self.conn.execute(sql, params)]
+        INSTRUMENTATION.record_read(0, len(books))
+        return books
+
+    @staticmethod
+    def _row(book: Book) -> tuple:
+        values = [getattr(book, column) for column in BOOK_COLUMNS]
+        return (*values, normalize(book.title), normalize(book.author), book.book_id)
+
+    @staticmethod
+    def _book(row: tuple) -> Book:
+        data = dict(zip(BOOK_COLUMNS, row))
+        for column in BOOL_COLUMNS:
+            if data[column] is not None:
+                data[column] = bool(data[column])
+        return Book(**data)
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+from functools import wraps
+from src.services.book_frame import BookFrame
+
+
+class AnalyticsCache:
+    # LRU cache for analytics results keyed on (method, catalog version, args).
+    #
+    # Books can't be part of a key (lists aren't hashable and hashing every
+    # book would cost as much as the query), so the dataset is identified by
+    # the version of the BookFrame it is passed as. When the repository bumps
+    # its version the old entries simply stop being asked for and age out.
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+    def get_or_compute(self, key: tuple, compute):
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        result = compute()
+        self._entries[key] = result
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "uncacheable": self.uncacheable,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def make_key(name: str, args: tuple, kwargs: dict) -> tuple | None:
+    # None = can't be cached (a plain list of books, a frame with no version, ...)
+    parts = [name]
+    for arg in args:
+        if isinstance(arg, BookFrame):
+            if arg.version is None:
+                return None
+            parts.append(("catalog", arg.version))
+            continue
+        try:
+            hash(arg)
+        except TypeError:
+            return None
+        parts.append(arg)
+    for item in sorted(kwargs.items()):
+        try:
+            hash(item)
+        except TypeError:
+            return None
+        parts.append(item)
+    return tuple(parts)
+
+
+def memoized(method):
+    # for BookAnalyticsService methods, uses self.cache when there is one
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, "cache", None)
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        key = make_key(method.__name__, args, kwargs)
+        if key is None:
+            cache.uncacheable += 1
+            return method(self, *args, **kwargs)
+
+        result = cache.get_or_compute(key, lambda: method(self, *args, **kwargs))
+        # hand out a copy so a caller editing the result can't poison the cache
+        return fresh_copy(result)
+
+    return wrapper
+
+
+def fresh_copy(value):
+    # copies the containers all the way down (group_by's dict of dicts, ...),
+    # what's in them is shared: numbers and strings can't change, and Books
+    # are the catalog's own objects, not the cache's
+    if isinstance(value, dict):
+        return {key: fresh_copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fresh_copy(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(fresh_copy(item) for item in value)
+    return value
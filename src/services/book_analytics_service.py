@@ -1,75 +1,213 @@
+from datetime import datetime
+from typing import Callable, Iterable
 import numpy as np
 from src.domain.book import Book
+from src.repositories.book_snapshot import BookSnapshot
+from src.repositories.instrumentation import INSTRUMENTATION
+from src.services.analytics_cache import AnalyticsCache, memoized
+from src.services.book_frame import BookFrame
+from src.services.streaming_stats import StreamingStats
+from src.services.time_windows import histogram, in_window, rolling_counts, this_year, to_datetime64
 
 # Ground rules for numpy
 # 1. Keep numpy in service layer ONLY
 #   - if you see numpy imports anywhere else, this is a design smell!
 # 2. Notice how methods take in books, and return normal data types, NOT ndarrays
 #   - this service and numpy are ISOLATED, this will keep our functions and tests clean
+# 3. Every method also takes a BookFrame (columnar view of the books)
+#   - build it once per catalog version with get_frame and reuse it for every query
+# 4. Pass an AnalyticsCache to memoize results per catalog version
+#   - only calls made with a versioned BookFrame are cached
 
 class BookAnalyticsService:
 
-    def average_price(self, books: list[Book]) -> float:
-        prices = np.array([b.price_usd for b in books], dtype="float")
-        return float(prices.mean())
+    def __init__(self, cache: AnalyticsCache | None = None):
+        self._frame: BookFrame | None = None
+        self.cache = cache
+
+    def get_frame(self, books: list[Book] | BookSnapshot | Callable, version: int | None = None) -> BookFrame:
+        # reuse the last frame while the catalog version hasn't moved
+        # version=None means "don't know", so we have to rebuild
+        # books can also be a function returning them, only called when we do rebuild
+        if version is not None and self._frame is not None and self._frame.version == version:
+            return self._frame
+        if callable(books):
+            books = books()
+        # with instrumentation on, building the arrays shows up apart from loading the books
+        with INSTRUMENTATION.span("BookFrame.build"):
+            if isinstance(books, BookSnapshot):
+                self._frame = BookFrame.from_snapshot(books, version)
+            else:
+                self._frame = BookFrame(books, version)
+        return self._frame
+
+    @memoized
+    def average_price(self, books: list[Book] | BookFrame) -> float:
+        frame = self._as_frame(books)
+        return float(np.nanmean(frame.price))
 
     # changed min_ratings default to 500 because max generated value is 1000
-    def top_rated(self, books: list[Book], min_ratings: int = 500, limit: int = 10) -> list[Book]:
-        ratings = np.array([b.average_rating for b in books])
-        counts = np.array([b.ratings_count for b in books])
-
-        # what we have now:
-        # books -> book objects
-        # ratings -> numbers
-        # counts -> numbers
-        # filtered books contains all books that have at least 1000 ratings
-        mask = counts >= min_ratings
-        filtered_books = np.array(books)[mask]
-
-        # now scores is only the ratings for the filtered scores (over 1000 ratings)
-        scores = ratings[mask]
-        sorted_idx = np.argsort(scores)[::-1]
-        return filtered_books[sorted_idx].tolist()[:limit]
+    # bayesian=True ranks by the Bayesian average from the requirements doc:
+    #   (count / (count + m)) * rating + (m / (count + m)) * global_average
+    # ties are broken by ratings_count (desc) and then book_id so the order is stable
+    # global_average: the prior for the Bayesian average, defaults to this
+    # catalog's, a shard passes the whole catalog's
+    @memoized
+    def top_rated(self, books: list[Book] | BookFrame, min_ratings: int = 500, limit: int = 10,
+                  bayesian: bool = False, m: int = 50, global_average: float | None = None) -> list[Book]:
+        frame = self._as_frame(books)
+
+        rated = ~np.isnan(frame.rating)
+        scores = frame.rating
+        if bayesian:
+            scores = self.bayesian_average(frame, m, global_average)
+
+        # indexes of the rated books that have at least min_ratings ratings
+        qualifying = np.flatnonzero(rated & (frame.ratings_count >= min_ratings))
+        if limit <= 0 or len(qualifying) == 0:
+            return []
+
+        # partial selection: find the limit-th best score in O(N), then keep
+        # everything at least that good (ties included) and only sort those
+        candidates = qualifying
+        if len(qualifying) > limit:
+            kth = -np.partition(-scores[qualifying], limit - 1)[limit - 1]
+            candidates = qualifying[scores[qualifying] >= kth]
+
+        ranked = sorted(candidates.tolist(), key=lambda i: (
+            -scores[i], -frame.ratings_count[i], frame.book_ids[i]))
+        return frame.take(ranked[:limit])
+
+    def bayesian_average(self, books: list[Book] | BookFrame, m: int = 50,
+                         global_average: float | None = None) -> np.ndarray:
+        frame = self._as_frame(books)
+        if global_average is None:
+            global_average = np.nanmean(frame.rating)
+        counts = frame.ratings_count
+        return (counts / (counts + m)) * frame.rating + (m / (counts + m)) * global_average
 
     # value score = rating * log(ratings_count) / price
-    def value_scores(self, books: list[Book]) -> dict[str, float]:
-        ratings = np.array([b.average_rating for b in books])
-        counts = np.array([b.ratings_count for b in books])
-        prices = np.array([b.price_usd for b in books], dtype="float")
+    @memoized
+    def value_scores(self, books: list[Book] | BookFrame) -> dict[str, float]:
+        frame = self._as_frame(books)
 
-        scores = (ratings * np.log1p(counts)) / prices
+        scores = (frame.rating * np.log1p(frame.ratings_count)) / frame.price
 
         return {
             # zip iterates over both lists in parallel, so indexes are synced
-            # zip will stop automatically if one list is shorted
             # if same key appears more than once, later entries override earlier ones
-            book.book_id: float(score) 
-            for book, score in zip (books, scores)
+            book_id: score
+            for book_id, score in zip(frame.book_ids, scores.tolist())
         }
 
-    def get_medians_by_genre(self, books: list[Book]) -> dict[str, float]:
-
-        genres = set(book.genre for book in books)
-        medians_by_genre: dict[str, float] = {}
-
-        for genre in genres:
-            prices = np.array([b.price_usd for b in books if b.genre == genre], dtype="float")
-            mean = float(prices.mean())
-            medians_by_genre[genre] = mean
-
-        return medians_by_genre
-
-    def most_popular_genre(self, books: list[Book]) -> str:
-        checkouts_by_genre: dict[str, int] = {}
-        checkouts = np.array([b.last_checkout for b in books])
-
-        mask = np.char.startswith(checkouts, "2026")
-        filtered_books = np.array(books)[mask]
+    @memoized
+    def get_medians_by_genre(self, books: list[Book] | BookFrame) -> dict[str, float]:
+        stats = self.group_by(books, "genre", "price", percentiles=())
+        return {genre: row["median"] for genre, row in stats.items()}
+
+    @memoized
+    def group_by(self, books: list[Book] | BookFrame, key: str = "genre", value: str = "price",
+                 percentiles: tuple[float, ...] = (25, 75)) -> dict[str, dict[str, float]]:
+        # count/mean/median/min/max (+ any percentiles) of a numeric column per group
+        # key: genre, publisher, format, language or decade
+        # value: price, rating, ratings_count, page_count, sales or publication_year
+        #
+        # one lexsort by (group, value) does all the work: groups become contiguous
+        # runs and every order statistic is just an index into its run, so this is
+        # O(N log N) no matter how many groups there are
+        frame = self._as_frame(books)
+        codes, labels = frame.categorical(key)
+        values = frame.numeric(value)
+
+        # books missing the key or the value don't belong to any group
+        keep = (codes >= 0) & ~np.isnan(values)
+        codes, values = codes[keep], values[keep]
+        if len(codes) == 0:
+            return {}
+
+        order = np.lexsort((values, codes))
+        codes, values = codes[order], values[order]
+
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+        counts = np.diff(np.append(starts, len(codes)))
+        ends = starts + counts - 1
+
+        columns = {
+            "count": counts,
+            "mean": np.add.reduceat(values, starts) / counts,
+            "median": self._run_percentile(values, starts, counts, 50),
+            "min": values[starts],
+            "max": values[ends],
+        }
+        for q in percentiles:
+            columns[f"p{q:g}"] = self._run_percentile(values, starts, counts, q)
 
-        for book in filtered_books:
-            if book.genre in checkouts_by_genre:
-                checkouts_by_genre[book.genre] += 1
-            else:
-                checkouts_by_genre[book.genre] = 1
+        rows = {name: column.tolist() for name, column in columns.items()}
+        return {
+            labels[code]: {name: rows[name][i] for name in rows}
+            for i, code in enumerate(codes[starts].tolist())
+        }
 
-        return max(checkouts_by_genre.keys(), key = lambda genre: checkouts_by_genre[genre])
+    # checkout analytics: windows are start <= last_checkout < end (datetimes,
+    # ISO strings or datetime64, None = open ended), see time_windows for
+    # the usual ones (calendar_year, calendar_month, last_days)
+    def most_popular_genre(self, books: list[Book] | BookFrame, start=None, end=None,
+                           now: datetime | None = None) -> str:
+        # defaults to the calendar year of now
+        if start is None and end is None:
+            start, end = this_year(now)
+        checkouts = self.checkouts_by_genre(books, to_datetime64(start), to_datetime64(end))
+        if not checkouts:
+            raise ValueError("No checkouts found in this window")
+        return max(checkouts, key=checkouts.get)
+
+    @memoized
+    def checkouts_by_genre(self, books: list[Book] | BookFrame, start=None, end=None) -> dict[str, int]:
+        frame = self._as_frame(books)
+        mask = in_window(frame.last_checkout, start, end) & (frame.genre >= 0)
+        counts = np.bincount(frame.genre[mask], minlength=len(frame.genre_categories))
+        return {genre: int(n) for genre, n in zip(frame.genre_categories, counts.tolist()) if n}
+
+    @memoized
+    def checkout_histogram(self, books: list[Book] | BookFrame, freq: str = "month",
+                           start=None, end=None, key: str | None = None) -> dict:
+        # checkouts per day/week/month, optionally split by a categorical
+        # column: {"2026-01": 12, ...} or {"2026-01": {"Fantasy": 7, ...}, ...}
+        frame = self._as_frame(books)
+        if key is None:
+            return histogram(frame.last_checkout, freq, start, end)
+        codes, labels = frame.categorical(key)
+        return histogram(frame.last_checkout, freq, start, end, codes, labels)
+
+    @memoized
+    def rolling_checkouts(self, books: list[Book] | BookFrame, days: int = 30,
+                          start=None, end=None) -> dict[str, int]:
+        # {day: checkouts in the `days` days up to and including it}
+        frame = self._as_frame(books)
+        return rolling_counts(frame.last_checkout, days, start, end)
+
+    def summarize_stream(self, chunks: Iterable[list[Book] | BookFrame], value: str = "price",
+                         key: str | None = "genre", quantiles: tuple[float, ...] = (25, 50, 75),
+                         sample_size: int = 10_000) -> dict:
+        # for catalogs that don't fit in memory: feed it repo.iter_chunks() and
+        # only one chunk is ever turned into columns at a time
+        # count/mean/min/max/group counts are exact, quantiles are approximate
+        stats = StreamingStats(value, key, sample_size)
+        for chunk in chunks:
+            stats.update(chunk)
+        return stats.result(quantiles)
+
+    @staticmethod
+    def _run_percentile(values: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+        # linear interpolation between closest ranks (same as np.percentile's default),
+        # for every sorted run at once
+        position = starts + (counts - 1) * (q / 100)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+    def _as_frame(self, books: list[Book] | BookFrame) -> BookFrame:
+        if isinstance(books, BookFrame):
+            return books
+        with INSTRUMENTATION.span("BookFrame.build"):
+            return BookFrame(books)
@@ -0,0 +1,137 @@
+import numpy as np
+from src.domain.book import Book
+from src.repositories.book_snapshot import INT_MISSING, BookSnapshot
+
+# Columnar (struct-of-arrays) view of the catalog for the analytics service.
+# Building it walks every Book once; after that every query is pure numpy.
+# Same ground rules as book_analytics_service: numpy stays in the service layer
+# and nothing outside of it should ever see a BookFrame's arrays.
+
+
+def encode_categories(values: list) -> tuple[np.ndarray, list[str]]:
+    # dictionary-encode a low-cardinality column, None -> -1
+    # categories keep first-seen order so results come out in catalog order
+    mapping: dict[str, int] = {}
+    codes = np.fromiter(
+        (-1 if v is None else mapping.setdefault(v, len(mapping)) for v in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    return codes, list(mapping)
+
+
+def parse_datetimes(values: list) -> np.ndarray:
+    # ISO strings -> datetime64[us], None/""/garbage -> NaT
+    cleaned = ["NaT" if not v else v for v in values]
+    try:
+        return np.array(cleaned, dtype="datetime64[us]")
+    except ValueError:
+        parsed = np.empty(len(cleaned), dtype="datetime64[us]")
+        for i, v in enumerate(cleaned):
+            try:
+                parsed[i] = np.datetime64(v, "us")
+            except ValueError:
+                parsed[i] = np.datetime64("NaT")
+        return parsed
+
+
+def to_float(values: list) -> np.ndarray:
+    # None -> NaN
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def map_column(snapshot: BookSnapshot, name: str) -> np.ndarray:
+    # read-only view onto the snapshot file, pages are loaded on first touch
+    # and shared with every other process mapping the same snapshot
+    if len(snapshot) == 0:
+        return np.empty(0, dtype=snapshot.column_dtype(name))
+    return np.memmap(snapshot.column_path(name), dtype=snapshot.column_dtype(name),
+                     mode="r", shape=(len(snapshot),))
+
+
+def int_column(snapshot: BookSnapshot, name: str, missing: float) -> np.ndarray:
+    values = map_column(snapshot, name)
+    return np.where(values == INT_MISSING, missing, values)
+
+
+class BookFrame:
+    def __init__(self, books: list[Book], version: int | None = None):
+        self.books = books
+        # set instead of books when the frame is mapped from a snapshot
+        self.snapshot: BookSnapshot | None = None
+        # catalog version this frame was built from, None = unknown
+        self.version = version
+
+        self.book_ids = [b.book_id for b in books]
+        self.price = to_float([b.price_usd for b in books])
+        self.rating = to_float([b.average_rating for b in books])
+        self.ratings_count = np.array([b.ratings_count or 0 for b in books], dtype=np.int64)
+        self.page_count = to_float([b.page_count for b in books])
+        self.sales = to_float([b.sales_millions for b in books])
+        self.publication_year = to_float([b.publication_year for b in books])
+        self.last_checkout = parse_datetimes([b.last_checkout for b in books])
+
+        self.genre, self.genre_categories = encode_categories([b.genre for b in books])
+        self.publisher, self.publisher_categories = encode_categories([b.publisher for b in books])
+        self.format, self.format_categories = encode_categories([b.format for b in books])
+        self.language, self.language_categories = encode_categories([b.language for b in books])
+
+    @classmethod
+    def from_snapshot(cls, snapshot: BookSnapshot, version: int | None = None) -> "BookFrame":
+        # no Books and no parsing: the numeric and categorical columns are
+        # np.memmap views of the snapshot files, only book ids are decoded
+        frame = cls.__new__(cls)
+        frame.books = None
+        frame.snapshot = snapshot
+        frame.version = version
+
+        frame.book_ids = snapshot.strings("book_id")
+        frame.price = map_column(snapshot, "price_usd")
+        frame.rating = map_column(snapshot, "average_rating")
+        frame.ratings_count = int_column(snapshot, "ratings_count", 0).astype(np.int64)
+        frame.page_count = int_column(snapshot, "page_count", np.nan)
+        frame.sales = map_column(snapshot, "sales_millions")
+        frame.publication_year = int_column(snapshot, "publication_year", np.nan)
+        # INT64_MIN is NaT, so the microsecond column is already a datetime column
+        frame.last_checkout = map_column(snapshot, "last_checkout_us").view("datetime64[us]")
+
+        for name, column in (("genre", "genre"), ("publisher", "publisher"),
+                             ("format", "format"), ("language", "language")):
+            setattr(frame, name, map_column(snapshot, column))
+            setattr(frame, f"{name}_categories", snapshot.categories[column])
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.book_ids)
+
+    def take(self, idx: np.ndarray) -> list[Book]:
+        if self.snapshot is not None:
+            return self.snapshot.rows([int(i) for i in idx])
+        return [self.books[i] for i in idx]
+
+    def categorical(self, key: str) -> tuple[np.ndarray, list[str]]:
+        # (codes, labels) for a column we can group by, code -1 = missing
+        if key == "decade":
+            return self._decades()
+        if key not in CATEGORICAL_COLUMNS:
+            raise ValueError(f"Can't group by {key}, expected one of {', '.join(GROUP_KEYS)}")
+        return getattr(self, key), getattr(self, f"{key}_categories")
+
+    def numeric(self, name: str) -> np.ndarray:
+        if name not in NUMERIC_COLUMNS:
+            raise ValueError(f"Unknown numeric column {name}, expected one of {', '.join(NUMERIC_COLUMNS)}")
+        return getattr(self, name).astype(np.float64, copy=False)
+
+    def _decades(self) -> tuple[np.ndarray, list[str]]:
+        known = ~np.isnan(self.publication_year)
+        decades = (self.publication_year[known] // 10 * 10).astype(np.int64)
+        values, inverse = np.unique(decades, return_inverse=True)
+
+        codes = np.full(len(self), -1, dtype=np.int32)
+        codes[known] = inverse
+        return codes, [f"{d}s" for d in values.tolist()]
+
+
+CATEGORICAL_COLUMNS = ("genre", "publisher", "format", "language")
+GROUP_KEYS = CATEGORICAL_COLUMNS + ("decade",)
+NUMERIC_COLUMNS = ("price", "rating", "ratings_count", "page_count", "sales", "publication_year")
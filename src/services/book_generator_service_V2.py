@@ -1,140 +1,260 @@
-import json
-import random
-import uuid
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import numpy as np
-from src.domain.book import Book
-
-def generate_books_json(filename="books.json", count=500, seed=None):
-    rng = np.random.default_rng(seed)
-    random.seed(seed)
-
-    genres = [
-        "Fantasy",
-        "Sci-Fi",
-        "Non-Fiction",
-        "Mystery",
-        "Romance",
-        "Technology",
-        "History",
-    ]
-    # make Fantasy and Sci-Fi more popular
-    genre_weights = np.array([0.28, 0.24, 0.12, 0.10, 0.08, 0.10, 0.08])
-    genre_weights = genre_weights / genre_weights.sum()
-
-    publishers = [
-        "North Star Press",
-        "Emerald House",
-        "Atlas Publishing",
-        "Blue River Books",
+
+GENRES = [
+    "Fantasy",
+    "Sci-Fi",
+    "Non-Fiction",
+    "Mystery",
+    "Romance",
+    "Technology",
+    "History",
+]
+# make Fantasy and Sci-Fi more popular
+GENRE_WEIGHTS = np.array([0.28, 0.24, 0.12, 0.10, 0.08, 0.10, 0.08])
+GENRE_WEIGHTS = GENRE_WEIGHTS / GENRE_WEIGHTS.sum()
+
+PUBLISHERS = [
+    "North Star Press",
+    "Emerald House",
+    "Atlas Publishing",
+    "Blue River Books",
+]
+
+FORMATS = ["Hardcover", "Paperback", "Ebook", "Audiobook"]
+
+# Publication year distribution: fewer before 1950, increasing after 1950
+YEARS = np.arange(1850, 2026)
+YEAR_WEIGHTS = np.where(YEARS <= 1950, 0.2, 1.0 + (YEARS - 1950) / (2025 - 1950))
+YEAR_WEIGHTS = YEAR_WEIGHTS / YEAR_WEIGHTS.sum()
+
+# make popularity multipliers from genre_weights (centered on 1.0)
+# positive values boost ratings_count and sales for popular genres
+# strengthen the effect so popular genres (Fantasy, Sci‑Fi) get noticeably higher counts
+GENRE_POP_MULT = 1.0 + (GENRE_WEIGHTS - GENRE_WEIGHTS.mean()) * 4.0
+# stronger per-genre rating bias so popular genres tend to be rated higher
+GENRE_RATING_BIAS = (GENRE_WEIGHTS - GENRE_WEIGHTS.mean()) * 1.2
+
+# Correlated latent variables:
+# z0 -> price latent, z1 -> average_rating latent, z2 -> ratings_count latent
+LATENT_COV = np.array([[1.0, 0.7, 0.3], [0.7, 1.0, 0.6], [0.3, 0.6, 1.0]])
+
+# sales used to be scaled by the largest log1p(ratings_count) in the whole
+# catalog, which a chunked generator can't know up front. The ratings_count
+# latent is a standard normal, so use its +4 sigma value instead.
+REFERENCE_LOG_COUNT = 4.5 + 0.9 * 4.0
+
+# each record is rendered straight from column lists, no dicts or Book objects
+RECORD_TEMPLATE = (
+    '{{"book_id": "{}", "title": "Book Title {}", "author": "Author {}", '
+    '"genre": "{}", "publication_year": {}, "page_count": {}, '
+    '"average_rating": {}, "ratings_count": {}, "price_usd": {}, '
+    '"publisher": "{}", "language": "English", "format": "{}", '
+    '"in_print": {}, "sales_millions": {}, "last_checkout": "{}", '
+    '"available": {}}}'
+)
+
+
+def generate_books_json(filename="books.json", count=500, seed=None,
+                        chunk_size=100_000, now: datetime | None = None,
+                        workers: int = 1, keep_shards: bool = False) -> list[str]:
+    # Streams count synthetic books to filename, chunk_size rows at a time, so
+    # memory stays flat no matter how big the catalog is. Every column of a
+    # chunk is drawn in one numpy call.
+    #
+    # .jsonl files get one record per line, anything else a JSON array (still
+    # one record per line so it stays diffable).
+    #
+    # Each chunk draws from its own RNG substream spawned from seed, so chunks
+    # can be generated in any order by any number of worker processes and the
+    # output for a given seed, count, chunk_size and now is byte-for-byte the
+    # same whatever workers is.
+    #
+    # With workers > 1 every chunk is written to a shard next to filename and
+    # the shards are concatenated in order. keep_shards=True skips that and
+    # leaves a sharded catalog of JSONL files instead.
+    #
+    # Returns the paths written.
+    now = now or datetime.now()
+    # pin the entropy so seed=None still gives one consistent set of substreams
+    entropy = np.random.SeedSequence(seed).entropy
+    jsonl = keep_shards or str(filename).endswith(".jsonl")
+    chunks = [(start, min(chunk_size, count - start)) for start in range(0, count, chunk_size)]
+
+    if workers <= 1 and not keep_shards:
+        with open(filename, "w", encoding="utf-8") as f:
+            _write_catalog(f, (
+                render_records(generate_book_columns(
+                    chunk_rng(entropy, start // chunk_size), start, size, now))
+                for start, size in chunks), jsonl)
+        return [str(filename)]
+
+    tasks = [
+        (entropy, start // chunk_size, start, size, now, shard_path(filename, i), jsonl)
+        for i, (start, size) in enumerate(chunks)
     ]
+    with ProcessPoolExecutor(max_workers=max(workers, 1)) as pool:
+        shards = list(pool.map(_generate_shard, tasks))
+
+    if keep_shards:
+        return shards
+
+    with open(filename, "w", encoding="utf-8") as f:
+        if not jsonl:
+            f.write("[\n")
+        for i, shard in enumerate(shards):
+            if i and not jsonl:
+                f.write(",\n")
+            with open(shard, "r", encoding="utf-8") as part:
+                shutil.copyfileobj(part, f)
+            os.remove(shard)
+        if not jsonl:
+            f.write("\n]\n")
+    return [str(filename)]
+
+
+def chunk_rng(entropy: int, chunk_index: int) -> np.random.Generator:
+    # same as SeedSequence(entropy).spawn(n)[chunk_index], without having to spawn n
+    return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(chunk_index,)))
+
 
-    formats = ["Hardcover", "Paperback", "Ebook", "Audiobook"]
+def shard_path(filename, index: int) -> str:
+    root, _ = os.path.splitext(str(filename))
+    return f"{root}.part-{index:05d}.jsonl"
 
-    # Publication year distribution: fewer before 1950, increasing after 1950
-    years = np.arange(1850, 2026)
-    year_weights = np.where(years <= 1950, 0.2, 1.0 + (years - 1950) / (2025 - 1950))
-    year_weights = year_weights / year_weights.sum()
 
-    # make popularity multipliers from genre_weights (centered on 1.0)
-    # positive values boost ratings_count and sales for popular genres
-    # strengthen the effect so popular genres (Fantasy, Sci‑Fi) get noticeably higher counts
-    genre_pop_mult = 1.0 + (genre_weights - genre_weights.mean()) * 4.0
-    # stronger per-genre rating bias so popular genres tend to be rated higher
-    genre_rating_bias = (genre_weights - genre_weights.mean()) * 1.2
+def _generate_shard(task: tuple) -> str:
+    # runs in a worker process, writes one chunk and hands back its path
+    entropy, chunk_index, start, size, now, path, jsonl = task
+    lines = render_records(generate_book_columns(chunk_rng(entropy, chunk_index), start, size, now))
+    with open(path, "w", encoding="utf-8") as f:
+        if jsonl:
+            f.write("\n".join(lines))
+            f.write("\n")
+        else:
+            # the body of a JSON array, the parent adds the brackets and commas
+            f.write(",\n".join(lines))
+    return path
 
-    # Build correlated latent variables:
-    # z0 -> price latent, z1 -> average_rating latent, z2 -> ratings_count latent
-    cov = np.array([[1.0, 0.7, 0.3], [0.7, 1.0, 0.6], [0.3, 0.6, 1.0]])
-    z = rng.multivariate_normal(mean=np.zeros(3), cov=cov, size=count)
 
+def _write_catalog(f, chunks, jsonl: bool) -> None:
+    if not jsonl:
+        f.write("[\n")
+
+    for i, lines in enumerate(chunks):
+        if jsonl:
+            f.write("\n".join(lines))
+            f.write("\n")
+        else:
+            if i:
+                f.write(",\n")
+            f.write(",\n".join(lines))
+
+    if not jsonl:
+        f.write("\n]\n")
+
+
+def generate_book_columns(rng: np.random.Generator, start: int, size: int,
+                          now: datetime) -> dict[str, np.ndarray]:
+    # one chunk of books as columns, rows are numbered from start + 1
+    z = rng.multivariate_normal(mean=np.zeros(3), cov=LATENT_COV, size=size)
     price_raw = z[:, 0]
     rating_raw = z[:, 1]
     rc_raw = z[:, 2]
 
+    # the latents are already standard normal, so no per-chunk normalization
     # Transform rating_raw -> average_rating in [1.0, 5.0] (target ~ mean 3.2, sd ~0.6)
-    rating = (rating_raw - rating_raw.mean()) / (rating_raw.std() + 1e-9)
-    average_rating = np.clip(np.round(rating * 0.6 + 3.2, 2), 1.0, 5.0)
-
+    average_rating = np.clip(np.round(rating_raw * 0.6 + 3.2, 2), 1.0, 5.0)
     # Transform price_raw -> price_usd (log-scale so higher latent => substantially higher price)
-    price_norm = (price_raw - price_raw.mean()) / (price_raw.std() + 1e-9)
-    price_usd = np.round(np.clip(np.exp(price_norm * 0.45 + 2.2), 3.99, 299.99), 2)
-
+    price_usd = np.round(np.clip(np.exp(price_raw * 0.45 + 2.2), 3.99, 299.99), 2)
     # Transform rc_raw -> ratings_count (positive, heavy-tail via exp)
-    rc_norm = (rc_raw - rc_raw.mean()) / (rc_raw.std() + 1e-9)
-    ratings_count = np.round(np.clip(np.exp(rc_norm * 0.9 + 4.5), 0, 200000)).astype(
-        int
-    )
-
-    # sales_millions tends to be higher with average_rating + ratings_count
-    # combine rating and log1p(ratings_count), then scale and add some noise
-    score = (average_rating / 5.0) * 0.6 + (
-        np.log1p(ratings_count) / np.log1p(ratings_count).max()
-    ) * 0.4
-    sales_loc = score * 10.0  # base scale so typical values are in 0..10 range
+    ratings_count = np.round(np.clip(np.exp(rc_raw * 0.9 + 4.5), 0, 200000))
+
+    pub_year = rng.choice(YEARS, size=size, p=YEAR_WEIGHTS)
+    random_days = rng.integers(0, 183, size=size)
+    random_seconds = rng.integers(0, 80000, size=size)
+    genre_idx = rng.choice(len(GENRES), size=size, p=GENRE_WEIGHTS)
+
+    # apply the popularity multiplier to ratings_count and the rating bias to the rating
+    adj_ratings_count = np.round(
+        np.clip(ratings_count * GENRE_POP_MULT[genre_idx], 0, 200000)).astype(np.int64)
+    rating_adj = np.clip(np.round(average_rating + GENRE_RATING_BIAS[genre_idx], 2), 1.0, 5.0)
+
+    # sales tends to be higher with average_rating + ratings_count,
+    # rating => ~0.6 of sales influence
+    score_adj = (rating_adj / 5.0) * 0.6 + (
+        np.log1p(adj_ratings_count) / REFERENCE_LOG_COUNT) * 0.4
     sales_millions = np.round(
-        np.clip(rng.normal(loc=sales_loc, scale=1.5), 0.01, 200.0), 2
-    )
+        np.clip(rng.normal(loc=score_adj * 10.0, scale=1.5), 0.01, 200.0), 2)
 
-    books = []
-    now = datetime.now()
-    six_months_ago = now - timedelta(days=182)
+    six_months_ago = np.datetime64(now - timedelta(days=182), "us")
+    last_checkout = (six_months_ago
+                     + random_days.astype("timedelta64[D]")
+                     + random_seconds.astype("timedelta64[s]"))
 
-    for i in range(1, count + 1):
-        # publication year from weighted distribution
-        pub_year = int(rng.choice(years, p=year_weights))
+    return {
+        "book_id": random_uuids(rng, size),
+        "number": np.arange(start + 1, start + size + 1),
+        "author": rng.integers(1, 80, size=size),
+        "genre": np.array(GENRES)[genre_idx],
+        "publication_year": pub_year,
+        "page_count": rng.integers(80, 1200, size=size),
+        "average_rating": rating_adj,
+        "ratings_count": adj_ratings_count,
+        "price_usd": price_usd,
+        "publisher": np.array(PUBLISHERS)[rng.integers(0, len(PUBLISHERS), size=size)],
+        "format": np.array(FORMATS)[rng.integers(0, len(FORMATS), size=size)],
+        "in_print": rng.random(size) < 0.8,
+        "sales_millions": sales_millions,
+        "last_checkout": np.datetime_as_string(last_checkout, unit="us"),
+        "available": rng.random(size) < 0.5,
+    }
 
-        random_days = int(rng.integers(0, 183))
-        random_seconds = int(rng.integers(0, 80000))
-        last_checkout = six_months_ago + timedelta(
-            days=random_days, seconds=random_seconds
-        )
 
-        idx = i - 1
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+# where the 32 hex digits go in the 36 character 8-4-4-4-12 form
+UUID_DIGIT_POSITIONS = np.array([i for i in range(36) if i not in (8, 13, 18, 23)])
 
-        # choose genre and apply stronger popularity multiplier to ratings_count and sales
-        genre_choice = str(rng.choice(genres, p=genre_weights))
-        gidx = genres.index(genre_choice)
 
-        adj_ratings_count = int(
-            np.round(np.clip(ratings_count[idx] * genre_pop_mult[gidx], 0, 200000))
-        )
-        # compute sales based on the adjusted rating and adjusted ratings_count
-        # keep the same weighting so rating => ~0.6 of sales influence
-        rating_adj = float(
-            np.clip(round(average_rating[idx] + genre_rating_bias[gidx], 2), 1.0, 5.0)
-        )
+def random_uuids(rng: np.random.Generator, size: int) -> np.ndarray:
+    # version 4 UUIDs drawn from rng instead of os.urandom, so ids are reproducible,
+    # formatted as hex strings for the whole chunk at once (uuid.UUID per row is
+    # slower than everything else in the generator put together)
+    raw = np.frombuffer(rng.bytes(16 * size), dtype=np.uint8).reshape(size, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
 
-        score_adj = (rating_adj / 5.0) * 0.6 + (
-            np.log1p(adj_ratings_count) / np.log1p(ratings_count).max()
-        ) * 0.4
-        adj_sales_millions = float(
-            np.round(
-                np.clip(rng.normal(loc=score_adj * 10.0, scale=1.5), 0.01, 200.0), 2
-            )
-        )
+    nibbles = np.empty((size, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = raw >> 4
+    nibbles[:, 1::2] = raw & 0x0F
 
-        # apply a small genre-specific bias to average_rating so popularity shows in Bayesian avg
-        # rating_adj already computed above for sales calculation
-        books.append(
-            Book(
-                book_id = str(uuid.uuid4()),
-                title = f"Book Title {i}",
-                author = f"Author {rng.integers(1, 80)}",
-                genre = genre_choice,
-                publication_year = pub_year,
-                page_count = int(rng.integers(80, 1200)),
-                average_rating = rating_adj,
-                ratings_count = int(adj_ratings_count),
-                price_usd = float(price_usd[idx]),
-                publisher = random.choice(publishers),
-                language = "English",
-                format = random.choice(formats),
-                in_print = bool(rng.choice([True, True, True, True, False])),
-                sales_millions = float(adj_sales_millions),
-                available = bool(rng.choice([True, False])),
-            )
-        )
+    text = np.full((size, 36), ord("-"), dtype=np.uint8)
+    text[:, UUID_DIGIT_POSITIONS] = HEX_DIGITS[nibbles]
+    return text.view("S36").ravel().astype("U36")
 
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(books, f, indent=2)
+
+def render_records(columns: dict[str, np.ndarray]) -> list[str]:
+    as_json_bool = {True: "true", False: "false"}
+    return [
+        RECORD_TEMPLATE.format(*row)
+        for row in zip(
+            columns["book_id"].tolist(),
+            columns["number"].tolist(),
+            columns["author"].tolist(),
+            columns["genre"].tolist(),
+            columns["publication_year"].tolist(),
+            columns["page_count"].tolist(),
+            columns["average_rating"].tolist(),
+            columns["ratings_count"].tolist(),
+            columns["price_usd"].tolist(),
+            columns["publisher"].tolist(),
+            columns["format"].tolist(),
+            map(as_json_bool.get, columns["in_print"].tolist()),
+            columns["sales_millions"].tolist(),
+            columns["last_checkout"].tolist(),
+            map(as_json_bool.get, columns["available"].tolist()),
+        )
+    ]
@@ -0,0 +1,362 @@
+import operator
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+import numpy as np
+from src.domain.book import Book
+from src.repositories.book_index import normalize
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_frame import CATEGORICAL_COLUMNS, BookFrame
+from src.services.book_service import BookService
+
+# Small query language over the catalog:
+#
+#   query = (BookQuery()
+#            .where("genre", "==", "Fantasy")
+#            .where("format", "==", "Paperback")
+#            .where("price", "<", 20)
+#            .where("publication_year", ">", 1990)
+#            .order_by("rating", descending=True)
+#            .limit(10))
+#   books = BookQueryService(book_service).run(query)
+#
+# Predicates are ANDed. Each one is compiled to a numpy boolean mask over the
+# BookFrame, unless a repository index can answer one of them with only a
+# few candidates, then just those books are filtered in Python.
+# explain(query) shows which of the two was picked and why.
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+SET_OPERATORS = ("in", "between", "prefix")
+
+# query field -> BookFrame column, Book attribute names work too
+NUMERIC_FIELDS = {
+    "price": "price", "price_usd": "price",
+    "rating": "rating", "average_rating": "rating",
+    "ratings_count": "ratings_count",
+    "page_count": "page_count",
+    "sales": "sales", "sales_millions": "sales",
+    "publication_year": "publication_year",
+}
+# only in the repository (not in the frame), so they need an index
+TEXT_FIELDS = ("book_id", "title", "author")
+DATETIME_FIELDS = ("last_checkout",)
+
+# query field -> Book attribute, for filtering and sorting Book objects
+BOOK_ATTRIBUTES = {
+    "price": "price_usd", "rating": "average_rating", "sales": "sales_millions",
+}
+
+# an index lookup wins if it leaves at most this many books to check in
+# Python (a few ms), past that masking the frame is cheaper
+INDEX_MAX_ROWS = 5_000
+
+
+class QueryError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Predicate:
+    field: str
+    op: str
+    value: object
+
+    def __str__(self) -> str:
+        return f"{self.field} {self.op} {self.value!r}"
+
+
+@dataclass(frozen=True)
+class BookQuery:
+    predicates: tuple[Predicate, ...] = ()
+    sort: tuple[tuple[str, bool], ...] = ()
+    max_rows: int | None = None
+
+    # every builder returns a new query, so a base query can be shared
+    def where(self, field: str, op: str, value) -> "BookQuery":
+        predicate = Predicate(field, op, value)
+        _validate(predicate)
+        return replace(self, predicates=self.predicates + (predicate,))
+
+    def order_by(self, field: str, descending: bool = False) -> "BookQuery":
+        if field not in NUMERIC_FIELDS and field not in CATEGORICAL_COLUMNS \
+                and field not in TEXT_FIELDS and field not in DATETIME_FIELDS:
+            raise QueryError(f"Can't sort by {field}")
+        return replace(self, sort=self.sort + ((field, descending),))
+
+    def limit(self, n: int) -> "BookQuery":
+        return replace(self, max_rows=n)
+
+
+@dataclass
+class QueryPlan:
+    strategy: str  # "index" or "scan"
+    steps: list[str] = field(default_factory=list)
+    # index plans only
+    index_predicate: Predicate | None = None
+    candidates: list[Book] | None = None
+
+    def __str__(self) -> str:
+        lines = [f"plan: {self.strategy}"]
+        lines += [f"  {i}. {step}" for i, step in enumerate(self.steps, start=1)]
+        return "\n".join(lines)
+
+
+class BookQueryService:
+    def __init__(self, book_service: BookService, analytics: BookAnalyticsService | None = None):
+        self.book_service = book_service
+        self.analytics = analytics or BookAnalyticsService()
+
+    def run(self, query: BookQuery) -> list[Book]:
+        plan = self.plan(query)
+        if plan.strategy == "index":
+            return self._run_index(query, plan)
+        return self._run_scan(query, self.get_frame())
+
+    def explain(self, query: BookQuery) -> str:
+        return str(self.plan(query))
+
+    def get_frame(self) -> BookFrame:
+        return self.analytics.get_frame(self.book_service.get_analytics_source,
+                                        self.book_service.catalog_version())
+
+    def plan(self, query: BookQuery) -> QueryPlan:
+        # look up every predicate a repository index can answer and keep the
+        # one that leaves the fewest books
+        best: tuple[Predicate, list[Book], str] | None = None
+        for predicate in query.predicates:
+            lookup = self._index_lookup(predicate)
+            if lookup is not None and (best is None or len(lookup[0]) < len(best[1])):
+                best = (predicate, *lookup)
+
+        needs_index = any(p.field in TEXT_FIELDS for p in query.predicates)
+        if best is not None:
+            predicate, candidates, method = best
+            if needs_index or len(candidates) <= INDEX_MAX_ROWS:
+                rest = [p for p in query.predicates if p is not predicate]
+                plan = QueryPlan("index", index_predicate=predicate, candidates=candidates)
+                reason = "only the index has this field" if needs_index else \
+                    f"<= {INDEX_MAX_ROWS} candidates"
+                plan.steps.append(f"index lookup {predicate} via {method} -> "
+                                  f"{len(candidates)} candidates ({reason})")
+                if rest:
+                    plan.steps.append(f"filter {len(candidates)} books in Python: "
+                                      + " AND ".join(map(str, rest)))
+                plan.steps += self._sort_steps(query, python=True)
+                return plan
+
+        if needs_index:
+            fields = ", ".join(p.field for p in query.predicates if p.field in TEXT_FIELDS)
+            raise QueryError(f"No index can answer the predicate on {fields}")
+
+        plan = QueryPlan("scan")
+        if best is not None:
+            plan.steps.append(f"skipped index on {best[0]}: {len(best[1])} candidates "
+                              f"(> {INDEX_MAX_ROWS}) is not selective enough")
+        for predicate in query.predicates:
+            plan.steps.append(f"mask {predicate} ({_column_kind(predicate.field)})")
+        if not query.predicates:
+            plan.steps.append("all books")
+        plan.steps += self._sort_steps(query, python=False)
+        return plan
+
+    def _run_index(self, query: BookQuery, plan: QueryPlan) -> list[Book]:
+        rest = [p for p in query.predicates if p is not plan.index_predicate]
+        books = [b for b in plan.candidates if all(_matches(b, p) for p in rest)]
+        for name, descending in reversed(query.sort):
+            # one stable sort per key, last key first; missing values always go last
+            known = [b for b in books if _book_value(b, name) is not None]
+            unknown = [b for b in books if _book_value(b, name) is None]
+            known.sort(key=lambda b: _book_value(b, name), reverse=descending)
+            books = known + unknown
+        return books if query.max_rows is None else books[:query.max_rows]
+
+    def _run_scan(self, query: BookQuery, frame: BookFrame) -> list[Book]:
+        mask = np.ones(len(frame), dtype=bool)
+        for predicate in query.predicates:
+            mask &= _mask(frame, predicate)
+        rows = np.flatnonzero(mask)
+
+        sort = list(query.sort)
+        if any(name in TEXT_FIELDS for name, _ in sort):
+            # the frame doesn't have titles/authors, sort the Books instead
+            books = frame.take(rows)
+            return self._run_index(BookQuery(sort=query.sort, max_rows=query.max_rows),
+                                   QueryPlan("index", candidates=books))
+
+        if sort:
+            rows = rows[_order(frame, rows, sort, query.max_rows)]
+        if query.max_rows is not None:
+            rows = rows[:query.max_rows]
+        return frame.take(rows)
+
+    def _index_lookup(self, predicate: Predicate) -> tuple[list[Book], str] | None:
+        repo = self.book_service
+        if predicate.field == "book_id" and predicate.op == "==":
+            book = repo.get_by_id(predicate.value)
+            return ([book] if book is not None else []), "get_by_id"
+        if predicate.field == "title" and predicate.op == "prefix":
+            return repo.find_by_title_prefix(predicate.value), "find_by_title_prefix"
+        if predicate.field == "title" and predicate.op == "==":
+            # case-insensitive like the other text predicates
+            books = repo.find_by_title_prefix(predicate.value)
+            return [b for b in books if normalize(b.title) == normalize(predicate.value)], \
+                "find_by_title_prefix"
+        if predicate.field == "author" and predicate.op == "==":
+            return repo.find_by_author(predicate.value), "find_by_author"
+        find_by_genre = getattr(repo.repo, "find_by_genre", None)
+        if predicate.field == "genre" and predicate.op == "==" and find_by_genre is not None:
+            return find_by_genre(predicate.value), "find_by_genre"
+        return None
+
+    @staticmethod
+    def _sort_steps(query: BookQuery, python: bool) -> list[str]:
+        steps = []
+        if query.sort:
+            keys = ", ".join(f"{name} {'desc' if desc else 'asc'}" for name, desc in query.sort)
+            if python or any(name in TEXT_FIELDS for name, _ in query.sort):
+                steps.append(f"sort by {keys} in Python")
+            elif query.max_rows is not None and len(query.sort) == 1:
+                steps.append(f"top {query.max_rows} by {keys} (partial selection)")
+            else:
+                steps.append(f"sort by {keys} (lexsort)")
+        if query.max_rows is not None:
+            steps.append(f"limit {query.max_rows}")
+        return steps
+
+
+def _validate(predicate: Predicate) -> None:
+    name, op, value = predicate.field, predicate.op, predicate.value
+    if op not in OPERATORS and op not in SET_OPERATORS:
+        raise QueryError(f"Unknown operator {op}")
+    if name in TEXT_FIELDS:
+        if op not in ("==", "prefix") or (op == "prefix" and name != "title"):
+            raise QueryError(f"{name} only supports == (and title prefix)")
+    elif name in CATEGORICAL_COLUMNS:
+        if op not in ("==", "!=", "in"):
+            raise QueryError(f"{name} only supports ==, != and in")
+    elif name in NUMERIC_FIELDS or name in DATETIME_FIELDS:
+        if op == "prefix":
+            raise QueryError(f"{name} doesn't support prefix")
+    else:
+        raise QueryError(f"Unknown field {name}")
+    if op == "between" and (not isinstance(value, (tuple, list)) or len(value) != 2):
+        raise QueryError("between takes a (low, high) pair")
+
+
+def _column_kind(name: str) -> str:
+    if name in CATEGORICAL_COLUMNS:
+        return "categorical codes"
+    if name in DATETIME_FIELDS:
+        return "datetime64"
+    return "float64"
+
+
+def _mask(frame: BookFrame, predicate: Predicate) -> np.ndarray:
+    name, op, value = predicate.field, predicate.op, predicate.value
+    if name in CATEGORICAL_COLUMNS:
+        codes, labels = frame.categorical(name)
+        wanted = value if op == "in" else [value]
+        lookup = {label: code for code, label in enumerate(labels)}
+        matched = np.isin(codes, [lookup[v] for v in wanted if v in lookup])
+        # != keeps missing genres out, like the numeric comparisons do with NaN
+        return (~matched & (codes >= 0)) if op == "!=" else matched
+
+    if name in DATETIME_FIELDS:
+        column = frame.last_checkout
+        convert = _datetime64
+    else:
+        column = frame.numeric(NUMERIC_FIELDS[name])
+        convert = float
+
+    if op == "in":
+        return np.isin(column, [convert(v) for v in value])
+    if op == "between":
+        low, high = (convert(v) for v in value)
+        return (column >= low) & (column <= high)
+    mask = OPERATORS[op](column, convert(value))
+    if op == "!=":
+        # NaN/NaT compare unequal to everything, but missing isn't a match
+        mask &= ~(np.isnat(column) if name in DATETIME_FIELDS else np.isnan(column))
+    return mask
+
+
+def _datetime64(value) -> np.datetime64:
+    return np.datetime64(value.isoformat() if isinstance(value, datetime) else value, "us")
+
+
+def _order(frame: BookFrame, rows: np.ndarray, sort: list[tuple[str, bool]],
+           limit: int | None) -> np.ndarray:
+    # positions into rows, in sort order; missing values go last and ties
+    # keep catalog order
+    keys = []
+    for name, descending in sort:
+        if name in CATEGORICAL_COLUMNS:
+            codes, labels = frame.categorical(name)
+            # rank the labels alphabetically so codes sort like the labels do
+            rank = np.empty(len(labels) + 1, dtype=np.float64)
+            rank[np.argsort(np.array(labels, dtype=object), kind="stable")] = np.arange(len(labels))
+            rank[-1] = np.nan
+            values = rank[codes[rows]]
+        elif name in DATETIME_FIELDS:
+            dates = frame.last_checkout[rows]
+            values = np.where(np.isnat(dates), np.nan, dates.astype("int64").astype(np.float64))
+        else:
+            values = frame.numeric(NUMERIC_FIELDS[name])[rows]
+        missing = np.isnan(values)
+        values = np.where(missing, 0.0, -values if descending else values)
+        keys.append((missing, values))
+
+    if limit is not None and len(sort) == 1 and limit < len(rows):
+        # partial selection, then only sort what survived (ties at the cut included)
+        missing, values = keys[0]
+        ranked = np.where(missing, np.inf, values)
+        kth = np.partition(ranked, limit - 1)[limit - 1]
+        keep = np.flatnonzero(ranked <= kth)
+        order = np.lexsort((keep, ranked[keep]))
+        return keep[order]
+
+    # np.lexsort sorts by the last key first
+    columns = [np.arange(len(rows))]
+    for missing, values in reversed(keys):
+        columns += [values, missing]
+    return np.lexsort(columns)
+
+
+def _book_value(book: Book, name: str):
+    value = getattr(book, BOOK_ATTRIBUTES.get(name, name))
+    if name in ("title", "author") and value is not None:
+        return normalize(value)
+    return value
+
+
+def _matches(book: Book, predicate: Predicate) -> bool:
+    name, op, value = predicate.field, predicate.op, predicate.value
+    actual = _book_value(book, name)
+    if actual is None:
+        return False
+    if name in ("title", "author"):
+        value = normalize(value)
+        return actual.startswith(value) if op == "prefix" else actual == value
+    if name in DATETIME_FIELDS:
+        try:
+            actual = _datetime64(actual)
+        except ValueError:
+            return False
+        if np.isnat(actual):
+            return False
+        value = [_datetime64(v) for v in value] if op in ("in", "between") else _datetime64(value)
+    try:
+        if op == "in":
+            return actual in value
+        if op == "between":
+            return value[0] <= actual <= value[1]
+        return OPERATORS[op](actual, value)
+    except TypeError:
+        # dirty values (a "N/A" price) never match
+        return False
@@ -1,32 +1,148 @@
+from contextlib import contextmanager
+from typing import Iterator
 from src.repositories import BookRepositoryProtocol
 from src.domain import Book
+from src.services.catalog_aggregates import CatalogAggregates
 
 class BookService:
-    def __init__(self, repo: BookRepositoryProtocol):
+    def __init__(self, repo: BookRepositoryProtocol, aggregates: CatalogAggregates | None = None):
         self.repo = repo
+        # materialized on first read, then kept up to date by our own mutations
+        self.aggregates = aggregates or CatalogAggregates()
+        self._aggregates_ready = False
+        self._aggregates_version = None
 
     def get_all_books(self) -> list[Book]:
         return self.repo.get_all_books()
 
+    def iter_books(self) -> Iterator[Book]:
+        return self.repo.iter_books()
+
+    def iter_chunks(self, size: int = 10_000) -> Iterator[list[Book]]:
+        return self.repo.iter_chunks(size)
+
+    def get_analytics_source(self):
+        # a mapped columnar snapshot when the repository can give us one,
+        # otherwise the books themselves
+        get_snapshot = getattr(self.repo, "get_snapshot", None)
+        snapshot = get_snapshot() if get_snapshot is not None else None
+        return snapshot if snapshot is not None else self.get_all_books()
+
+    def catalog_version(self) -> int | None:
+        # repositories that track changes expose a version, None = unknown
+        return getattr(self.repo, "version", None)
+
     def add_book(self, book: Book) -> str:
-        return self.repo.add_book(book)
+        in_sync = self._aggregates_in_sync()
+        book_id = self.repo.add_book(book)
+        self._track(in_sync, "add", book)
+        return book_id
+
+    def add_books(self, books: list[Book]) -> int:
+        in_sync = self._aggregates_in_sync()
+        added = self.repo.add_books(books)
+        self._track_many(in_sync, "add", books)
+        return added
 
     def find_book_by_name(self, query: str) -> list[Book]:
         if not isinstance(query, str):
             raise TypeError("Expected str, got something else")
         return self.repo.find_book_by_name(query)
 
+    def get_by_id(self, book_id: str) -> Book | None:
+        return self.repo.get_by_id(book_id)
+
+    def find_by_title_prefix(self, prefix: str) -> list[Book]:
+        if not isinstance(prefix, str):
+            raise TypeError("Expected str, got something else")
+        return self.repo.find_by_title_prefix(prefix)
+
+    def find_by_author(self, author: str) -> list[Book]:
+        if not isinstance(author, str):
+            raise TypeError("Expected str, got something else")
+        return self.repo.find_by_author(author)
+
+    def search(self, query: str, limit: int = 10) -> list[Book]:
+        if not isinstance(query, str):
+            raise TypeError("Expected str, got something else")
+        return self.repo.search(query, limit)
+
+    def warm_start(self) -> bool:
+        # only repositories with a prebuilt snapshot can start warm
+        warm_start = getattr(self.repo, "warm_start", None)
+        return warm_start() if warm_start is not None else False
+
+    def save_search_index(self) -> None:
+        save = getattr(self.repo, "save_search_index", None)
+        if save is not None:
+            save()
+
+    def top_rated(self, limit: int = 10) -> list[Book]:
+        return self.repo.top_rated(limit)
+
     def remove_book(self, book: Book) -> bool:
-        return self.repo.remove_book(book)
+        in_sync = self._aggregates_in_sync()
+        removed = self.repo.remove_book(book)
+        if removed:
+            self._track(in_sync, "remove", book.book_id)
+        return removed
+
+    def remove_books_by_id(self, book_ids: list[str]) -> list[str]:
+        in_sync = self._aggregates_in_sync()
+        removed = self.repo.remove_books_by_id(book_ids)
+        self._track_many(in_sync, "remove", removed)
+        return removed
 
     def update_book(self, book: Book, updates: dict[str: int]) -> dict[str: list[str]]:
+        result = self._validate_updates(updates)
+
+        in_sync = self._aggregates_in_sync()
+        if self.repo.update_book(book, updates):
+            self._track(in_sync, "update", book)
+            return result
+        else:
+            return {}
+
+    def update_many(self, changes: list[tuple[Book, dict]]) -> dict[str, dict[str, list[str]]]:
+        # {book_id: {"updated": [...], "invalid": [...]}} like update_book, per
+        # book. Invalid fields are dropped, the rest is applied in one write,
+        # and {} means the repository refused the whole batch
+        report = {}
+        valid = []
+        for book, updates in changes:
+            updates = dict(updates)
+            report[book.book_id] = self._validate_updates(updates)
+            valid.append((book, updates))
+
+        in_sync = self._aggregates_in_sync()
+        if not self.repo.update_many(valid):
+            return {}
+        self._track_many(in_sync, "update", [book for book, _ in valid])
+        return report
+
+    @contextmanager
+    def transaction(self) -> Iterator["BookService"]:
+        # groups any of the mutations above into one write, see the repository's transaction()
+        try:
+            with self.repo.transaction():
+                yield self
+                in_sync = self._aggregates_in_sync()
+        except BaseException:
+            # the repository went back to what it had, the aggregates didn't
+            self._aggregates_ready = False
+            raise
+        # committing changed the version, not the catalog we've been tracking
+        if in_sync:
+            self._aggregates_version = self.catalog_version()
 
+    @staticmethod
+    def _validate_updates(updates: dict) -> dict[str, list[str]]:
         result = {
             "updated": [],
             "invalid": []
         }
 
-        for field, value in updates.items():
+        for field, value in list(updates.items()):
             # if value is an int, we need to validate
             if isinstance(value, int):
                 # if value is int, we want it to be positive at least
@@ -38,8 +154,48 @@ class BookService:
             # if not an int, it's a str, we take as is
             else:
                 result["updated"].append(field)
+        return result
 
-        if self.repo.update_book(book, updates):
-            return result
-        else:
-            return {}
+    # materialized aggregates, O(1) reads while the catalog only changes through us
+    def average_price(self) -> float:
+        return self.get_aggregates().average_price()
+
+    def value_scores(self) -> dict[str, float]:
+        return self.get_aggregates().value_scores()
+
+    def genre_counts(self) -> dict[str, int]:
+        return dict(self.get_aggregates().genre_counts)
+
+    def most_popular_genre(self) -> str:
+        return self.get_aggregates().most_popular_genre()
+
+    def verify_aggregates(self) -> dict[str, tuple]:
+        # recompute from scratch, returns {metric: (materialized, recomputed)} for any drift
+        return self.get_aggregates().verify(self.get_all_books())
+
+    def get_aggregates(self) -> CatalogAggregates:
+        if not self._aggregates_in_sync():
+            # first read, or the catalog changed behind our back (another
+            # process, a repository without a version), so start over
+            self.aggregates.reset(self.get_all_books())
+            self._aggregates_ready = True
+            self._aggregates_version = self.catalog_version()
+        return self.aggregates
+
+    def _aggregates_in_sync(self) -> bool:
+        version = self.catalog_version()
+        return self._aggregates_ready and version is not None and version == self._aggregates_version
+
+    def _track(self, in_sync: bool, event: str, arg) -> None:
+        self._track_many(in_sync, event, [arg])
+
+    def _track_many(self, in_sync: bool, event: str, args: list) -> None:
+        # only patch the aggregates if they matched the catalog before the change,
+        # otherwise leave them to be rebuilt on the next read
+        if not in_sync:
+            self._aggregates_ready = False
+            return
+        apply = getattr(self.aggregates, event)
+        for arg in args:
+            apply(arg)
+        self._aggregates_version = self.catalog_version()
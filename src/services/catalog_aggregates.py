@@ -0,0 +1,146 @@
+import math
+from datetime import datetime
+from src.domain import Book
+
+
+class CatalogAggregates:
+    # Running totals over the catalog that BookService keeps up to date on
+    # add/update/remove, so average price, genre counts, value scores and the
+    # most popular genre of the year are reads instead of full recomputes.
+    #
+    # Every book's contribution is remembered by book_id, which lets us take
+    # it back out on update/remove even when the caller's Book is a stale copy.
+
+    def __init__(self, books: list[Book] | None = None, year: int | None = None):
+        # year the checkout tallies are for. None follows the calendar, so a
+        # process that runs past New Year moves on to the new year's checkouts
+        self.fixed_year = year
+        self.reset(books or [])
+
+    @property
+    def year(self) -> int:
+        return self.fixed_year or datetime.now().year
+
+    def reset(self, books: list[Book]) -> None:
+        self.count = 0
+        self.price_sum = 0.0
+        self.price_count = 0
+        self.genre_counts: dict[str, int] = {}
+        self.checkouts_by_genre: dict[str, int] = {}
+        self.tallied_year = self.year
+        self._value_scores: dict[str, float] = {}
+        self._contributions: dict[str, tuple] = {}
+        for book in books:
+            self.add(book)
+
+    def add(self, book: Book) -> None:
+        self.remove(book.book_id)
+        contribution = self._contribution(book)
+        self._contributions[book.book_id] = contribution
+        self._apply(contribution, 1)
+        if contribution[3] is not None:
+            self._value_scores[book.book_id] = contribution[3]
+
+    def remove(self, book_id: str) -> None:
+        contribution = self._contributions.pop(book_id, None)
+        if contribution is None:
+            return
+        self._apply(contribution, -1)
+        self._value_scores.pop(book_id, None)
+
+    def update(self, book: Book) -> None:
+        self.add(book)
+
+    def average_price(self) -> float:
+        if self.price_count == 0:
+            return math.nan
+        return self.price_sum / self.price_count
+
+    def value_scores(self) -> dict[str, float]:
+        return dict(self._value_scores)
+
+    def most_popular_genre(self) -> str:
+        self._follow_year()
+        if not self.checkouts_by_genre:
+            raise ValueError("No checkouts found for this year")
+        return max(self.checkouts_by_genre, key=lambda genre: self.checkouts_by_genre[genre])
+
+    def snapshot(self) -> dict:
+        self._follow_year()
+        return {
+            "count": self.count,
+            "average_price": self.average_price(),
+            "genre_counts": dict(self.genre_counts),
+            "checkouts_by_genre": dict(self.checkouts_by_genre),
+            "value_scores": self.value_scores(),
+        }
+
+    def verify(self, books: list[Book]) -> dict[str, tuple]:
+        # recompute from scratch and report every metric that drifted as
+        # {metric: (materialized, recomputed)}, empty dict = all good
+        expected = CatalogAggregates(books, self.fixed_year).snapshot()
+        actual = self.snapshot()
+
+        drift = {}
+        for metric, value in expected.items():
+            if not self._same(actual[metric], value):
+                drift[metric] = (actual[metric], value)
+        return drift
+
+    def _contribution(self, book: Book) -> tuple:
+        price = book.price_usd if isinstance(book.price_usd, (int, float)) else None
+        checkout_year = None
+        if book.last_checkout:
+            try:
+                checkout_year = datetime.fromisoformat(book.last_checkout).year
+            except (TypeError, ValueError):
+                pass
+
+        # value score = rating * log(ratings_count) / price, same as the analytics service
+        # dirty records (a rating of "4.2") count as missing, like a bad price
+        rating = book.average_rating if isinstance(book.average_rating, (int, float)) else None
+        ratings_count = book.ratings_count if isinstance(book.ratings_count, (int, float)) else 0
+        value_score = None
+        if price and rating is not None:
+            value_score = rating * math.log1p(ratings_count) / price
+
+        return (price, book.genre, checkout_year, value_score)
+
+    def _follow_year(self) -> None:
+        # the year turned over since the checkouts were tallied: every book's
+        # checkout year is in its contribution, so re-tally from those
+        year = self.year
+        if year == self.tallied_year:
+            return
+        self.tallied_year = year
+        self.checkouts_by_genre = {}
+        for _, genre, checkout_year, _ in self._contributions.values():
+            if genre is not None and checkout_year == year:
+                self._tally(self.checkouts_by_genre, genre, 1)
+
+    def _apply(self, contribution: tuple, sign: int) -> None:
+        self._follow_year()
+        price, genre, checkout_year, _ = contribution
+        self.count += sign
+        if price is not None:
+            self.price_sum += sign * price
+            self.price_count += sign
+        if genre is not None:
+            self._tally(self.genre_counts, genre, sign)
+            if checkout_year == self.tallied_year:
+                self._tally(self.checkouts_by_genre, genre, sign)
+
+    @staticmethod
+    def _tally(counts: dict[str, int], key: str, sign: int) -> None:
+        counts[key] = counts.get(key, 0) + sign
+        if counts[key] == 0:
+            del counts[key]
+
+    @staticmethod
+    def _same(a, b) -> bool:
+        # running float sums pick up rounding error, that isn't drift
+        if isinstance(a, float) and isinstance(b, float):
+            return (math.isnan(a) and math.isnan(b)) or math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+        if isinstance(a, dict) and isinstance(b, dict):
+            return a.keys() == b.keys() and all(CatalogAggregates._same(a[k], b[k]) for k in a)
+        return a == b
@@ -0,0 +1,90 @@
+import numpy as np
+from src.domain.checkout_history import CHECK_OUT, CheckoutEvent
+from src.services.book_frame import encode_categories, parse_datetimes
+from src.services.time_windows import histogram, to_datetime64
+
+# Columnar view of the checkout history, sorted by time, so a window is two
+# searchsorted calls and counting inside it is a bincount. Same rules as
+# BookFrame: the arrays never leave the service layer.
+
+
+class CheckoutFrame:
+    def __init__(self, events: list[CheckoutEvent], version: int | None = None):
+        self.version = version
+        self._pending: list[CheckoutEvent] = []
+        self._build(events)
+
+    def __len__(self) -> int:
+        return len(self.timestamps) + len(self._pending)
+
+    def append(self, events: list[CheckoutEvent], version: int | None = None) -> None:
+        # new events are folded in on the next query, not one numpy concat per event
+        self._pending.extend(events)
+        self.version = version
+
+    def window(self, start=None, end=None) -> slice:
+        # rows with start <= timestamp < end
+        self._merge()
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, to_datetime64(start), side="left"))
+        hi = len(self.timestamps) if end is None else int(
+            np.searchsorted(self.timestamps, to_datetime64(end), side="left"))
+        return slice(lo, hi)
+
+    def counts(self, key: str, start=None, end=None, action: str = CHECK_OUT) -> dict[str, int]:
+        # {book_id or genre: number of events} in the window, most first
+        rows = self.window(start, end)
+        codes = getattr(self, key)[rows]
+        codes = codes[(self.is_checkout[rows] == (action == CHECK_OUT)) & (codes >= 0)]
+        labels = getattr(self, f"{key}_categories")
+        counts = np.bincount(codes, minlength=len(labels))
+        order = np.argsort(-counts, kind="stable")
+        return {labels[i]: int(counts[i]) for i in order.tolist() if counts[i]}
+
+    def histogram(self, freq: str = "day", start=None, end=None, key: str | None = None,
+                  action: str = CHECK_OUT) -> dict:
+        # events per day/week/month, optionally split by "book" or "genre"
+        self._merge()
+        rows = self.is_checkout == (action == CHECK_OUT)
+        timestamps = self.timestamps[rows]
+        if key is None:
+            return histogram(timestamps, freq, start, end)
+        return histogram(timestamps, freq, start, end, getattr(self, key)[rows],
+                         getattr(self, f"{key}_categories"))
+
+    def _merge(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        timestamps = parse_datetimes([e.timestamp for e in pending])
+        if len(self.timestamps) and timestamps.min() < self.timestamps[-1] \
+                or np.any(timestamps[1:] < timestamps[:-1]):
+            # back-dated events, start over
+            self._build(self.events + pending)
+            return
+
+        # the usual case: everything new happened after everything we have, so just append
+        self.events += pending
+        self.timestamps = np.concatenate((self.timestamps, timestamps))
+        self.is_checkout = np.concatenate((self.is_checkout, _is_checkout(pending)))
+        for key, attr in (("book", "book_id"), ("genre", "genre")):
+            labels = getattr(self, f"{key}_categories")
+            mapping = {label: code for code, label in enumerate(labels)}
+            codes, new_labels = encode_categories([getattr(e, attr) for e in pending])
+            remap = np.array([mapping.setdefault(label, len(mapping)) for label in new_labels] + [-1],
+                             dtype=np.int32)
+            setattr(self, key, np.concatenate((getattr(self, key), remap[codes])))
+            setattr(self, f"{key}_categories", list(mapping))
+
+    def _build(self, events: list[CheckoutEvent]) -> None:
+        timestamps = parse_datetimes([e.timestamp for e in events])
+        # stable, so events with the same timestamp stay in append order
+        order = np.argsort(timestamps, kind="stable")
+        self.events = [events[i] for i in order.tolist()]
+        self.timestamps = timestamps[order]
+        self.is_checkout = _is_checkout(self.events)
+        self.book, self.book_categories = encode_categories([e.book_id for e in self.events])
+        self.genre, self.genre_categories = encode_categories([e.genre for e in self.events])
+
+
+def _is_checkout(events: list[CheckoutEvent]) -> np.ndarray:
+    return np.array([e.action == CHECK_OUT for e in events], dtype=bool)
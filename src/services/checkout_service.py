@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterator
+from src.domain import Book, CheckoutEvent
+from src.domain.checkout_history import CHECK_IN, CHECK_OUT
+from src.repositories import CheckoutHistoryRepositoryProtocol
+from src.services.book_service import BookService
+
+if TYPE_CHECKING:
+    from src.services.checkout_frame import CheckoutFrame
+
+
+class CheckoutService:
+    # Checking books out and in. The book's availability goes through
+    # BookService (so the catalog, its indexes and aggregates follow), and
+    # every change is recorded as an event in the checkout history.
+    #
+    # Circulation queries run on a CheckoutFrame, built once from the history
+    # and then kept current with our own events; it's only rebuilt when the
+    # history changes behind our back (another process).
+
+    def __init__(self, book_service: BookService, history: CheckoutHistoryRepositoryProtocol):
+        self.book_service = book_service
+        self.history = history
+        self._frame: "CheckoutFrame | None" = None
+
+    def check_out(self, book: Book, patron: str | None = None, when: datetime | None = None) -> CheckoutEvent:
+        when = when or datetime.now()
+        book.check_out()  # raises RuntimeError if it's already out
+        return self._record(book, CHECK_OUT, patron, when,
+                            {"available": False, "last_checkout": when.isoformat()}, undo=book.check_in)
+
+    def check_in(self, book: Book, when: datetime | None = None) -> CheckoutEvent:
+        when = when or datetime.now()
+        book.check_in()  # raises RuntimeError if it's already in
+        return self._record(book, CHECK_IN, None, when, {"available": True}, undo=book.check_out)
+
+    def iter_events(self, start: datetime | None = None, end: datetime | None = None,
+                    book_id: str | None = None) -> Iterator[CheckoutEvent]:
+        for event in self.history.iter_events(start, end):
+            if book_id is None or event.book_id == book_id:
+                yield event
+
+    def get_frame(self) -> "CheckoutFrame":
+        version = self.history.version
+        if self._frame is None or self._frame.version != version:
+            # numpy comes with the frame, checking books in and out doesn't need it
+            from src.services.checkout_frame import CheckoutFrame
+            self._frame = CheckoutFrame(list(self.history.iter_events()), version)
+        return self._frame
+
+    # start <= timestamp < end, datetimes or ISO strings, None = open ended
+    def events_between(self, start=None, end=None) -> list[CheckoutEvent]:
+        frame = self.get_frame()
+        return frame.events[frame.window(start, end)]
+
+    def circulation_by_book(self, start=None, end=None, action: str = CHECK_OUT) -> dict[str, int]:
+        return self.get_frame().counts("book", start, end, action)
+
+    def circulation_by_genre(self, start=None, end=None, action: str = CHECK_OUT) -> dict[str, int]:
+        return self.get_frame().counts("genre", start, end, action)
+
+    def circulation_histogram(self, freq: str = "day", start=None, end=None,
+                              key: str | None = None, action: str = CHECK_OUT) -> dict:
+        return self.get_frame().histogram(freq, start, end, key, action)
+
+    def _record(self, book: Book, action: str, patron: str | None, when: datetime,
+                updates: dict, undo) -> CheckoutEvent:
+        # the book object was already flipped by check_out/check_in, persist it
+        # and put it back if the catalog refused
+        previous = {field: getattr(book, field) for field in updates}
+        if not self.book_service.update_book(book, updates):
+            undo()
+            raise RuntimeError(f"Could not {action} {book}")
+
+        event = CheckoutEvent(book.book_id, action, when.isoformat(), genre=book.genre, patron=patron)
+        in_sync = self._frame is not None and self._frame.version == self.history.version
+        try:
+            self.history.append(event)
+        except BaseException:
+            # no event, no checkout: take the catalog back to where it was
+            undo()
+            self.book_service.update_book(book, {**previous, "available": book.available})
+            raise
+        if in_sync:
+            self._frame.append([event], self.history.version)
+        return event
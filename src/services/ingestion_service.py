@@ -0,0 +1,149 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Iterator
+from src.domain import Book
+from src.domain.book_schema import compile_schema
+from src.repositories.book_repository_protocol import BookRepositoryProtocol
+from src.repositories.json_stream import iter_json_records
+
+
+@dataclass
+class IngestionReport:
+    source: str
+    read: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    # field -> reason -> count, "missing" and "unknown field" are counted
+    # too but don't reject a record on their own
+    errors: dict[str, dict[str, int]] = field(default_factory=dict)
+    rejects_path: str | None = None
+
+    @property
+    def records_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def count(self, name: str, reason: str, n: int = 1) -> None:
+        reasons = self.errors.setdefault(name, {})
+        reasons[reason] = reasons.get(reason, 0) + n
+
+    def merge_errors(self, errors: dict[str, dict[str, int]]) -> None:
+        for name, reasons in errors.items():
+            for reason, n in reasons.items():
+                self.count(name, reason, n)
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "read": self.read,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "seconds": round(self.seconds, 3),
+            "records_per_second": round(self.records_per_second, 1),
+            "errors": self.errors,
+            "rejects_path": self.rejects_path,
+        }
+
+
+class IngestionService:
+    # Loads catalogs we receive from outside (books_dirty.json and friends)
+    # into a repository. Records are streamed through in chunks, every field
+    # is coerced with the compiled BOOK_SCHEMA table, clean records go to the
+    # repository and rejects are written to a JSONL file next to the report,
+    # together with why they were rejected.
+    #
+    # With workers > 1 the chunks are cleaned in a process pool, writing to
+    # the repository stays in this process.
+
+    def __init__(self, repo: BookRepositoryProtocol):
+        self.repo = repo
+
+    def ingest(self, source: str, report_path: str | None = None, chunk_size: int = 10_000,
+               workers: int = 1, now: datetime | None = None) -> IngestionReport:
+        report_path = report_path or f"{os.path.splitext(source)[0]}.ingest.json"
+        rejects_path = f"{os.path.splitext(report_path)[0]}.rejects.jsonl"
+        report = IngestionReport(source, rejects_path=rejects_path)
+        now = now or datetime.now()
+
+        started = time.perf_counter()
+        chunks = _iter_chunks(iter_json_records(source), chunk_size)
+        # one transaction for the whole file: a catalog repository writes once
+        # at the end, and a failed ingest leaves the catalog as it was
+        with open(rejects_path, "w", encoding="utf-8") as rejects, self.repo.transaction():
+            for books, rejected, errors, read in self._clean_chunks(chunks, now, workers):
+                self.repo.add_books(books)
+                for item in rejected:
+                    rejects.write(json.dumps(item))
+                    rejects.write("\n")
+                report.read += read
+                report.accepted += len(books)
+                report.rejected += len(rejected)
+                report.merge_errors(errors)
+        report.seconds = time.perf_counter() - started
+
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, indent=2)
+        return report
+
+    def _clean_chunks(self, chunks: Iterator[list[dict]], now: datetime, workers: int) -> Iterator[tuple]:
+        if workers <= 1:
+            for chunk in chunks:
+                yield clean_chunk((chunk, now))
+            return
+
+        # keep at most 2 chunks per worker in flight, so a big file is never
+        # all queued up in memory
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = [pool.submit(clean_chunk, (chunk, now)) for chunk in islice(chunks, workers * 2)]
+            while pending:
+                result = pending.pop(0).result()
+                pending.extend(pool.submit(clean_chunk, (chunk, now)) for chunk in islice(chunks, 1))
+                yield result
+
+
+def clean_chunk(task: tuple) -> tuple[list[Book], list[dict], dict, int]:
+    # module level so worker processes can run it, returns
+    # (clean books, rejected records with their errors, error histogram, records read)
+    chunk, now = task
+    schema = compile_schema(now=now)
+    books = []
+    rejected = []
+    # (field, reason) -> count, nested into field -> reason -> count at the end
+    counts: dict[tuple[str, str], int] = {}
+
+    for record in chunk:
+        if not isinstance(record, dict):
+            key = ("<record>", "not an object")
+            counts[key] = counts.get(key, 0) + 1
+            rejected.append({"record": record, "errors": {"<record>": "not an object"}})
+            continue
+
+        clean, field_errors, missing = schema.coerce(record)
+        for name in missing:
+            key = (name, "missing")
+            counts[key] = counts.get(key, 0) + 1
+        for name in schema.unknown_fields(record):
+            key = (name, "unknown field")
+            counts[key] = counts.get(key, 0) + 1
+
+        if field_errors:
+            for key in field_errors.items():
+                counts[key] = counts.get(key, 0) + 1
+            rejected.append({"record": record, "errors": field_errors})
+        else:
+            books.append(Book(**clean))
+
+    errors: dict[str, dict[str, int]] = {}
+    for (name, reason), n in counts.items():
+        errors.setdefault(name, {})[reason] = n
+    return books, rejected, errors, len(chunk)
+
+
+def _iter_chunks(records: Iterator[dict], size: int) -> Iterator[list[dict]]:
+    while chunk := list(islice(records, size)):
+        yield chunk
@@ -0,0 +1,144 @@
+import os
+import zlib
+from datetime import datetime
+from heapq import nsmallest
+import numpy as np
+from src.domain.book import Book
+from src.repositories.book_repository import BookRepository
+from src.repositories.sharded_book_repository import ShardedBookRepository
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_frame import BookFrame
+from src.services.streaming_stats import StreamingStats
+from src.services.time_windows import this_year, to_datetime64
+
+
+class ShardedAnalyticsService:
+    # BookAnalyticsService over a ShardedBookRepository: every query is split
+    # into a partial result per shard (sums and counts, per-group totals,
+    # top-K lists, StreamingStats) that runs where the shard is loaded, in the
+    # repository's process pool when it has workers, and the partials are
+    # merged here. Only the partials cross process boundaries, never the books.
+    #
+    # count/sum/mean/min/max and top-K are exact, medians and other quantiles
+    # aren't mergeable and come from StreamingStats' sample instead.
+
+    def __init__(self, repo: ShardedBookRepository):
+        self.repo = repo
+
+    def average_price(self) -> float:
+        count, total = self._merged_totals("price", None).get("", (0, 0.0))[:2]
+        return total / count if count else float("nan")
+
+    def group_totals(self, key: str = "genre", value: str = "price") -> dict[str, dict[str, float]]:
+        # exact count/mean/min/max of a numeric column per group
+        return {
+            label: {"count": count, "mean": total / count, "min": low, "max": high}
+            for label, (count, total, low, high) in self._merged_totals(value, key).items()
+        }
+
+    def summarize(self, value: str = "price", key: str | None = "genre",
+                  quantiles: tuple[float, ...] = (25, 50, 75), sample_size: int = 10_000) -> dict:
+        # like BookAnalyticsService.summarize_stream, one StreamingStats per shard merged into one
+        partials = self.repo.map_shards(shard_stats, value, key, sample_size)
+        stats = partials[0]
+        for other in partials[1:]:
+            stats.merge(other)
+        return stats.result(quantiles)
+
+    def top_rated(self, min_ratings: int = 500, limit: int = 10,
+                  bayesian: bool = False, m: int = 50) -> list[Book]:
+        # the overall top `limit` is among the shards' top `limit`s
+        global_average = None
+        if bayesian:
+            # the prior has to be the whole catalog's, so that's a pass of its own
+            count, total = self._merged_totals("rating", None).get("", (0, 0.0))[:2]
+            global_average = total / count if count else float("nan")
+
+        candidates = [book for books in self.repo.map_shards(
+            shard_top_rated, min_ratings, limit, bayesian, m, global_average) for book in books]
+
+        def score(book: Book) -> float:
+            if not bayesian:
+                return book.average_rating
+            n = book.ratings_count
+            return (n / (n + m)) * book.average_rating + (m / (n + m)) * global_average
+
+        return nsmallest(limit, candidates, key=lambda b: (-score(b), -b.ratings_count, b.book_id))
+
+    def checkouts_by_genre(self, start=None, end=None) -> dict[str, int]:
+        merged: dict[str, int] = {}
+        for counts in self.repo.map_shards(shard_checkouts_by_genre, to_datetime64(start), to_datetime64(end)):
+            for genre, n in counts.items():
+                merged[genre] = merged.get(genre, 0) + n
+        return merged
+
+    def most_popular_genre(self, start=None, end=None, now: datetime | None = None) -> str:
+        # defaults to the calendar year of now, like BookAnalyticsService
+        if start is None and end is None:
+            start, end = this_year(now)
+        checkouts = self.checkouts_by_genre(start, end)
+        if not checkouts:
+            raise ValueError("No checkouts found in this window")
+        return max(checkouts, key=checkouts.get)
+
+    def _merged_totals(self, value: str, key: str | None) -> dict[str, tuple]:
+        merged: dict[str, tuple] = {}
+        for partial in self.repo.map_shards(shard_totals, value, key):
+            for label, (count, total, low, high) in partial.items():
+                if label in merged:
+                    c, t, lo, hi = merged[label]
+                    merged[label] = (c + count, t + total, min(lo, low), max(hi, high))
+                else:
+                    merged[label] = (count, total, low, high)
+        return merged
+
+
+# partial results, computed on one shard (possibly in a pool worker)
+
+
+def shard_frame(shard: BookRepository) -> BookFrame:
+    # mapped from the shard's binary snapshot when it keeps one
+    snapshot = shard.get_snapshot() if shard.use_snapshot else None
+    if snapshot is not None:
+        return BookFrame.from_snapshot(snapshot)
+    return BookFrame(shard.get_all_books())
+
+
+def shard_totals(shard: BookRepository, value: str, key: str | None) -> dict[str, tuple]:
+    # {group: (count, sum, min, max)} of the known values, key=None is one group ""
+    frame = shard_frame(shard)
+    values = frame.numeric(value)
+    if key is None:
+        codes, labels = np.zeros(len(values), dtype=np.int64), [""]
+    else:
+        codes, labels = frame.categorical(key)
+
+    keep = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[keep], values[keep]
+    if len(codes) == 0:
+        return {}
+    counts = np.bincount(codes, minlength=len(labels))
+    sums = np.bincount(codes, weights=values, minlength=len(labels))
+    lows = np.full(len(labels), np.inf)
+    highs = np.full(len(labels), -np.inf)
+    np.minimum.at(lows, codes, values)
+    np.maximum.at(highs, codes, values)
+    return {
+        labels[i]: (int(counts[i]), float(sums[i]), float(lows[i]), float(highs[i]))
+        for i in np.flatnonzero(counts).tolist()
+    }
+
+
+def shard_stats(shard: BookRepository, value: str, key: str | None, sample_size: int) -> StreamingStats:
+    # seeded by shard, otherwise every shard would sample with the same priorities
+    seed = zlib.crc32(os.path.basename(shard.filepath).encode("utf-8"))
+    return StreamingStats(value, key, sample_size, seed).update(shard_frame(shard))
+
+
+def shard_top_rated(shard: BookRepository, min_ratings: int, limit: int, bayesian: bool, m: int,
+                    global_average: float | None) -> list[Book]:
+    return BookAnalyticsService().top_rated(shard_frame(shard), min_ratings, limit, bayesian, m, global_average)
+
+
+def shard_checkouts_by_genre(shard: BookRepository, start, end) -> dict[str, int]:
+    return BookAnalyticsService().checkouts_by_genre(shard_frame(shard), start, end)
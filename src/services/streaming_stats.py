@@ -0,0 +1,90 @@
+import numpy as np
+from src.domain.book import Book
+from src.services.book_frame import BookFrame
+
+
+class StreamingStats:
+    # Running summary of one numeric column (and counts per group) that is fed
+    # the catalog chunk by chunk, so memory is bounded by the chunk size and
+    # sample_size rather than by the catalog.
+    #
+    # count/mean/min/max and group counts are exact. Quantiles are approximate:
+    # every value gets a random priority and we keep the sample_size values
+    # with the smallest priorities (a uniform sample of everything seen so far).
+    # Two summaries can be merged, which is what sharded scans need.
+
+    def __init__(self, value: str = "price", key: str | None = "genre",
+                 sample_size: int = 10_000, seed: int | None = 0):
+        self.value = value
+        self.key = key
+        self.sample_size = sample_size
+        self._rng = np.random.default_rng(seed)
+
+        self.count = 0
+        self.missing = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.group_counts: dict[str, int] = {}
+        self._sample = np.empty(0, dtype=np.float64)
+        self._priorities = np.empty(0, dtype=np.float64)
+
+    def update(self, chunk: list[Book] | BookFrame) -> "StreamingStats":
+        frame = chunk if isinstance(chunk, BookFrame) else BookFrame(chunk)
+        values = frame.numeric(self.value)
+        known = values[~np.isnan(values)]
+
+        self.missing += len(values) - len(known)
+        if len(known):
+            self.count += len(known)
+            self.total += float(known.sum())
+            self.min = min(self.min, float(known.min()))
+            self.max = max(self.max, float(known.max()))
+            self._keep(known, self._rng.random(len(known)))
+
+        if self.key is not None:
+            codes, labels = frame.categorical(self.key)
+            counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+            for label, n in zip(labels, counts.tolist()):
+                if n:
+                    self.group_counts[label] = self.group_counts.get(label, 0) + n
+        return self
+
+    def merge(self, other: "StreamingStats") -> "StreamingStats":
+        self.count += other.count
+        self.missing += other.missing
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for label, n in other.group_counts.items():
+            self.group_counts[label] = self.group_counts.get(label, 0) + n
+        self._keep(other._sample, other._priorities)
+        return self
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float("nan")
+
+    def quantile(self, q: float) -> float:
+        # q in percent, like np.percentile
+        if not len(self._sample):
+            return float("nan")
+        return float(np.percentile(self._sample, q))
+
+    def result(self, quantiles: tuple[float, ...] = (25, 50, 75)) -> dict:
+        return {
+            "count": self.count,
+            "missing": self.missing,
+            "mean": self.mean(),
+            "min": self.min if self.count else float("nan"),
+            "max": self.max if self.count else float("nan"),
+            "quantiles": {f"p{q:g}": self.quantile(q) for q in quantiles},
+            "group_counts": dict(self.group_counts),
+        }
+
+    def _keep(self, values: np.ndarray, priorities: np.ndarray) -> None:
+        sample = np.concatenate((self._sample, values))
+        keys = np.concatenate((self._priorities, priorities))
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size - 1)[:self.sample_size]
+            sample, keys = sample[keep], keys[keep]
+        self._sample, self._priorities = sample, keys
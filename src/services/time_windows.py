@@ -0,0 +1,126 @@
+from datetime import datetime
+import numpy as np
+
+# Time windows and calendar bucketing on datetime64[us] columns. Windows are
+# half-open (start <= t < end) and None means open ended. Everything here is
+# integer arithmetic on the datetime64 values, no string handling.
+
+FREQUENCIES = ("day", "week", "month")
+
+# 1970-01-01 was a Thursday, the first Monday after the epoch is day 4
+_FIRST_MONDAY = 4
+
+
+def to_datetime64(moment) -> np.datetime64 | None:
+    # datetime, ISO string, datetime64 or None (= open bound)
+    if moment is None:
+        return None
+    if isinstance(moment, np.datetime64):
+        return moment.astype("datetime64[us]")
+    return np.datetime64(moment if isinstance(moment, str) else moment.isoformat(), "us")
+
+
+def calendar_year(year: int) -> tuple[np.datetime64, np.datetime64]:
+    return np.datetime64(f"{year:04d}-01-01", "us"), np.datetime64(f"{year + 1:04d}-01-01", "us")
+
+
+def calendar_month(year: int, month: int) -> tuple[np.datetime64, np.datetime64]:
+    start = np.datetime64(f"{year:04d}-{month:02d}", "M")
+    # an explicit unit, adding a bare int to a datetime64 is deprecated
+    return start.astype("datetime64[us]"), (start + np.timedelta64(1, "M")).astype("datetime64[us]")
+
+
+def last_days(days: int, now: datetime | None = None) -> tuple[np.datetime64, np.datetime64]:
+    # the days up to and including now
+    now = now or datetime.now()
+    end = to_datetime64(now) + np.timedelta64(1, "us")
+    return end - np.timedelta64(days, "D"), end
+
+
+def this_year(now: datetime | None = None) -> tuple[np.datetime64, np.datetime64]:
+    return calendar_year((now or datetime.now()).year)
+
+
+def in_window(timestamps: np.ndarray, start=None, end=None) -> np.ndarray:
+    # NaT never matches, whatever the window
+    mask = ~np.isnat(timestamps)
+    if start is not None:
+        mask &= timestamps >= to_datetime64(start)
+    if end is not None:
+        mask &= timestamps < to_datetime64(end)
+    return mask
+
+
+def bucket_numbers(timestamps: np.ndarray, freq: str) -> np.ndarray:
+    # consecutive integers per day/week (Monday first)/month, NaT rows are garbage
+    if freq == "day":
+        return timestamps.astype("datetime64[D]").astype(np.int64)
+    if freq == "week":
+        days = timestamps.astype("datetime64[D]").astype(np.int64)
+        return (days - _FIRST_MONDAY) // 7
+    if freq == "month":
+        return timestamps.astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Unknown frequency {freq}, expected one of {', '.join(FREQUENCIES)}")
+
+
+def bucket_labels(first: int, count: int, freq: str) -> list[str]:
+    # "2026-01-05" for days and weeks (the Monday), "2026-01" for months
+    numbers = np.arange(first, first + count)
+    if freq == "day":
+        return np.datetime_as_string(numbers.astype("datetime64[D]")).tolist()
+    if freq == "week":
+        return np.datetime_as_string((numbers * 7 + _FIRST_MONDAY).astype("datetime64[D]")).tolist()
+    return np.datetime_as_string(numbers.astype("datetime64[M]")).tolist()
+
+
+def histogram(timestamps: np.ndarray, freq: str = "day", start=None, end=None,
+              codes: np.ndarray | None = None, labels: list[str] | None = None) -> dict:
+    # events per bucket in one bincount, empty buckets inside the window included:
+    #   {"2026-01": 12, ...}, or with codes/labels (e.g. genre) {"2026-01": {"Fantasy": 7, ...}}
+    mask = in_window(timestamps, start, end)
+    if codes is not None:
+        mask &= codes >= 0
+    numbers = bucket_numbers(timestamps[mask], freq)
+
+    if start is not None:
+        first = int(bucket_numbers(np.array([to_datetime64(start)]), freq)[0])
+    elif len(numbers):
+        first = int(numbers.min())
+    else:
+        return {}
+    if end is not None:
+        last = int(bucket_numbers(np.array([to_datetime64(end) - np.timedelta64(1, "us")]), freq)[0])
+    elif len(numbers):
+        last = int(numbers.max())
+    else:
+        return {}
+    count = last - first + 1
+    if count <= 0:
+        return {}
+
+    names = bucket_labels(first, count, freq)
+    if codes is None:
+        counts = np.bincount(numbers - first, minlength=count)
+        return dict(zip(names, counts.tolist()))
+
+    groups = len(labels)
+    counts = np.bincount((numbers - first) * groups + codes[mask], minlength=count * groups)
+    counts = counts.reshape(count, groups)
+    return {
+        name: {labels[g]: n for g, n in enumerate(row) if n}
+        for name, row in zip(names, counts.tolist())
+    }
+
+
+def rolling_counts(timestamps: np.ndarray, days: int = 30, start=None, end=None) -> dict[str, int]:
+    # for every day in the window, how many events fell in the `days` days
+    # up to and including it; the days before start still count towards it
+    daily_start = None if start is None else to_datetime64(start) - np.timedelta64(days - 1, "D")
+    daily = histogram(timestamps, "day", daily_start, end)
+    if not daily:
+        return {}
+    names = list(daily)
+    totals = np.cumsum([0] + list(daily.values()))
+    windowed = totals[1:] - totals[np.maximum(np.arange(1, len(totals)) - days, 0)]
+    skip = 0 if start is None else days - 1
+    return dict(zip(names[skip:], windowed[skip:].tolist()))
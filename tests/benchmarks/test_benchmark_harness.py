@@ -0,0 +1,50 @@
+import json
+from benchmarks.harness import compare, measure
+from benchmarks.run import main
+
+
+def row(case, p50, peak=1_000_000, size=1000):
+    return {"case": case, "size": size, "p50_s": p50, "peak_bytes": peak}
+
+
+def test_measure_reports_percentiles_and_memory():
+    result = measure("sum", 1000, lambda: sum(range(1000)), min_runs=5, max_runs=20, budget_s=0.01,
+                     per_item=True)
+    assert 5 <= result.runs <= 20
+    assert result.min_s <= result.p50_s <= result.p95_s <= result.p99_s
+    assert result.items_per_s == 1000 / result.p50_s
+
+    result = measure("alloc", 10, lambda: [0] * 100_000, max_runs=3)
+    assert result.peak_bytes >= 800_000
+    assert result.items_per_s is None
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = [row("slow", 0.010), row("noise", 0.000010), row("memory", 0.010), row("gone", 1.0)]
+    current = [row("slow", 0.013), row("noise", 0.000020), row("memory", 0.010, peak=2_000_000),
+               row("new", 1.0), row("slow", 0.030, size=10)]
+
+    flagged = {(r["case"], r["size"]): r["regression"] for r in compare(current, baseline, threshold=0.25)}
+    assert flagged == {("slow", 1000): True, ("noise", 1000): False, ("memory", 1000): True}
+    assert not any(r["regression"] for r in compare(current, baseline, threshold=0.5) if r["case"] == "slow")
+
+
+def test_run_writes_results_and_compares(tmp_path, capsys):
+    args = ["--sizes", "200", "--cases", "analytics.average_price", "cached.get_by_id", "--budget", "0.01",
+            "--catalogs", str(tmp_path / "catalogs"), "--work", str(tmp_path / "work"), "--baseline", str(tmp_path / "baseline.json")]
+
+    assert main(args + ["--out", str(tmp_path / "first.json"), "--save-baseline"]) == 0
+    saved = json.loads((tmp_path / "baseline.json").read_text())
+    assert {r["case"] for r in saved["results"]} == {"analytics.average_price", "cached.get_by_id"}
+    assert saved["environment"]["python"]
+
+    # a generous threshold, so timing noise on a shared machine can't fail this
+    assert main(args + ["--out", str(tmp_path / "second.json"), "--threshold", "1000"]) == 0
+
+    # sizes the baseline never ran are called out rather than passing silently
+    capsys.readouterr()
+    sizes = ["--sizes", "200", "300"]
+    assert main(args + sizes + ["--out", str(tmp_path / "third.json"), "--threshold", "1000"]) == 0
+    out = capsys.readouterr().out
+    assert "300 books: not compared" in out
+    assert "200 books: not compared" not in out
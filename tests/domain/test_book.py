@@ -0,0 +1,41 @@
+import json
+import shutil
+from src.domain import Book, CompactBook
+from src.repositories import CachedBookRepository
+
+
+def test_books_are_slotted_and_share_low_cardinality_strings():
+    a = Book.from_dict({"title": "A", "author": "X", "genre": "".join(["Fan", "tasy"])})
+    b = Book.from_dict({"title": "B", "author": "Y", "genre": "".join(["Fant", "asy"])})
+
+    assert not hasattr(a, "__dict__")
+    assert a.genre is b.genre
+
+
+def test_compact_book_round_trips_its_id():
+    book = CompactBook(title="A", author="X", genre="Fantasy")
+
+    assert book._packed_id == bytes.fromhex(book.book_id.replace("-", ""))
+    assert CompactBook.from_dict(book.to_dict()).to_dict() == book.to_dict()
+    assert Book.from_dict(book.to_dict()) == Book(**book.to_dict())
+
+
+def test_compact_book_keeps_ids_that_are_not_canonical_uuids():
+    for book_id in ("b", "16BD5941-A839-4EA7-99DD-475620372C54"):
+        book = CompactBook(title="A", author="X", book_id=book_id)
+        assert book.book_id == book_id
+        assert book.to_dict()["book_id"] == book_id
+
+
+def test_repository_can_load_compact_books(tmp_path):
+    path = tmp_path / "books.json"
+    shutil.copy("books.json", path)
+    with open(path, "r", encoding="utf-8") as f:
+        expected = json.load(f)
+
+    repo = CachedBookRepository(str(path), compact_ids=True)
+    books = repo.get_all_books()
+
+    assert all(type(b) is CompactBook for b in books)
+    assert [b.to_dict() for b in books] == [Book.from_dict(item).to_dict() for item in expected]
+    assert repo.get_by_id(expected[0]["book_id"]).title == expected[0]["title"]
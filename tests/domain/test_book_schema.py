@@ -0,0 +1,51 @@
+from datetime import datetime
+import pytest
+from src.domain.book_schema import compile_schema
+
+schema = compile_schema(now=datetime(2026, 1, 1))
+
+
+@pytest.mark.parametrize("name, raw, expected", [
+    ("price_usd", "N/A", None),
+    ("price_usd", "12.5", 12.5),
+    ("price_usd", 7, 7.0),
+    ("page_count", "Unknown", None),
+    ("page_count", 300.0, 300),
+    ("available", "true", True),
+    ("in_print", "False", False),
+    ("last_checkout", "", None),
+    ("language", "Eng", "English"),
+    ("format", "Audio Book", "Audiobook"),
+    ("publisher", "", None),
+    ("book_id", "16BD5941-A839-4EA7-99DD-475620372C54", "16bd5941-a839-4ea7-99dd-475620372c54"),
+])
+def test_coerces_dirty_values(name, raw, expected):
+    clean, errors, _ = schema.coerce({"title": "T", "author": "A", name: raw})
+    assert errors == {}
+    assert clean.get(name) == expected
+
+
+@pytest.mark.parametrize("name, raw, reason", [
+    ("price_usd", "cheap", "not a number"),
+    ("price_usd", -1.0, "out of range"),
+    ("average_rating", 5.27, "out of range"),
+    ("publication_year", 2028, "out of range"),
+    ("page_count", 12.5, "not an integer"),
+    ("available", "maybe", "not a boolean"),
+    ("last_checkout", "yesterday", "not a datetime"),
+    ("book_id", "abc", "not a uuid"),
+    ("title", "  ", "missing"),
+])
+def test_reports_why_a_value_was_rejected(name, raw, reason):
+    _, errors, _ = schema.coerce({"title": "T", "author": "A", name: raw})
+    assert errors == {name: reason}
+
+
+def test_missing_and_unknown_fields_are_reported_but_not_errors():
+    record = {"title": "T", "author": "A", "price_usd": "N/A", "publisher_email": "x@y.z"}
+    clean, errors, missing = schema.coerce(record)
+
+    assert clean == {"title": "T", "author": "A"}
+    assert errors == {}
+    assert missing == ["price_usd"]
+    assert schema.unknown_fields(record) == ["publisher_email"]
@@ -0,0 +1,48 @@
+import json
+from src.domain.book import Book
+from src.repositories import BookIndex, BookRepository, CachedBookRepository
+
+
+def test_lookups_are_case_and_whitespace_insensitive():
+    dune = Book(title="Dune", author="Frank Herbert")
+    messiah = Book(title="Dune Messiah", author="Frank  Herbert")
+    index = BookIndex([dune, messiah, Book(title="Emma", author="Jane Austen")])
+
+    assert index.get(dune.book_id) is dune
+    assert index.find_by_title("  dune ") == [dune]
+    assert index.find_by_author("frank herbert") == [dune, messiah]
+    assert index.find_by_title_prefix("DUNE") == [dune, messiah]
+
+
+def test_update_and_remove_are_incremental():
+    book = Book(title="Dune", author="Frank Herbert")
+    index = BookIndex([book])
+
+    book.title = "Arrakis"
+    index.update(book)
+    assert index.find_by_title("Dune") == []
+    assert index.find_by_title_prefix("arr") == [book]
+
+    index.remove(book.book_id)
+    assert index.get(book.book_id) is None
+    assert index.find_by_title_prefix("") == []
+    assert len(index) == 0
+
+
+def test_cached_repository_keeps_index_in_sync(tmp_path):
+    path = tmp_path / "books.json"
+    first = Book(title="Dune", author="Frank Herbert")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([first.to_dict()], f)
+    repo = CachedBookRepository(str(path))
+
+    second = Book(title="Dune Messiah", author="Frank Herbert")
+    repo.add_book(second)
+    repo.update_book(first, {"author": "F. Herbert"})
+
+    assert repo.find_by_author("frank herbert") == [second]
+    assert [b.title for b in repo.find_by_title_prefix("dune")] == ["Dune", "Dune Messiah"]
+    assert repo.remove_book(Book(title="stale copy", author="?", book_id=second.book_id))
+    assert repo.get_by_id(second.book_id) is None
+    # a plain repository agrees with what was written to disk
+    assert [b.author for b in BookRepository(str(path)).find_by_title_prefix("dune")] == ["F. Herbert"]
@@ -0,0 +1,42 @@
+import json
+from src.domain.book import Book
+from src.repositories import BookLeaderboard, BookRepository, CachedBookRepository
+
+
+def test_leaderboard_follows_updates():
+    a = Book(title="A", author="X", average_rating=4.0, ratings_count=600)
+    b = Book(title="B", author="X", average_rating=3.0, ratings_count=600)
+    low = Book(title="Low", author="X", average_rating=5.0, ratings_count=10)
+    board = BookLeaderboard(min_ratings=500, books=[a, b, low])
+    assert board.top(10) == [a, b]
+
+    b.average_rating = 4.5
+    board.update(b)
+    assert board.top(1) == [b]
+
+    low.ratings_count = 1000
+    board.update(low)
+    board.remove(a.book_id)
+    assert board.top(10) == [low, b]
+
+
+def test_cached_repository_leaderboard_matches_scan():
+    repo = CachedBookRepository("books.json")
+
+    assert repo.top_rated(10) == BookRepository("books.json").top_rated(10)
+
+
+def test_cached_repository_leaderboard_tracks_mutations(tmp_path):
+    path = tmp_path / "books.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([], f)
+    repo = CachedBookRepository(str(path))
+
+    book = Book(title="A", author="X", average_rating=3.0, ratings_count=800)
+    repo.add_book(book)
+    repo.add_book(Book(title="B", author="X", average_rating=4.0, ratings_count=800))
+    repo.update_book(book, {"average_rating": 4.9})
+
+    assert [b.title for b in repo.top_rated(2)] == ["A", "B"]
+    repo.remove_book(book)
+    assert [b.title for b in repo.top_rated(2)] == ["B"]
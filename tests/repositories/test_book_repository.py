@@ -0,0 +1,145 @@
+import json
+import os
+import pytest
+from src.domain.book import Book
+from src.repositories import BookRepository, CachedBookRepository, JournaledBookRepository, SqliteBookRepository
+
+
+def make_repo(kind, tmp_path, books):
+    if kind == "sqlite":
+        repo = SqliteBookRepository(str(tmp_path / "books.db"))
+        repo.add_books(books)
+        return repo
+    path = tmp_path / "books.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([b.to_dict() for b in books], f)
+    return {"json": BookRepository, "cached": CachedBookRepository, "journaled": JournaledBookRepository}[kind](str(path))
+
+
+@pytest.fixture(params=["json", "cached", "journaled", "sqlite"])
+def repo(request, tmp_path):
+    return make_repo(request.param, tmp_path, [Book(title=f"Book {i}", author="X", price_usd=10.0) for i in range(5)])
+
+
+def reopened(repo):
+    # a fresh repository over the same files, so we see what was written
+    if isinstance(repo, SqliteBookRepository):
+        return SqliteBookRepository(repo.filepath)
+    return type(repo)(repo.filepath)
+
+
+def test_bulk_operations(repo):
+    books = repo.get_all_books()
+    new = [Book(title=f"New {i}", author="Y") for i in range(3)]
+
+    assert repo.add_books(new) == 3
+    assert repo.remove_books_by_id([books[0].book_id, "missing", books[1].book_id]) == [
+        books[0].book_id, books[1].book_id]
+    assert repo.update_many([(books[2], {"price_usd": 1.0}), (new[0], {"title": "Renamed"})])
+
+    stored = reopened(repo)
+    assert len(stored.get_all_books()) == 6
+    assert stored.get_by_id(books[2].book_id).price_usd == 1.0
+    assert stored.find_book_by_name("Renamed")[0].book_id == new[0].book_id
+    assert new[0].title == "Renamed"
+
+
+def test_adding_a_stored_book_id_replaces_it(repo):
+    books = repo.get_all_books()
+    renamed = Book(**{**books[1].to_dict(), "title": "Replaced"})
+
+    assert repo.add_book(renamed) == books[1].book_id
+    assert repo.add_books([Book(**{**books[2].to_dict(), "price_usd": 3.0}), Book(title="New", author="Y")]) == 2
+
+    stored = reopened(repo)
+    assert len(stored.get_all_books()) == 6
+    assert stored.get_by_id(books[1].book_id).title == "Replaced"
+    assert stored.get_by_id(books[2].book_id).price_usd == 3.0
+
+
+def test_update_many_is_all_or_nothing(repo):
+    books = repo.get_all_books()
+    ghost = Book(title="Ghost", author="Nobody")
+
+    assert not repo.update_many([(books[0], {"price_usd": 2.0}), (ghost, {"price_usd": 2.0})])
+    assert not repo.update_many([(books[0], {"price_usd": 2.0}), (books[1], {"colour": "red"})])
+    assert not repo.update_many([(books[0], {"book_id": "x"})])
+    assert reopened(repo).get_by_id(books[0].book_id).price_usd == 10.0
+    assert books[0].price_usd == 10.0
+
+
+def test_update_many_with_nothing_to_change_for_some_books(repo):
+    # BookService passes {} for a book whose fields were all invalid
+    books = repo.get_all_books()
+
+    assert repo.update_many([(books[0], {"price_usd": 2.0}), (books[1], {})])
+    with repo.transaction():
+        assert repo.update_many([(books[2], {}), (books[3], {"price_usd": 3.0})])
+    # an unknown book still refuses the batch, changes or not
+    assert not repo.update_many([(books[4], {"price_usd": 4.0}), (Book(title="Ghost", author="Nobody"), {})])
+
+    stored = reopened(repo)
+    assert [stored.get_by_id(b.book_id).price_usd for b in books] == [2.0, 10.0, 10.0, 3.0, 10.0]
+
+
+def test_transaction_commits_once(repo):
+    books = repo.get_all_books()
+    with repo.transaction():
+        repo.add_book(Book(title="Inside", author="Z"))
+        repo.remove_book(books[0])
+        with repo.transaction():
+            repo.update_book(books[1], {"price_usd": 3.0})
+        # the changes are visible inside, even though nothing was written yet
+        assert repo.find_book_by_name("Inside")
+        assert repo.get_by_id(books[0].book_id) is None
+
+    stored = reopened(repo)
+    assert [b.title for b in stored.get_all_books()] == ["Book 1", "Book 2", "Book 3", "Book 4", "Inside"]
+    assert stored.get_by_id(books[1].book_id).price_usd == 3.0
+
+
+def test_transaction_rolls_back_on_error(repo):
+    books = repo.get_all_books()
+    with pytest.raises(RuntimeError):
+        with repo.transaction():
+            repo.add_books([Book(title="Lost", author="Z")])
+            repo.remove_books_by_id([books[0].book_id])
+            raise RuntimeError("boom")
+
+    assert len(repo.get_all_books()) == 5
+    assert not repo.find_book_by_name("Lost")
+    assert len(reopened(repo).get_all_books()) == 5
+
+
+def test_json_transaction_writes_the_file_once(tmp_path):
+    repo = make_repo("json", tmp_path, [])
+    writes = []
+    write = BookRepository._write_books
+
+    def counting(self, books):
+        if not self.in_transaction():
+            writes.append(len(books))
+        write(self, books)
+
+    BookRepository._write_books = counting
+    try:
+        with repo.transaction():
+            for i in range(50):
+                repo.add_book(Book(title=f"B{i}", author="X"))
+    finally:
+        BookRepository._write_books = write
+    assert writes == [50]
+
+
+def test_journaled_batch_is_one_append(tmp_path):
+    repo = make_repo("journaled", tmp_path, [])
+    repo.add_books([Book(title=f"B{i}", author="X") for i in range(10)])
+    size = os.path.getsize(repo.journal_path)
+
+    with repo.transaction():
+        for book in repo.get_all_books():
+            repo.update_book(book, {"price_usd": 5.0})
+        assert os.path.getsize(repo.journal_path) == size
+
+    assert os.path.getsize(repo.journal_path) > size
+    assert {b.price_usd for b in reopened(repo).get_all_books()} == {5.0}
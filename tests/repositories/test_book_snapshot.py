@@ -0,0 +1,71 @@
+import os
+import shutil
+import pytest
+from src.domain.book import Book
+from src.repositories import BookRepository, CachedBookRepository
+from src.repositories.book_snapshot import BookSnapshot, SnapshotError, write_snapshot
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "books.json"
+    shutil.copy("books.json", path)
+    return str(path)
+
+
+def test_round_trips_books_with_missing_values(tmp_path):
+    books = [
+        Book(title="Ünïcode", author="X", genre=None, price_usd=None, in_print=False,
+             last_checkout="", available=None, ratings_count=None),
+        Book(title="Plain", author="Y", genre="Fantasy", price_usd=9.5, publication_year=1999,
+             last_checkout="N/A", available=True),
+    ]
+
+    write_snapshot(books, str(tmp_path / "snap"), {"size": 1})
+    snapshot = BookSnapshot(str(tmp_path / "snap"))
+
+    assert snapshot.books() == books
+    assert snapshot.rows([1]) == [books[1]]
+
+
+def test_rows_map_each_file_once_and_close_unmaps_them(tmp_path):
+    books = [Book(title=f"Book {i}", author="X", price_usd=float(i)) for i in range(3)]
+    write_snapshot(books, str(tmp_path / "snap"), {})
+
+    with BookSnapshot(str(tmp_path / "snap")) as snapshot:
+        assert snapshot.rows([2]) == [books[2]]
+        maps = dict(snapshot._maps)
+        assert snapshot.rows([0, 1]) == books[:2]
+        assert snapshot._maps == maps
+    assert snapshot._maps == {}
+    assert all(mapped.closed for mapped, _ in maps.values())
+
+
+def test_dirty_values_are_refused(tmp_path):
+    with pytest.raises(SnapshotError):
+        write_snapshot([Book(title="A", author="X", price_usd="N/A")], str(tmp_path / "snap"), {})
+    assert not os.path.exists(tmp_path / "snap")
+
+
+def test_repository_prefers_fresh_snapshot_and_rebuilds_when_json_changes(catalog):
+    repo = BookRepository(catalog, use_snapshot=True)
+    books = repo.get_all_books()
+    assert os.path.isdir(repo.snapshot_path)
+
+    # a fresh snapshot is used instead of the JSON
+    os.utime(repo.snapshot_path)
+    assert repo.get_all_books() == books
+    assert BookSnapshot.open_if_fresh(repo.snapshot_path, repo._snapshot_source()) is not None
+
+    repo.add_book(Book(title="New", author="X"))
+    assert BookSnapshot.open_if_fresh(repo.snapshot_path, repo._snapshot_source()) is None
+    assert len(repo.get_snapshot()) == len(books) + 1
+
+
+def test_cached_repository_snapshot_follows_mutations(catalog):
+    repo = CachedBookRepository(catalog, use_snapshot=True)
+    book = repo.get_all_books()[0]
+
+    repo.update_book(book, {"title": "Renamed"})
+
+    assert repo.get_snapshot().rows([0])[0].title == "Renamed"
@@ -0,0 +1,90 @@
+import json
+import os
+from src.domain.book import Book
+from src.repositories import CachedBookRepository
+
+
+def write_catalog(path, books):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([b.to_dict() for b in books], f)
+
+
+def test_repeated_reads_hit_cache(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [Book(title="A", author="X"), Book(title="B", author="Y")])
+    repo = CachedBookRepository(str(path))
+
+    repo.get_all_books()
+    repo.find_book_by_name("A")
+    books = repo.get_all_books()
+
+    assert len(books) == 2
+    assert repo.misses == 1
+    assert repo.hits == 2
+
+
+def test_external_change_reloads(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [Book(title="A", author="X")])
+    repo = CachedBookRepository(str(path))
+    repo.get_all_books()
+
+    write_catalog(path, [Book(title="A", author="X"), Book(title="C", author="Z")])
+    # make sure the signature changes even on coarse mtime filesystems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert len(repo.get_all_books()) == 2
+    assert repo.misses == 2
+
+
+def test_add_book_keeps_cache_warm(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [Book(title="A", author="X")])
+    repo = CachedBookRepository(str(path))
+
+    repo.add_book(Book(title="B", author="Y"))
+    books = repo.get_all_books()
+
+    assert [b.title for b in books] == ["A", "B"]
+    assert repo.misses == 1
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)) == 2
+
+
+def test_mutations_bump_version(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [Book(title="A", author="X")])
+    repo = CachedBookRepository(str(path))
+    before = repo.version
+
+    book = Book(title="B", author="Y")
+    repo.add_book(book)
+    after_add = repo.version
+    repo.update_book(book, {"title": "C"})
+
+    assert before < after_add < repo.version
+    assert repo.version == repo.version
+
+
+def test_warm_start_needs_a_fresh_snapshot(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [Book(title="Dragon Tales", author="X"), Book(title="B", author="Y")])
+
+    # no snapshot yet: nothing is parsed up front
+    cold = CachedBookRepository(str(path), use_snapshot=True)
+    assert not cold.warm_start()
+    assert cold.misses == 0
+    # the first real load builds the snapshot and the first search the index
+    cold.search("dragon")
+    cold.save_search_index()
+
+    warm = CachedBookRepository(str(path), use_snapshot=True)
+    assert warm.warm_start()
+    assert warm.misses == 1
+    assert warm.search_index is not None
+    assert [b.title for b in warm.search("dragon")] == ["Dragon Tales"]
+
+    # a catalog changed since is stale, so it isn't loaded either
+    write_catalog(path, [Book(title="C", author="Z")])
+    assert not CachedBookRepository(str(path), use_snapshot=True).warm_start()
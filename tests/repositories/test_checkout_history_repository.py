@@ -0,0 +1,48 @@
+from datetime import datetime
+import pytest
+from src.domain import CheckoutEvent
+from src.repositories import CheckoutHistoryRepository
+
+
+def event(book_id, timestamp, action="checkout", genre="Fantasy"):
+    return CheckoutEvent(book_id, action, timestamp, genre=genre)
+
+
+def test_appends_into_monthly_partitions(tmp_path):
+    repo = CheckoutHistoryRepository(str(tmp_path / "checkouts"), durable=False)
+    repo.append_many([
+        event("a", "2025-11-30T23:59:59"),
+        event("b", "2025-12-01T00:00:00"),
+        event("a", "2025-12-15T10:00:00", action="checkin"),
+    ])
+    repo.append(event("c", "2026-01-02T08:00:00"))
+
+    assert repo.partitions() == ["2025-11.jsonl", "2025-12.jsonl", "2026-01.jsonl"]
+    assert [e.book_id for e in repo.iter_events()] == ["a", "b", "a", "c"]
+
+
+def test_range_reads_only_match_the_window(tmp_path):
+    repo = CheckoutHistoryRepository(str(tmp_path / "checkouts"), durable=False)
+    repo.append_many([event(str(day), f"2025-12-{day:02d}T12:00:00") for day in range(1, 32)])
+    repo.append(event("jan", "2026-01-05T12:00:00"))
+
+    window = list(repo.iter_events(datetime(2025, 12, 10), datetime(2025, 12, 20)))
+    assert [e.book_id for e in window] == [str(day) for day in range(10, 20)]
+    assert [e.book_id for e in repo.iter_events(start=datetime(2026, 1, 1))] == ["jan"]
+
+
+def test_skips_a_torn_last_line_and_bumps_version(tmp_path):
+    repo = CheckoutHistoryRepository(str(tmp_path / "checkouts"), durable=False)
+    repo.append(event("a", "2025-12-01T00:00:00"))
+    version = repo.version
+
+    with open(repo.partition_path("2025-12"), "a", encoding="utf-8") as f:
+        f.write('{"book_id": "b", "act')
+
+    assert [e.book_id for e in repo.iter_events()] == ["a"]
+    assert repo.version != version
+
+
+def test_rejects_unknown_actions():
+    with pytest.raises(ValueError):
+        CheckoutEvent("a", "borrow", "2025-12-01T00:00:00")
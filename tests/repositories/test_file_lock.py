@@ -0,0 +1,87 @@
+import json
+import multiprocessing
+import pytest
+from src.domain.book import Book
+from src.repositories import BookRepository, CachedBookRepository, FileLock, JournaledBookRepository
+
+REPOSITORIES = {"json": BookRepository, "cached": CachedBookRepository, "journaled": JournaledBookRepository}
+
+
+def empty_catalog(tmp_path):
+    path = str(tmp_path / "books.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[]")
+    return path
+
+
+def add_many(kind, path, worker, count):
+    repo = REPOSITORIES[kind](path)
+    for i in range(count):
+        repo.add_book(Book(title=f"W{worker}-{i}", author="X"))
+
+
+def read_until_stopped(path, stop, results):
+    # a reader that never locks, it should only ever see whole catalogs
+    reads = 0
+    while not stop.is_set():
+        with open(path, encoding="utf-8") as f:
+            json.load(f)
+        reads += 1
+    results.put(reads)
+
+
+@pytest.mark.parametrize("kind", ["json", "cached", "journaled"])
+def test_concurrent_writers_lose_nothing(tmp_path, kind):
+    path = empty_catalog(tmp_path)
+
+    workers = [multiprocessing.Process(target=add_many, args=(kind, path, w, 15)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+
+    repo = REPOSITORIES[kind](path)
+    titles = {b.title for b in repo.get_all_books()}
+    assert titles == {f"W{w}-{i}" for w in range(4) for i in range(15)}
+    assert repo.generation == 60
+
+
+def test_readers_never_see_a_partial_write(tmp_path):
+    path = empty_catalog(tmp_path)
+    repo = BookRepository(path)
+    repo.add_books([Book(title=f"B{i}", author="X") for i in range(300)])
+
+    stop, results = multiprocessing.Event(), multiprocessing.Queue()
+    reader = multiprocessing.Process(target=read_until_stopped, args=(path, stop, results))
+    reader.start()
+    for i in range(20):
+        repo.add_book(Book(title=f"More {i}", author="Y"))
+    stop.set()
+    reader.join()
+
+    assert reader.exitcode == 0
+    assert results.get(timeout=5) > 0
+    assert repo.generation == 21
+
+
+def test_lock_is_reentrant(tmp_path):
+    lock = FileLock(str(tmp_path / "books.json.lock"))
+    with lock:
+        with lock:
+            assert lock.held
+        assert lock.held
+    assert not lock.held
+
+
+def test_failed_write_keeps_the_old_catalog(tmp_path):
+    path = empty_catalog(tmp_path)
+    repo = BookRepository(path)
+    repo.add_book(Book(title="Kept", author="X"))
+
+    # not JSON serializable, the dump fails half way through the temp file
+    with pytest.raises(TypeError):
+        repo.add_book(Book(title="Broken", author="X", price_usd=object()))
+
+    assert [b.title for b in BookRepository(path).get_all_books()] == ["Kept"]
+    assert list(tmp_path.glob("*.tmp.*")) == []
@@ -0,0 +1,128 @@
+import json
+import pytest
+from src.domain.book import Book
+from src.repositories import BookRepository, JournaledBookRepository
+from src.repositories.instrumentation import INSTRUMENTATION, Instrumentation, profile
+from src.services import BookService
+
+
+@pytest.fixture
+def instrumentation():
+    # the repositories report to the shared instance, leave it off for the other tests
+    INSTRUMENTATION.reset()
+    INSTRUMENTATION.enable()
+    yield INSTRUMENTATION
+    INSTRUMENTATION.disable()
+    INSTRUMENTATION.reset()
+
+
+def make_catalog(tmp_path, count=3):
+    path = tmp_path / "books.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([Book(title=f"Book {i}", author="X").to_dict() for i in range(count)], f)
+    return str(path)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def bump(self, by=1):
+        self.value += by
+        return self.value
+
+    def items(self, n):
+        yield from range(n)
+
+
+def test_nothing_is_wrapped_or_counted_until_enabled(tmp_path):
+    repo = BookRepository(make_catalog(tmp_path))
+    repo.get_all_books()
+    assert not INSTRUMENTATION.enabled
+    assert INSTRUMENTATION.methods == {}
+    assert "get_all_books" not in vars(repo)
+
+
+def test_attach_counts_calls_and_latency():
+    instrumentation = Instrumentation()
+    instrumentation.enable()
+    counter = Counter()
+    instrumentation.attach(counter)
+
+    for _ in range(5):
+        counter.bump(2)
+    assert list(counter.items(3)) == [0, 1, 2]
+
+    stats = instrumentation.methods["Counter.bump"]
+    assert counter.value == 10
+    assert stats.calls == 5
+    assert stats.total_s > 0
+    assert 0 < stats.percentile(50) <= stats.percentile(99) <= stats.total_s
+    # a generator counts as one call, however many items it yields
+    assert instrumentation.methods["Counter.items"].calls == 1
+
+
+def test_detach_restores_the_class_methods():
+    instrumentation = Instrumentation()
+    instrumentation.enable()
+    counter = Counter()
+    instrumentation.attach(counter)
+    instrumentation.disable()
+
+    counter.bump()
+    assert "bump" not in vars(counter)
+    assert "Counter.bump" not in instrumentation.methods
+
+
+def test_io_is_attributed_to_every_active_call(tmp_path, instrumentation):
+    path = make_catalog(tmp_path)
+    repo = BookRepository(path)
+    service = BookService(repo)
+    instrumentation.attach(repo, "repository")
+    instrumentation.attach(service)
+
+    service.get_all_books()
+
+    for name in ("BookService.get_all_books", "repository.get_all_books"):
+        stats = instrumentation.methods[name]
+        assert stats.objects == 3
+        assert stats.bytes_read == (tmp_path / "books.json").stat().st_size
+    # and the steps inside the load are timed on their own
+    assert instrumentation.methods["BookRepository.parse_json"].calls == 1
+    assert instrumentation.methods["BookRepository.build_books"].calls == 1
+
+
+def test_writes_count_bytes_written(tmp_path, instrumentation):
+    repo = JournaledBookRepository(make_catalog(tmp_path))
+    instrumentation.attach(repo)
+
+    repo.add_book(Book(title="New", author="Y"))
+
+    stats = instrumentation.methods["JournaledBookRepository.add_book"]
+    assert stats.calls == 1
+    assert stats.bytes_written == repo.journal_size()
+    assert instrumentation.totals.bytes_written == repo.journal_size()
+
+
+def test_export_and_reset(tmp_path, instrumentation):
+    counter = Counter()
+    instrumentation.attach(counter)
+    counter.bump()
+
+    out = tmp_path / "stats.json"
+    instrumentation.export(str(out))
+    exported = json.loads(out.read_text())
+    assert exported["methods"]["Counter.bump"]["calls"] == 1
+    assert set(exported["methods"]["Counter.bump"]) >= {"p50_s", "p95_s", "p99_s", "bytes_read", "objects"}
+    assert "Counter.bump" in instrumentation.table()
+
+    instrumentation.reset()
+    assert instrumentation.methods == {}
+
+
+def test_profile_returns_result_and_report(tmp_path):
+    path = tmp_path / "run.prof"
+    result, report = profile(sorted, [3, 1, 2], path=str(path))
+    assert result == [1, 2, 3]
+    assert "function calls" in report
+    assert path.exists()
@@ -0,0 +1,78 @@
+import json
+from src.domain.book import Book
+from src.repositories import JournaledBookRepository
+
+
+def make_repo(tmp_path, books, **kwargs):
+    path = tmp_path / "books.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([b.to_dict() for b in books], f)
+    return JournaledBookRepository(str(path), **kwargs)
+
+
+def read_snapshot(repo):
+    with open(repo.filepath, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_mutations_append_to_journal_not_snapshot(tmp_path):
+    first = Book(title="A", author="X")
+    repo = make_repo(tmp_path, [first])
+
+    repo.add_book(Book(title="B", author="Y"))
+    repo.update_book(first, {"title": "A2"})
+
+    assert len(read_snapshot(repo)) == 1
+    assert repo.journal_size() > 0
+    # a fresh instance sees the same catalog by replaying the journal
+    reopened = JournaledBookRepository(repo.filepath)
+    assert [b.title for b in reopened.get_all_books()] == ["A2", "B"]
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    repo = make_repo(tmp_path, [])
+    for i in range(5):
+        repo.add_book(Book(title=f"Book {i}", author="X"))
+    assert read_snapshot(repo) == []
+
+    repo.compact()
+
+    assert len(read_snapshot(repo)) == 5
+    assert repo.journal_size() == 0
+    assert len(repo.get_all_books()) == 5
+
+
+def test_journal_past_threshold_compacts_itself(tmp_path):
+    repo = make_repo(tmp_path, [], compact_threshold=1)
+
+    repo.add_book(Book(title="A", author="X"))
+
+    assert len(read_snapshot(repo)) == 1
+    assert repo.journal_size() == 0
+
+
+def test_torn_journal_tail_is_ignored(tmp_path):
+    doomed = Book(title="A", author="X")
+    repo = make_repo(tmp_path, [doomed])
+    repo.remove_book(doomed)
+    with open(repo.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "book": {"tit')
+
+    reopened = JournaledBookRepository(repo.filepath)
+    assert reopened.get_all_books() == []
+    reopened.add_book(Book(title="C", author="Z"))
+    assert [b.title for b in JournaledBookRepository(repo.filepath).get_all_books()] == ["C"]
+
+
+def test_replaying_journal_over_compacted_snapshot_is_harmless(tmp_path):
+    repo = make_repo(tmp_path, [Book(title="A", author="X")])
+    repo.add_book(Book(title="B", author="Y"))
+    with open(repo.journal_path, encoding="utf-8") as f:
+        journal = f.read()
+
+    repo.compact()
+    # simulate a crash after the snapshot rename but before the truncate
+    with open(repo.journal_path, "w", encoding="utf-8") as f:
+        f.write(journal)
+
+    assert [b.title for b in JournaledBookRepository(repo.filepath).get_all_books()] == ["A", "B"]
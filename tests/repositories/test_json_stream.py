@@ -0,0 +1,27 @@
+import json
+from src.repositories import BookRepository
+from src.repositories.json_stream import iter_json_records
+
+
+def test_streams_array_in_small_blocks():
+    with open("books.json", encoding="utf-8") as f:
+        expected = json.load(f)
+
+    assert list(iter_json_records("books.json", block_size=97)) == expected
+
+
+def test_streams_jsonl(tmp_path):
+    path = tmp_path / "books.jsonl"
+    records = [{"title": f"Book {i}", "nested": {"a": [1, 2]}} for i in range(5)]
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+
+    assert list(iter_json_records(str(path), block_size=8)) == records
+
+
+def test_iter_chunks_matches_get_all_books():
+    repo = BookRepository("books.json")
+
+    chunks = list(repo.iter_chunks(64))
+
+    assert [len(c) for c in chunks[:-1]] == [64] * (len(chunks) - 1)
+    assert [b for chunk in chunks for b in chunk] == repo.get_all_books()
@@ -0,0 +1,156 @@
+import json
+import pickle
+import shutil
+import pytest
+from src.domain import Book
+import src.repositories.search_index as search_index
+from src.repositories import CachedBookRepository, JournaledBookRepository, SearchIndex
+
+
+@pytest.fixture
+def books():
+    return [
+        Book(title="The Hobbit", author="J. R. R. Tolkien", publisher="Allen & Unwin", book_id="hobbit"),
+        Book(title="The Silmarillion", author="J. R. R. Tolkien", publisher="Allen & Unwin", book_id="silmarillion"),
+        Book(title="Dune", author="Frank Herbert", publisher="Chilton Books", book_id="dune"),
+        Book(title="Hobbit Cooking", author="Someone Else", publisher="Chilton Books", book_id="cooking"),
+    ]
+
+
+def ids(hits):
+    return [book_id for book_id, _ in hits]
+
+
+class Touch:
+    # unpickling this creates a file, i.e. runs code
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (open, (self.path, "w"))
+
+
+def test_ranks_title_matches_above_other_fields(books):
+    index = SearchIndex(books)
+
+    assert set(ids(index.search("hobbit"))) == {"hobbit", "cooking"}
+    assert ids(index.search("tolkien hobbit"))[0] == "hobbit"
+    assert ids(index.search("chilton")) == ["dune", "cooking"]
+
+
+def test_common_terms_find_their_best_books_not_their_first(monkeypatch):
+    monkeypatch.setattr(search_index, "CANDIDATE_LIMIT", 2)
+    padded = [Book(title=f"Dragon Tales Volume {i} of the Long Saga", author="X", book_id=f"long{i}")
+              for i in range(5)]
+    index = SearchIndex([*padded, Book(title="Dragon", author="X", book_id="short"),
+                         Book(title="Ember", author="Y", book_id="ember")])
+
+    # the shortest title scores best, however late it was added
+    assert ids(index.search("dragon", limit=1)) == ["short"]
+    # a rare term with too few matches still lets the common one fill the results
+    assert ids(index.search("ember dragon", limit=3)) == ["ember", "short", "long0"]
+
+
+def test_tolerates_typos_and_partial_words(books):
+    index = SearchIndex(books)
+
+    assert ids(index.search("Tolkien Hobit"))[0] == "hobbit"
+    assert ids(index.search("silmarilion"))[0] == "silmarillion"
+    assert ids(index.search("the silm"))[0] == "silmarillion"
+    assert index.search("zzzz") == []
+
+
+def test_is_updated_incrementally(books):
+    index = SearchIndex(books)
+    books[2].title = "Children of Dune"
+    index.update(books[2])
+    index.remove("hobbit")
+    index.add(Book(title="Farmer Giles of Ham", author="J. R. R. Tolkien", book_id="giles"))
+
+    assert ids(index.search("children"))[0] == "dune"
+    assert "hobbit" not in ids(index.search("hobbit"))
+    assert ids(index.search("giles")) == ["giles"]
+    assert len(index) == 4
+
+
+def test_churn_does_not_grow_the_doc_arrays(tmp_path):
+    index = SearchIndex([Book(title=f"Keeper {i}", author="X", book_id=f"keep{i}") for i in range(10)])
+    for i in range(500):
+        index.add(Book(title=f"Passing {i}", author="Y", book_id=f"tmp{i}"))
+        index.remove(f"tmp{i}")
+        index.update(Book(title=f"Keeper {i % 10} revised {i}", author="X", book_id=f"keep{i % 10}"))
+
+    assert len(index) == 10
+    assert len(index._book_ids) <= 10 / (1 - search_index.COMPACT_RATIO) + 1
+    assert index.search("passing") == []
+    assert ids(index.search("keeper 3 revised 493")) [0] == "keep3"
+
+    path = str(tmp_path / "books.search")
+    index.save(path, [1])
+    restored = SearchIndex()
+    assert restored.restore(path, [1])
+    assert ids(restored.search("keeper 3 revised 493"))[0] == "keep3"
+
+
+def test_restores_only_for_the_same_source(tmp_path, books):
+    path = str(tmp_path / "books.search")
+    SearchIndex(books).save(path, [1, 2])
+
+    restored = SearchIndex()
+    assert restored.restore(path, [1, 2])
+    assert ids(restored.search("hobit")) == ids(SearchIndex(books).search("hobit"))
+    assert not SearchIndex().restore(path, [1, 3])
+
+
+def test_saved_index_is_data_not_code(tmp_path, books):
+    path = tmp_path / "books.search"
+    SearchIndex(books).save(str(path), [1, 2])
+    assert json.loads(path.read_text(encoding="utf-8"))["source"] == [1, 2]
+
+    # a restored index keeps working incrementally
+    restored = SearchIndex()
+    assert restored.restore(str(path), [1, 2])
+    books[2].title = "Children of Dune"
+    restored.update(books[2])
+    assert ids(restored.search("children")) == ["dune"]
+
+    # a pickle dropped in its place is never unpickled
+    ran = tmp_path / "ran"
+    path.write_bytes(pickle.dumps(Touch(str(ran))))
+    assert not SearchIndex().restore(str(path), [1, 2])
+    assert not ran.exists()
+
+
+def test_cached_repository_persists_its_index(tmp_path):
+    path = tmp_path / "books.json"
+    shutil.copy("books.json", path)
+
+    repo = CachedBookRepository(str(path))
+    first = repo.search("Book Titel 12")
+    assert first[0].title == "Book Title 12"
+
+    # a new repository over the same file loads the saved index instead of re-indexing
+    reopened = CachedBookRepository(str(path))
+    reopened._cached_books()
+    index = SearchIndex()
+    assert index.restore(reopened.search_path, reopened._search_source())
+    assert reopened.search("Book Titel 12") == first
+
+    book = reopened.add_book(Book(title="A Wizard of Earthsea", author="Ursula K. Le Guin"))
+    assert reopened.search("earthsee")[0].book_id == book
+    assert not SearchIndex().restore(reopened.search_path, reopened._search_source())
+    reopened.save_search_index()
+    assert SearchIndex().restore(reopened.search_path, reopened._search_source())
+
+
+def test_journaled_repository_follows_the_journal(tmp_path):
+    path = tmp_path / "books.json"
+    shutil.copy("books.json", path)
+
+    repo = JournaledBookRepository(str(path))
+    repo.search("anything")
+    book = repo.get_all_books()[0]
+    repo.update_book(book, {"title": "Completely Different"})
+
+    other = JournaledBookRepository(str(path))
+    assert other.search("completely")[0].book_id == book.book_id
@@ -0,0 +1,88 @@
+import pytest
+from src.domain.book import Book
+from src.repositories import BookRepository, ShardedBookRepository
+from src.repositories.sharded_book_repository import shard_of
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return BookRepository("books.json").get_all_books()
+
+
+@pytest.fixture(params=[1, 2])
+def repo(request, tmp_path, catalog):
+    repo = ShardedBookRepository(str(tmp_path / "books.shards"), shards=4, workers=request.param)
+    repo.add_books(catalog)
+    yield repo
+    repo.close()
+
+
+def ids(books):
+    return sorted(b.book_id for b in books)
+
+
+def test_books_are_spread_by_hash(repo, catalog):
+    sizes = [len(shard.get_all_books()) for shard in repo.shards]
+    assert sum(sizes) == len(catalog) and min(sizes) > 0
+    for i, shard in enumerate(repo.shards):
+        assert all(shard_of(b.book_id, 4) == i for b in shard.get_all_books())
+    assert ids(repo.get_all_books()) == ids(catalog)
+
+
+def test_queries_match_a_single_file(repo):
+    plain = BookRepository("books.json")
+    book = plain.get_all_books()[42]
+
+    assert repo.get_by_id(book.book_id) == book
+    assert ids(repo.find_book_by_name(book.title)) == ids(plain.find_book_by_name(book.title))
+    assert ids(repo.find_by_author(book.author)) == ids(plain.find_by_author(book.author))
+    assert repo.find_by_title_prefix("the") == sorted(
+        plain.find_by_title_prefix("the"), key=lambda b: (b.title.casefold(), b.book_id))
+    assert repo.top_rated(10, 100) == plain.top_rated(10, 100)
+
+
+def test_writes_go_to_one_shard(repo, catalog):
+    book = catalog[0]
+    owner = repo.shard_for(book)
+    before = [shard.generation for shard in repo.shards]
+
+    assert repo.update_book(book, {"price_usd": 1.5})
+    after = [shard.generation for shard in repo.shards]
+    assert [a - b for a, b in zip(after, before)] == [int(shard is owner) for shard in repo.shards]
+    assert owner.get_by_id(book.book_id).price_usd == 1.5
+
+    assert repo.remove_books_by_id([book.book_id, "missing"]) == [book.book_id]
+    assert repo.get_by_id(book.book_id) is None
+    assert not repo.update_many([(catalog[1], {"price_usd": 2.0}), (book, {"price_usd": 2.0})])
+    assert repo.get_by_id(catalog[1].book_id).price_usd == catalog[1].price_usd
+
+
+def test_layout_survives_reopening(tmp_path):
+    path = str(tmp_path / "by_genre")
+    repo = ShardedBookRepository(path, shards=3, shard_by="genre")
+    book = Book(title="Moving", author="X", genre="Fantasy")
+    repo.add_books([book, Book(title="Staying", author="Y", genre="History")])
+
+    reopened = ShardedBookRepository(path, shards=16)
+    assert len(reopened.shards) == 3 and reopened.shard_by == "genre"
+    assert reopened.get_by_id(book.book_id).title == "Moving"
+
+    # a new genre moves the book to the shard that owns it
+    target = next(g for g in ("Poetry", "Horror", "Drama", "Romance") if shard_of(g, 3) != shard_of("Fantasy", 3))
+    assert reopened.update_book(book, {"genre": target})
+    assert book.genre == target
+    assert reopened.shard_for(book).get_by_id(book.book_id).genre == target
+    assert len(reopened.get_all_books()) == 2
+
+    with pytest.raises(ValueError):
+        ShardedBookRepository(str(tmp_path / "bad"), shard_by="title")
+
+
+def test_adding_a_stored_book_id_replaces_it_in_any_shard(tmp_path):
+    repo = ShardedBookRepository(str(tmp_path / "by_genre"), shards=3, shard_by="genre")
+    book = Book(title="Moving", author="X", genre="Fantasy")
+    repo.add_book(book)
+
+    target = next(g for g in ("Poetry", "Horror", "Drama", "Romance") if shard_of(g, 3) != shard_of("Fantasy", 3))
+    repo.add_book(Book(**{**book.to_dict(), "genre": target}))
+    assert [b.genre for b in repo.get_all_books()] == [target]
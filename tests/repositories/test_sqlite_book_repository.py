@@ -0,0 +1,67 @@
+import sqlite3
+import pytest
+from src.domain.book import Book
+from src.repositories import BookRepository, SqliteBookRepository
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = SqliteBookRepository(str(tmp_path / "books.db"))
+    repo.import_json("books.json")
+    yield repo
+    repo.close()
+
+
+def test_import_round_trips_the_catalog(repo):
+    assert repo.get_all_books() == BookRepository("books.json").get_all_books()
+
+
+def test_queries_match_json_repository(repo):
+    json_repo = BookRepository("books.json")
+    some_book = json_repo.get_all_books()[42]
+
+    assert repo.get_by_id(some_book.book_id) == some_book
+    assert repo.find_book_by_name(some_book.title) == json_repo.find_book_by_name(some_book.title)
+    assert repo.find_by_author(some_book.author) == json_repo.find_by_author(some_book.author)
+    assert repo.top_rated(10) == json_repo.top_rated(10)
+    assert sorted(b.book_id for b in repo.find_by_title_prefix("book title 4")) == \
+        sorted(b.book_id for b in json_repo.find_by_title_prefix("book title 4"))
+
+
+def test_crud(repo):
+    book = Book(title="Dune", author="Frank Herbert", genre="Sci-Fi", in_print=True)
+    version = repo.version
+
+    repo.add_book(book)
+    assert repo.version != version
+    assert repo.get_all_books()[-1] == book
+
+    assert repo.update_book(book, {"title": "Dune Messiah", "page_count": 256})
+    assert book.title == "Dune Messiah"
+    assert repo.find_by_title_prefix("DUNE m") == [book]
+    assert not repo.update_book(book, {"not_a_field": 1})
+
+    assert repo.remove_book(book)
+    assert not repo.remove_book(book)
+    assert repo.get_by_id(book.book_id) is None
+
+
+def test_update_with_nothing_to_change(repo):
+    # e.g. every field left blank in the REPL's update flow
+    book = repo.get_all_books()[0]
+    assert repo.update_book(book, {})
+    assert repo.get_by_id(book.book_id) == book
+    assert not repo.update_book(Book(title="Ghost", author="Nobody"), {})
+
+
+def test_add_books_is_all_or_nothing(repo):
+    count = len(repo.get_all_books())
+    books = [Book(title=f"New {i}", author="X") for i in range(5)]
+    # title is NOT NULL, so the third batch fails
+    books.append(Book(title=None, author="X"))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.add_books(books, batch_size=2)
+
+    assert len(repo.get_all_books()) == count
+    assert repo.find_book_by_name("New 0") == []
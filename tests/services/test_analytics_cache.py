@@ -0,0 +1,84 @@
+from src.domain.book import Book
+from src.services.analytics_cache import AnalyticsCache
+from src.services.book_analytics_service import BookAnalyticsService
+
+
+def make_books():
+    return [
+        Book(title="A", author="X", genre="Fantasy", price_usd=10.0, average_rating=4.0, ratings_count=600),
+        Book(title="B", author="Y", genre="History", price_usd=30.0, average_rating=3.0, ratings_count=700),
+    ]
+
+
+def test_same_version_is_served_from_cache():
+    cache = AnalyticsCache()
+    svc = BookAnalyticsService(cache)
+    frame = svc.get_frame(make_books(), version=1)
+
+    first = svc.top_rated(frame, limit=1)
+    second = svc.top_rated(frame, limit=1)
+    svc.top_rated(frame, limit=2)
+
+    assert first == second
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_new_version_misses():
+    cache = AnalyticsCache()
+    svc = BookAnalyticsService(cache)
+    books = make_books()
+    assert svc.average_price(svc.get_frame(books, version=1)) == 20.0
+
+    books[0].price_usd = 50.0
+
+    assert svc.average_price(svc.get_frame(books, version=2)) == 40.0
+    assert cache.hits == 0
+
+
+def test_lists_are_not_cached():
+    cache = AnalyticsCache()
+    svc = BookAnalyticsService(cache)
+
+    svc.average_price(make_books())
+
+    assert len(cache) == 0
+    assert cache.uncacheable == 1
+
+
+def test_least_recently_used_is_evicted():
+    cache = AnalyticsCache(maxsize=2)
+    svc = BookAnalyticsService(cache)
+    frame = svc.get_frame(make_books(), version=1)
+
+    svc.average_price(frame)
+    svc.value_scores(frame)
+    svc.average_price(frame)
+    svc.group_by(frame)
+
+    assert cache.evictions == 1
+    svc.average_price(frame)
+    assert cache.hits == 2
+
+
+def test_cached_results_cannot_be_mutated_by_callers():
+    svc = BookAnalyticsService(AnalyticsCache())
+    frame = svc.get_frame(make_books(), version=1)
+
+    svc.value_scores(frame).clear()
+
+    assert len(svc.value_scores(frame)) == 2
+
+
+def test_nested_cached_results_cannot_be_mutated_by_callers():
+    svc = BookAnalyticsService(AnalyticsCache())
+    frame = svc.get_frame(make_books(), version=1)
+
+    stats = svc.group_by(frame, "genre", "price")
+    stats["Fantasy"]["mean"] = -1.0
+    stats["History"].clear()
+
+    again = svc.group_by(frame, "genre", "price")
+    assert again["Fantasy"]["mean"] == 10.0
+    assert again["History"]["mean"] == 30.0
+    assert svc.cache.hits == 1
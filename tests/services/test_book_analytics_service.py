@@ -0,0 +1,175 @@
+from datetime import datetime
+import json
+import pytest
+from src.domain.book import Book
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.time_windows import calendar_month, last_days
+
+
+@pytest.fixture
+def books():
+    with open("books.json", encoding="utf-8") as f:
+        return [Book.from_dict(item) for item in json.load(f)]
+
+
+def test_frame_and_list_give_same_results(books):
+    svc = BookAnalyticsService()
+    frame = svc.get_frame(books)
+
+    assert svc.average_price(frame) == pytest.approx(svc.average_price(books))
+    assert svc.top_rated(frame) == svc.top_rated(books)
+    assert svc.value_scores(frame) == svc.value_scores(books)
+    assert svc.get_medians_by_genre(frame) == svc.get_medians_by_genre(books)
+    assert svc.most_popular_genre(frame) == svc.most_popular_genre(books)
+
+
+def test_results_are_plain_python_types(books):
+    svc = BookAnalyticsService()
+    frame = svc.get_frame(books)
+
+    assert type(svc.average_price(frame)) is float
+    assert all(isinstance(b, Book) for b in svc.top_rated(frame))
+    assert all(type(v) is float for v in svc.value_scores(frame).values())
+    assert isinstance(svc.most_popular_genre(frame), str)
+
+
+def test_frame_is_reused_for_same_version(books):
+    svc = BookAnalyticsService()
+
+    frame = svc.get_frame(books, version=3)
+
+    assert svc.get_frame(books, version=3) is frame
+    assert svc.get_frame(books, version=4) is not frame
+    assert svc.get_frame(books) is not svc.get_frame(books)
+
+
+def test_analytics_on_small_catalog():
+    books = [
+        Book(title="A", author="X", genre="Fantasy", price_usd=10.0, average_rating=4.0,
+             ratings_count=600, last_checkout="2026-01-02T10:00:00"),
+        Book(title="B", author="Y", genre="Fantasy", price_usd=20.0, average_rating=3.0,
+             ratings_count=700, last_checkout="2026-01-05T10:00:00"),
+        Book(title="C", author="Z", genre="History", price_usd=30.0, average_rating=5.0,
+             ratings_count=10, last_checkout="2025-12-01T10:00:00"),
+    ]
+    svc = BookAnalyticsService()
+
+    assert svc.average_price(books) == 20.0
+    assert [b.title for b in svc.top_rated(books)] == ["A", "B"]
+    assert svc.get_medians_by_genre(books) == {"Fantasy": 15.0, "History": 30.0}
+    assert svc.most_popular_genre(books, now=datetime(2026, 3, 1)) == "Fantasy"
+    assert svc.most_popular_genre(books, now=datetime(2025, 3, 1)) == "History"
+
+
+def test_group_by_matches_numpy_per_group(books):
+    import numpy as np
+    svc = BookAnalyticsService()
+
+    stats = svc.group_by(books, "publisher", "rating", percentiles=(10, 90))
+
+    for publisher, row in stats.items():
+        ratings = np.array([b.average_rating for b in books if b.publisher == publisher])
+        assert row["count"] == len(ratings)
+        assert row["mean"] == pytest.approx(ratings.mean())
+        assert row["median"] == pytest.approx(np.median(ratings))
+        assert row["min"] == ratings.min() and row["max"] == ratings.max()
+        assert row["p10"] == pytest.approx(np.percentile(ratings, 10))
+        assert row["p90"] == pytest.approx(np.percentile(ratings, 90))
+
+
+def test_group_by_decade_skips_missing_values():
+    books = [
+        Book(title="A", author="X", publication_year=1994, price_usd=10.0),
+        Book(title="B", author="X", publication_year=1999, price_usd=30.0),
+        Book(title="C", author="X", publication_year=2001, price_usd=None),
+        Book(title="D", author="X", publication_year=None, price_usd=5.0),
+        Book(title="E", author="X", publication_year=2005, price_usd=7.0),
+    ]
+
+    stats = BookAnalyticsService().group_by(books, "decade", "price")
+
+    assert list(stats) == ["1990s", "2000s"]
+    assert stats["1990s"]["count"] == 2
+    assert stats["1990s"]["median"] == 20.0
+    assert stats["2000s"]["mean"] == 7.0
+
+
+def test_group_by_rejects_unknown_key(books):
+    with pytest.raises(ValueError):
+        BookAnalyticsService().group_by(books, "title")
+
+
+def test_top_rated_matches_full_sort_with_tie_breaks(books):
+    svc = BookAnalyticsService()
+
+    for limit in (1, 10, 50):
+        expected = sorted(
+            (b for b in books if b.ratings_count >= 500),
+            key=lambda b: (-b.average_rating, -b.ratings_count, b.book_id))[:limit]
+        assert svc.top_rated(books, limit=limit) == expected
+
+
+def test_top_rated_breaks_ties_deterministically():
+    books = [
+        Book(title="A", author="X", average_rating=4.0, ratings_count=600, book_id="b"),
+        Book(title="B", author="X", average_rating=4.0, ratings_count=600, book_id="a"),
+        Book(title="C", author="X", average_rating=4.0, ratings_count=900, book_id="c"),
+        Book(title="D", author="X", average_rating=3.0, ratings_count=900, book_id="d"),
+    ]
+
+    assert [b.title for b in BookAnalyticsService().top_rated(books, limit=2)] == ["C", "B"]
+
+
+def test_bayesian_top_rated_prefers_well_reviewed_books():
+    books = [
+        Book(title="Few", author="X", average_rating=5.0, ratings_count=2),
+        Book(title="Many", author="X", average_rating=4.5, ratings_count=5000),
+        Book(title="Meh", author="X", average_rating=2.0, ratings_count=100),
+    ]
+    svc = BookAnalyticsService()
+
+    assert svc.top_rated(books, min_ratings=0, limit=1)[0].title == "Few"
+    assert svc.top_rated(books, min_ratings=0, limit=1, bayesian=True)[0].title == "Many"
+
+
+def test_snapshot_frame_matches_book_frame(tmp_path, books):
+    from src.repositories.book_snapshot import BookSnapshot, write_snapshot
+    write_snapshot(books, str(tmp_path / "snap"), {})
+    svc = BookAnalyticsService()
+    mapped = svc.get_frame(BookSnapshot(str(tmp_path / "snap")), version=1)
+    built = svc.get_frame(books, version=2)
+
+    assert mapped.books is None
+    assert svc.average_price(mapped) == pytest.approx(svc.average_price(built))
+    assert svc.top_rated(mapped, bayesian=True) == svc.top_rated(built, bayesian=True)
+    assert svc.value_scores(mapped) == svc.value_scores(built)
+    assert svc.group_by(mapped, "decade", "page_count") == svc.group_by(built, "decade", "page_count")
+    assert svc.most_popular_genre(mapped) == svc.most_popular_genre(built)
+
+
+def test_checkout_windows_and_buckets():
+    books = [
+        Book(title="A", author="X", genre="Fantasy", last_checkout="2026-01-05T10:00:00"),
+        Book(title="B", author="X", genre="Fantasy", last_checkout="2026-01-11T23:59:59"),
+        Book(title="C", author="X", genre="History", last_checkout="2026-01-12T00:00:00"),
+        Book(title="D", author="X", genre="History", last_checkout="2026-03-01T08:00:00"),
+        Book(title="E", author="X", genre="History", last_checkout=""),
+        Book(title="F", author="X", genre="Fantasy", last_checkout=None),
+    ]
+    svc = BookAnalyticsService()
+
+    assert svc.checkouts_by_genre(books, *calendar_month(2026, 1)) == {"Fantasy": 2, "History": 1}
+    assert svc.most_popular_genre(books, *last_days(30, now=datetime(2026, 3, 10))) == "History"
+    assert svc.checkout_histogram(books, "month") == {"2026-01": 3, "2026-02": 0, "2026-03": 1}
+    # weeks start on Monday, 2026-01-05 and 2026-01-12 are Mondays
+    assert svc.checkout_histogram(books, "week", "2026-01-05", "2026-01-19") == {
+        "2026-01-05": 2, "2026-01-12": 1}
+    assert svc.checkout_histogram(books, "month", *calendar_month(2026, 1), key="genre") == {
+        "2026-01": {"Fantasy": 2, "History": 1}}
+
+    rolling = svc.rolling_checkouts(books, days=7, start="2026-01-10", end="2026-01-20")
+    assert rolling["2026-01-10"] == 1 and rolling["2026-01-12"] == 2 and rolling["2026-01-19"] == 0
+    assert len(rolling) == 10
+
+    with pytest.raises(ValueError):
+        svc.most_popular_genre(books, *calendar_month(2025, 1))
@@ -0,0 +1,60 @@
+import json
+from datetime import datetime
+from src.repositories import BookRepository
+from src.services.book_generator_service_V2 import generate_books_json
+
+NOW = datetime(2026, 2, 1)
+
+
+def test_output_loads_as_books(tmp_path):
+    path = tmp_path / "books.json"
+
+    generate_books_json(str(path), count=250, seed=7, chunk_size=100, now=NOW)
+
+    books = BookRepository(str(path)).get_all_books()
+    assert [b.title for b in books] == [f"Book Title {i}" for i in range(1, 251)]
+    assert len({b.book_id for b in books}) == 250
+    assert all(1.0 <= b.average_rating <= 5.0 for b in books)
+    assert all("2025-08-01" < b.last_checkout < "2026-02-02" for b in books)
+
+
+def test_same_seed_same_file(tmp_path):
+    first, second, other = tmp_path / "a.json", tmp_path / "b.json", tmp_path / "c.json"
+
+    generate_books_json(str(first), count=120, seed=3, chunk_size=50, now=NOW)
+    generate_books_json(str(second), count=120, seed=3, chunk_size=50, now=NOW)
+    generate_books_json(str(other), count=120, seed=4, chunk_size=50, now=NOW)
+
+    assert first.read_text() == second.read_text()
+    assert first.read_text() != other.read_text()
+
+
+def test_jsonl_has_one_record_per_line(tmp_path):
+    path = tmp_path / "books.jsonl"
+
+    generate_books_json(str(path), count=30, seed=1, chunk_size=7, now=NOW)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["title"] for r in records] == [f"Book Title {i}" for i in range(1, 31)]
+
+
+def test_worker_count_does_not_change_output(tmp_path):
+    serial, parallel = tmp_path / "serial.json", tmp_path / "parallel.json"
+
+    generate_books_json(str(serial), count=230, seed=11, chunk_size=50, now=NOW)
+    generate_books_json(str(parallel), count=230, seed=11, chunk_size=50, now=NOW, workers=3)
+
+    assert serial.read_text() == parallel.read_text()
+    assert len(json.loads(parallel.read_text())) == 230
+    assert not list(tmp_path.glob("*.part-*"))
+
+
+def test_keep_shards_leaves_a_sharded_catalog(tmp_path):
+    single = tmp_path / "books.jsonl"
+    generate_books_json(str(single), count=120, seed=5, chunk_size=50, now=NOW)
+
+    shards = generate_books_json(str(tmp_path / "sharded.jsonl"), count=120, seed=5,
+                                 chunk_size=50, now=NOW, workers=2, keep_shards=True)
+
+    assert len(shards) == 3
+    assert "".join(open(s, encoding="utf-8").read() for s in shards) == single.read_text()
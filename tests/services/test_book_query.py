@@ -0,0 +1,88 @@
+import json
+import shutil
+import pytest
+from src.domain import Book
+from src.repositories import CachedBookRepository, SqliteBookRepository
+from src.services import BookService
+from src.services import book_query
+from src.services.book_query import BookQuery, BookQueryService, QueryError
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / "books.json"
+    shutil.copy("books.json", path)
+    return CachedBookRepository(str(path))
+
+
+@pytest.fixture
+def queries(repo):
+    return BookQueryService(BookService(repo))
+
+
+def test_conjunction_matches_a_plain_python_filter(repo, queries):
+    query = (BookQuery()
+             .where("genre", "in", ["Fantasy", "Sci-Fi"])
+             .where("price", "<", 20)
+             .where("publication_year", ">", 1990)
+             .order_by("rating", descending=True)
+             .limit(5))
+
+    expected = sorted(
+        (b for b in repo.get_all_books()
+         if b.genre in ("Fantasy", "Sci-Fi") and b.price_usd < 20 and b.publication_year > 1990),
+        key=lambda b: -b.average_rating)[:5]
+
+    assert "plan: scan" in queries.explain(query)
+    assert [b.average_rating for b in queries.run(query)] == [b.average_rating for b in expected]
+
+
+def test_multi_key_sort_and_between(repo, queries):
+    query = (BookQuery()
+             .where("page_count", "between", (200, 400))
+             .where("format", "!=", "Ebook")
+             .order_by("genre")
+             .order_by("price", descending=True))
+
+    expected = sorted(
+        (b for b in repo.get_all_books() if 200 <= b.page_count <= 400 and b.format != "Ebook"),
+        key=lambda b: (b.genre, -b.price_usd))
+
+    assert [(b.genre, b.price_usd) for b in queries.run(query)] == \
+        [(b.genre, b.price_usd) for b in expected]
+
+
+def test_uses_the_author_index(repo, queries):
+    author = repo.get_all_books()[0].author
+    query = BookQuery().where("price", ">", 10).where("author", "==", author.upper()).order_by("price")
+
+    plan = queries.explain(query)
+    assert "plan: index" in plan and "find_by_author" in plan
+    assert [b.book_id for b in queries.run(query)] == [
+        b.book_id for b in sorted(repo.find_by_author(author), key=lambda b: b.price_usd)
+        if b.price_usd > 10]
+
+
+def test_picks_index_only_when_selective(tmp_path, monkeypatch):
+    with open("books.json", "r", encoding="utf-8") as f:
+        books = [Book.from_dict(item) for item in json.load(f)]
+    repo = SqliteBookRepository(str(tmp_path / "books.db"))
+    repo.add_books(books)
+    queries = BookQueryService(BookService(repo))
+    query = BookQuery().where("genre", "==", "History").where("rating", ">=", 3.5).order_by("rating")
+
+    assert "via find_by_genre" in queries.explain(query)
+    indexed = queries.run(query)
+
+    monkeypatch.setattr(book_query, "INDEX_MAX_ROWS", 0)
+    assert "skipped index" in queries.explain(query)
+    assert [b.book_id for b in queries.run(query)] == [b.book_id for b in indexed]
+
+
+def test_rejects_bad_queries(queries):
+    with pytest.raises(QueryError):
+        BookQuery().where("genre", "<", "Fantasy")
+    with pytest.raises(QueryError):
+        BookQuery().where("colour", "==", "red")
+    with pytest.raises(QueryError):
+        BookQuery().order_by("colour")
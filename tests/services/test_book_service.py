@@ -1,5 +1,7 @@
 import pytest
 import src.services.book_service as book_service
+from src.domain.book import Book
+from src.repositories import CachedBookRepository, SqliteBookRepository
 from tests.mocks.mock_book_repository import MockBookRepo
 
 def test_get_all_books_positive():
@@ -16,4 +18,48 @@ def test_find_book_name_negative():
 
     with pytest.raises(TypeError) as e:
         book = svc.find_book_by_name(name)
-    assert str(e.value) == "Expected str, got something else"
\ No newline at end of file
+    assert str(e.value) == "Expected str, got something else"
+
+
+def test_bulk_changes_keep_aggregates_in_sync(tmp_path):
+    path = tmp_path / "books.json"
+    path.write_text("[]", encoding="utf-8")
+    svc = book_service.BookService(CachedBookRepository(str(path)))
+    books = [Book(title=f"B{i}", author="X", genre="Fantasy", price_usd=10.0) for i in range(4)]
+
+    assert svc.add_books(books) == 4
+    assert svc.average_price() == 10.0
+
+    report = svc.update_many([(books[0], {"price_usd": 30.0}), (books[1], {"page_count": -1, "genre": "History"})])
+    assert report == {
+        books[0].book_id: {"updated": ["price_usd"], "invalid": []},
+        books[1].book_id: {"updated": ["genre"], "invalid": ["page_count"]},
+    }
+    assert svc.genre_counts() == {"Fantasy": 3, "History": 1}
+
+    with svc.transaction():
+        assert svc.remove_books_by_id([books[2].book_id, books[3].book_id]) == [books[2].book_id, books[3].book_id]
+    assert svc.average_price() == 20.0
+    assert svc.verify_aggregates() == {}
+
+    with pytest.raises(ValueError):
+        with svc.transaction():
+            svc.remove_books_by_id([books[0].book_id])
+            raise ValueError("undo")
+    assert len(svc.get_all_books()) == 2
+    assert svc.average_price() == 20.0
+
+
+def test_update_many_reports_books_with_only_invalid_fields(tmp_path):
+    repo = SqliteBookRepository(str(tmp_path / "books.db"))
+    svc = book_service.BookService(repo)
+    books = [Book(title=f"B{i}", author="X", price_usd=10.0) for i in range(2)]
+    svc.add_books(books)
+
+    report = svc.update_many([(books[0], {"price_usd": 30.0}), (books[1], {"page_count": -1})])
+    assert report == {
+        books[0].book_id: {"updated": ["price_usd"], "invalid": []},
+        books[1].book_id: {"updated": [], "invalid": ["page_count"]},
+    }
+    assert repo.get_by_id(books[0].book_id).price_usd == 30.0
+    repo.close()
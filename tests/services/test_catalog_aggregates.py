@@ -0,0 +1,106 @@
+import math
+from datetime import datetime
+import pytest
+import src.services.catalog_aggregates as catalog_aggregates
+from src.domain.book import Book
+from src.repositories import CachedBookRepository
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_service import BookService
+from src.services.catalog_aggregates import CatalogAggregates
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = tmp_path / "books.json"
+    with open("books.json", encoding="utf-8") as src, open(path, "w", encoding="utf-8") as dst:
+        dst.write(src.read())
+    return BookService(CachedBookRepository(str(path)), CatalogAggregates(year=2026))
+
+
+def test_aggregates_match_analytics(service):
+    books = service.get_all_books()
+    analytics = BookAnalyticsService()
+
+    assert service.average_price() == pytest.approx(analytics.average_price(books))
+    assert service.value_scores() == pytest.approx(analytics.value_scores(books))
+    assert service.most_popular_genre() == analytics.most_popular_genre(books, now=datetime(2026, 6, 1))
+
+
+def test_mutations_update_aggregates_without_rebuild(service):
+    service.average_price()
+    aggregates = service.aggregates
+    count = aggregates.count
+
+    book = Book(title="New", author="X", genre="Poetry", price_usd=1000.0, average_rating=4.0,
+                ratings_count=10, last_checkout="2026-02-01T00:00:00")
+    service.add_book(book)
+    service.update_book(book, {"genre": "Drama"})
+    service.remove_book(service.get_all_books()[0])
+
+    assert service.aggregates is aggregates
+    assert aggregates.count == count
+    assert service.genre_counts()["Drama"] == 1
+    assert "Poetry" not in service.genre_counts()
+    assert service.verify_aggregates() == {}
+
+
+def test_verify_reports_drift(service):
+    service.average_price()
+    service.aggregates.genre_counts["Fantasy"] += 1
+
+    drift = service.verify_aggregates()
+
+    assert list(drift) == ["genre_counts"]
+    materialized, recomputed = drift["genre_counts"]
+    assert materialized["Fantasy"] == recomputed["Fantasy"] + 1
+
+
+def test_external_change_triggers_rebuild(service):
+    service.average_price()
+    # bypass the service, the repository version moves and the aggregates notice
+    service.repo.add_book(Book(title="Sneaky", author="X", price_usd=5.0))
+
+    assert service.aggregates.count + 1 == len(service.get_all_books())
+    assert service.verify_aggregates() == {}
+
+
+def test_checkout_tallies_follow_the_new_year(monkeypatch):
+    class Clock(datetime):
+        today = datetime(2025, 12, 31, 23, 59)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.today
+
+    monkeypatch.setattr(catalog_aggregates, "datetime", Clock)
+    books = [
+        Book(title="Old", author="X", genre="Fantasy", last_checkout="2025-12-30T10:00:00"),
+        Book(title="New", author="X", genre="History", last_checkout="2026-01-01T09:00:00"),
+    ]
+    aggregates = CatalogAggregates(books)
+    assert aggregates.most_popular_genre() == "Fantasy"
+
+    Clock.today = datetime(2026, 1, 2)
+    assert aggregates.most_popular_genre() == "History"
+    assert aggregates.verify(books) == {}
+    aggregates.add(Book(title="Newer", author="X", genre="History", last_checkout="2026-01-02T09:00:00"))
+    assert aggregates.checkouts_by_genre == {"History": 2}
+
+
+def test_dirty_records_dont_break_the_aggregates():
+    clean = Book(title="Clean", author="X", genre="Fantasy", price_usd=10.0, average_rating=4.0, ratings_count=9)
+    dirty = [
+        Book(title="Rating", author="X", genre="Fantasy", price_usd=10.0, average_rating="4.2", ratings_count=9),
+        Book(title="Count", author="X", genre="Fantasy", price_usd=10.0, average_rating=4.0, ratings_count="lots"),
+        Book(title="Price", author="X", genre="Fantasy", price_usd="N/A", average_rating=4.0, ratings_count=9),
+    ]
+    aggregates = CatalogAggregates([clean, *dirty], year=2026)
+
+    assert aggregates.count == 4
+    assert aggregates.average_price() == 10.0
+    assert aggregates.value_scores() == {
+        clean.book_id: pytest.approx(4.0 * math.log1p(9) / 10.0),
+        dirty[1].book_id: pytest.approx(4.0 * math.log1p(0) / 10.0),
+    }
+    aggregates.remove(dirty[0].book_id)
+    assert aggregates.verify([clean, *dirty[1:]]) == {}
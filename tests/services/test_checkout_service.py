@@ -0,0 +1,91 @@
+import shutil
+from datetime import datetime, timedelta
+import pytest
+from src.domain import CheckoutEvent
+from src.repositories import CachedBookRepository, CheckoutHistoryRepository
+from src.services import BookService
+from src.services.checkout_service import CheckoutService
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = tmp_path / "books.json"
+    shutil.copy("books.json", path)
+    books = BookService(CachedBookRepository(str(path)))
+    history = CheckoutHistoryRepository(str(tmp_path / "checkouts"), durable=False)
+    return CheckoutService(books, history)
+
+
+def available_books(service, n):
+    return [b for b in service.book_service.get_all_books() if b.available][:n]
+
+
+def test_check_out_and_in_update_the_book_and_record_events(service):
+    book = available_books(service, 1)[0]
+    when = datetime(2025, 12, 1, 9, 30)
+
+    service.check_out(book, patron="reader@example.com", when=when)
+    assert service.book_service.get_by_id(book.book_id).available is False
+    assert book.last_checkout == when.isoformat()
+    with pytest.raises(RuntimeError):
+        service.check_out(book)
+
+    service.check_in(book, when=when + timedelta(days=7))
+    events = list(service.iter_events(book_id=book.book_id))
+    assert [e.action for e in events] == ["checkout", "checkin"]
+    assert events[0].patron == "reader@example.com"
+    assert book.available is True
+
+
+def test_circulation_counts_over_windows(service):
+    books = available_books(service, 3)
+    start = datetime(2025, 12, 1)
+    for day, book in enumerate([books[0], books[1], books[0], books[2], books[0]]):
+        when = start + timedelta(days=day * 10)
+        service.check_out(book, when=when)
+        service.check_in(book, when=when + timedelta(days=1))
+
+    assert service.circulation_by_book()[books[0].book_id] == 3
+    late = service.circulation_by_book("2025-12-25", "2026-02-01")
+    assert late == {books[0].book_id: 1, books[2].book_id: 1}
+
+    genres = service.circulation_by_genre(start, start + timedelta(days=25))
+    assert sum(genres.values()) == 3
+    assert len(service.events_between(start, start + timedelta(days=11))) == 3
+
+    assert service.circulation_histogram("month") == {"2025-12": 4, "2026-01": 1}
+    assert service.circulation_histogram("month", action="checkin") == {"2025-12": 3, "2026-01": 2}
+    weekly = service.circulation_histogram("week", "2025-12-01", "2025-12-29")
+    assert list(weekly.values()) == [1, 1, 1, 0]
+    by_genre = service.circulation_histogram("month", key="genre")
+    assert sum(by_genre["2025-12"].values()) == 4
+
+
+def test_frame_follows_our_events_and_other_writers(service, tmp_path):
+    books = available_books(service, 2)
+    service.check_out(books[0], when=datetime(2025, 12, 5))
+    assert len(service.get_frame()) == 1
+
+    service.check_out(books[1], when=datetime(2025, 12, 6))
+    assert service.circulation_by_book() == {books[0].book_id: 1, books[1].book_id: 1}
+
+    # another process appending, and a back-dated event
+    other = CheckoutHistoryRepository(service.history.dirpath, durable=False)
+    other.append(CheckoutEvent(books[1].book_id, "checkin", "2025-11-01T00:00:00"))
+    assert [e.action for e in service.events_between()] == ["checkin", "checkout", "checkout"]
+
+
+def test_a_failed_history_write_puts_the_book_back(service, monkeypatch):
+    book = available_books(service, 1)[0]
+    last_checkout = book.last_checkout
+
+    def fail(event):
+        raise OSError("disk full")
+    monkeypatch.setattr(service.history, "append", fail)
+
+    with pytest.raises(OSError):
+        service.check_out(book, when=datetime(2025, 12, 1, 9, 30))
+    stored = service.book_service.get_by_id(book.book_id)
+    assert book.available is True and stored.available is True
+    assert book.last_checkout == last_checkout and stored.last_checkout == last_checkout
+    assert list(service.iter_events(book_id=book.book_id)) == []
@@ -0,0 +1,89 @@
+import json
+import pytest
+from src.domain import Book
+from src.repositories import CachedBookRepository, SqliteBookRepository
+from src.services.ingestion_service import IngestionService
+
+
+@pytest.fixture
+def dirty_records():
+    with open("books_dirty.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_ingests_books_dirty_into_sqlite(tmp_path, dirty_records):
+    repo = SqliteBookRepository(str(tmp_path / "books.db"))
+    report = IngestionService(repo).ingest("books_dirty.json", str(tmp_path / "report.json"), chunk_size=64)
+
+    assert report.read == len(dirty_records)
+    assert report.accepted + report.rejected == report.read
+    assert report.accepted == len(repo.get_all_books())
+    assert report.errors["publisher_email"] == {"unknown field": len(dirty_records)}
+    assert report.records_per_second > 0
+
+    stored = repo.get_all_books()
+    assert all(b.price_usd is None or isinstance(b.price_usd, float) for b in stored)
+    assert all(b.available in (None, True, False) for b in stored)
+
+    with open(report.rejects_path, "r", encoding="utf-8") as f:
+        rejects = [json.loads(line) for line in f]
+    assert len(rejects) == report.rejected
+    assert all(item["errors"] for item in rejects)
+
+    with open(tmp_path / "report.json", "r", encoding="utf-8") as f:
+        assert json.load(f)["accepted"] == report.accepted
+
+
+def test_process_pool_gives_the_same_result(tmp_path):
+    serial = IngestionService(SqliteBookRepository(str(tmp_path / "a.db")))
+    pooled = IngestionService(SqliteBookRepository(str(tmp_path / "b.db")))
+
+    a = serial.ingest("books_dirty.json", str(tmp_path / "a.json"), chunk_size=100)
+    b = pooled.ingest("books_dirty.json", str(tmp_path / "b.json"), chunk_size=100, workers=2)
+
+    assert (a.accepted, a.rejected, a.errors) == (b.accepted, b.rejected, b.errors)
+    assert serial.repo.get_all_books() == pooled.repo.get_all_books()
+
+
+def test_counts_clean_and_rejected_records(tmp_path):
+    path = tmp_path / "books.json"
+    path.write_text("[]", encoding="utf-8")
+    source = tmp_path / "in.jsonl"
+    source.write_text(
+        '{"title": "A", "author": "X", "price_usd": "N/A", "available": "true", "extra": 1}\n'
+        '{"title": "", "author": "Y"}\n'
+        '"oops"\n', encoding="utf-8")
+    repo = CachedBookRepository(str(path))
+
+    report = IngestionService(repo).ingest(str(source))
+
+    assert (report.accepted, report.rejected) == (1, 2)
+    assert repo.get_all_books()[0].available is True
+    assert report.errors["<record>"] == {"not an object": 1}
+
+
+@pytest.mark.parametrize("kind", ["cached", "sqlite"])
+def test_failed_ingest_leaves_the_catalog_unchanged(tmp_path, kind):
+    if kind == "sqlite":
+        repo = SqliteBookRepository(str(tmp_path / "books.db"))
+        repo.add_book(Book(title="Existing", author="X"))
+    else:
+        path = tmp_path / "books.json"
+        path.write_text(json.dumps([Book(title="Existing", author="X").to_dict()]), encoding="utf-8")
+        repo = CachedBookRepository(str(path))
+    before = repo.get_all_books()
+    # a few clean chunks, then the file is cut off mid-record
+    source = tmp_path / "in.jsonl"
+    source.write_text("".join(f'{{"title": "B{i}", "author": "Y"}}\n' for i in range(50)) + '{"title": "C", "auth',
+                      encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        IngestionService(repo).ingest(str(source), str(tmp_path / "report.json"), chunk_size=10)
+
+    assert repo.get_all_books() == before
+    reopened = SqliteBookRepository(repo.filepath) if kind == "sqlite" else CachedBookRepository(repo.filepath)
+    assert reopened.get_all_books() == before
+
+
+def test_from_dict_ignores_extra_keys():
+    assert Book.from_dict({"title": "A", "author": "X", "publisher_email": "a@b.c"}).title == "A"
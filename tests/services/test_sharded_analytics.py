@@ -0,0 +1,49 @@
+from datetime import datetime
+import pytest
+from src.repositories import BookRepository, ShardedBookRepository
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.sharded_analytics import ShardedAnalyticsService
+
+
+@pytest.fixture(scope="module")
+def books():
+    return BookRepository("books.json").get_all_books()
+
+
+@pytest.fixture(params=[(1, False), (2, False), (1, True)], ids=["serial", "pool", "snapshot"])
+def sharded(request, tmp_path, books):
+    workers, use_snapshot = request.param
+    repo = ShardedBookRepository(str(tmp_path / "shards"), shards=4, workers=workers, use_snapshot=use_snapshot)
+    repo.add_books(books)
+    yield ShardedAnalyticsService(repo)
+    repo.close()
+
+
+def test_merged_partials_match_one_pass(sharded, books):
+    analytics = BookAnalyticsService()
+
+    assert sharded.average_price() == pytest.approx(analytics.average_price(books))
+
+    expected = analytics.group_by(books, "genre", "price")
+    totals = sharded.group_totals("genre", "price")
+    assert set(totals) == set(expected)
+    for genre, row in totals.items():
+        assert row["count"] == expected[genre]["count"]
+        assert row["mean"] == pytest.approx(expected[genre]["mean"])
+        assert (row["min"], row["max"]) == (expected[genre]["min"], expected[genre]["max"])
+
+    assert sharded.top_rated(100, 10) == analytics.top_rated(books, 100, 10)
+    assert sharded.top_rated(100, 10, bayesian=True) == analytics.top_rated(books, 100, 10, bayesian=True)
+
+    now = datetime(2026, 3, 1)
+    assert sharded.checkouts_by_genre("2026-01-01", "2027-01-01") == analytics.checkouts_by_genre(
+        books, "2026-01-01", "2027-01-01")
+    assert sharded.most_popular_genre(now=now) == analytics.most_popular_genre(books, now=now)
+
+
+def test_summary_counts_are_exact(sharded, books):
+    summary = sharded.summarize("price", "genre")
+    expected = BookAnalyticsService().summarize_stream([books], "price", "genre")
+    assert summary["count"] == expected["count"]
+    assert summary["mean"] == pytest.approx(expected["mean"])
+    assert summary["quantiles"]["p50"] == pytest.approx(expected["quantiles"]["p50"], rel=0.2)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from src.repositories import BookRepository
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.streaming_stats import StreamingStats
+
+
+def test_stream_summary_matches_full_catalog():
+    repo = BookRepository("books.json")
+    books = repo.get_all_books()
+    prices = np.array([b.price_usd for b in books])
+
+    summary = BookAnalyticsService().summarize_stream(repo.iter_chunks(37))
+
+    assert summary["count"] == len(books)
+    assert summary["mean"] == pytest.approx(prices.mean())
+    assert summary["min"] == prices.min() and summary["max"] == prices.max()
+    assert sum(summary["group_counts"].values()) == len(books)
+    # the sample is bigger than the catalog here, so quantiles are exact
+    assert summary["quantiles"]["p50"] == pytest.approx(np.median(prices))
+
+
+def test_quantiles_are_approximate_but_close_with_small_sample():
+    repo = BookRepository("books.json")
+    prices = np.array([b.price_usd for b in repo.get_all_books()])
+
+    stats = StreamingStats(sample_size=200)
+    for chunk in repo.iter_chunks(50):
+        stats.update(chunk)
+
+    spread = np.percentile(prices, 75) - np.percentile(prices, 25)
+    assert abs(stats.quantile(50) - np.median(prices)) < spread / 2
+
+
+def test_merged_summaries_equal_one_pass():
+    chunks = list(BookRepository("books.json").iter_chunks(100))
+    whole = StreamingStats()
+    for chunk in chunks:
+        whole.update(chunk)
+
+    left, right = StreamingStats(), StreamingStats(seed=1)
+    for chunk in chunks[:2]:
+        left.update(chunk)
+    for chunk in chunks[2:]:
+        right.update(chunk)
+    merged = left.merge(right)
+
+    assert merged.count == whole.count
+    assert merged.mean() == pytest.approx(whole.mean())
+    assert merged.group_counts == whole.group_counts
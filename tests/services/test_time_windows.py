@@ -0,0 +1,62 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from src.services.time_windows import (
+    calendar_month, calendar_year, histogram, in_window, last_days, rolling_counts,
+)
+
+
+def stamps(*values):
+    return np.array([v or "NaT" for v in values], dtype="datetime64[us]")
+
+
+def test_windows_are_half_open():
+    ts = stamps("2025-12-31T23:59:59", "2026-01-01T00:00:00", "2026-12-31T23:59:59", "2027-01-01", None)
+    assert in_window(ts, *calendar_year(2026)).tolist() == [False, True, True, False, False]
+    assert in_window(ts).tolist() == [True, True, True, True, False]
+
+    start, end = calendar_month(2026, 12)
+    assert str(start)[:10] == "2026-12-01" and str(end)[:10] == "2027-01-01"
+
+    start, end = last_days(1, now=datetime(2026, 1, 1, 0, 0))
+    assert in_window(ts, start, end).tolist() == [True, True, False, False, False]
+
+
+@pytest.mark.filterwarnings("error")
+def test_month_windows_use_no_deprecated_numpy_arithmetic():
+    # a bare int added to a datetime64 is a generic-unit timedelta, which numpy deprecates
+    assert [str(bound)[:10] for bound in calendar_month(2026, 1)] == ["2026-01-01", "2026-02-01"]
+    ts = stamps("2026-01-31T23:59:59", "2026-02-01T00:00:00")
+    assert histogram(ts, "month", *calendar_month(2026, 1)) == {"2026-01": 1}
+    assert histogram(ts, "month") == {"2026-01": 1, "2026-02": 1}
+
+
+def test_histogram_buckets():
+    ts = stamps("2026-01-04", "2026-01-05T09:00", "2026-01-11T23:00", "2026-01-20", "2026-03-02")
+
+    assert histogram(ts, "day", "2026-01-03", "2026-01-06") == {
+        "2026-01-03": 0, "2026-01-04": 1, "2026-01-05": 1}
+    # the Sunday belongs to the week before, weeks are labelled by their Monday
+    assert histogram(ts, "week", end="2026-01-26") == {
+        "2025-12-29": 1, "2026-01-05": 2, "2026-01-12": 0, "2026-01-19": 1}
+    assert histogram(ts, "month") == {"2026-01": 4, "2026-02": 0, "2026-03": 1}
+    assert histogram(stamps(None), "month") == {}
+
+    with pytest.raises(ValueError):
+        histogram(ts, "year")
+
+
+def test_histogram_split_by_codes():
+    ts = stamps("2026-01-04", "2026-01-05", "2026-02-11", "2026-02-12")
+    codes = np.array([0, 1, 1, -1])
+    assert histogram(ts, "month", codes=codes, labels=["Fantasy", "History"]) == {
+        "2026-01": {"Fantasy": 1, "History": 1},
+        "2026-02": {"History": 1},
+    }
+
+
+def test_rolling_counts_look_back_before_start():
+    ts = stamps("2026-01-01", "2026-01-02", "2026-01-02", "2026-01-05")
+    assert rolling_counts(ts, days=3, start="2026-01-03", end="2026-01-07") == {
+        "2026-01-03": 3, "2026-01-04": 2, "2026-01-05": 1, "2026-01-06": 1}
+    assert rolling_counts(stamps(None)) == {}